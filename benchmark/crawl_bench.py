@@ -0,0 +1,68 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 20:10
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : end to end crawl throughput benchmark against the mock server
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+from spider import config, jobspider51
+from spider.fetcher import HttpFetcher
+from spider.mockserver import MockServer
+from spider.ratelimit import TokenBucket
+from spider.sink.base import close_sinks
+
+
+def crawl(total: int, pageSize: int, latency: float, error_rate: float, external: bool = False):
+    """ Crawl every page of one query from a fresh output directory
+
+    :Args:
+     - total: Number of postings of the query
+     - pageSize: Number of postings per page
+     - latency: Seconds every response is delayed
+     - error_rate: Share of the requests answered by a 503
+     - external: Crawl the server JOB51_API_BASE points at instead of starting the mock server
+    """
+    server, previous = None, (config.API_BASE, config.AREA_URL)
+    if not external:
+        server = MockServer(total=total, latency=latency, error_rate=error_rate, seed=0).start().configure()
+
+    cwd = os.getcwd()
+    fetcher = HttpFetcher()
+    with tempfile.TemporaryDirectory() as directory:
+        # The spiders write to ../output relative to the working directory
+        os.makedirs(os.path.join(directory, 'run'))
+        os.chdir(os.path.join(directory, 'run'))
+        try:
+            start = time.perf_counter()
+            jobspider51.start(args={'keyword': 'Python', 'page': 1, 'pageSize': pageSize, 'area': '010000'},
+                              save_engine='db', fetcher=fetcher, limiter=TokenBucket(rate=10000, burst=100),
+                              all_pages=True)
+            close_sinks()
+            elapsed = time.perf_counter() - start
+
+            connect = sqlite3.connect(os.path.join(directory, 'output/job/51job.db'))
+            stored = connect.execute('SELECT COUNT(*) FROM `job51`;').fetchone()[0]
+            connect.close()
+        finally:
+            os.chdir(cwd)
+            fetcher.close()
+            if server is not None:
+                server.stop()
+                config.configure(*previous)
+
+    print(f'{total:>8} postings  latency {latency * 1000:5.0f}ms  errors {error_rate:4.0%}  {elapsed:7.2f}s  '
+          f'{stored / elapsed:9.0f} rows/s  {stored} stored')
+
+
+if __name__ == '__main__':
+    pageSize = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    external = 'JOB51_API_BASE' in os.environ
+    crawl(total=10000, pageSize=pageSize, latency=0.0, error_rate=0.0, external=external)
+    crawl(total=10000, pageSize=pageSize, latency=0.05, error_rate=0.0, external=external)
+    crawl(total=10000, pageSize=pageSize, latency=0.05, error_rate=0.05, external=external)
+    crawl(total=40000, pageSize=pageSize, latency=0.0, error_rate=0.0, external=external)
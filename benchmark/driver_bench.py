@@ -0,0 +1,95 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 23:40
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : page load time and memory of the full and the lean browser profile
+
+import sys
+import time
+import argparse
+from spider import config
+from spider.driver.edgedriver import build_driver
+
+# Navigation and resource timing of the last page, transferSize is 0 for blocked and cached resources
+TIMING_SCRIPT = '''
+const navigation = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+return {
+    domContentLoaded: navigation ? navigation.domContentLoadedEventEnd : null,
+    resources: resources.length,
+    transferred: resources.reduce((total, entry) => total + (entry.transferSize || 0), 0),
+    heap: performance.memory ? performance.memory.usedJSHeapSize : 0,
+};
+'''
+
+
+def browser_memory(web):
+    """ Get the resident memory of the browser process tree in bytes, None without psutil
+
+    :Args:
+     - web: Browser webdriver
+    """
+    try:
+        import psutil
+    except ImportError:
+        return None
+
+    driver = psutil.Process(web.service.process.pid)
+    processes = [driver] + driver.children(recursive=True)
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+def run(profile: str, url: str, loads: int, headless: bool):
+    """ Load the url repeatedly with a fresh driver of the profile
+
+    :Args:
+     - profile: full or lean
+     - url: Page url
+     - loads: Number of page loads
+     - headless: Run without a window
+    """
+    # The full profile waits for every subresource, as the driver did before the lean profile
+    web = build_driver(headless=headless, lean=profile == 'lean')
+
+    seconds, timings = [], []
+    try:
+        for _ in range(loads):
+            web.delete_all_cookies()
+            start = time.perf_counter()
+            web.get(url)
+            seconds.append(time.perf_counter() - start)
+            timings.append(web.execute_script(TIMING_SCRIPT))
+        memory = browser_memory(web)
+    finally:
+        web.quit()
+
+    seconds.sort()
+    median = seconds[len(seconds) // 2]
+    transferred = sum(timing['transferred'] for timing in timings) / len(timings)
+    resources = sum(timing['resources'] for timing in timings) / len(timings)
+    heap = max(timing['heap'] for timing in timings)
+    memory_text = f'{memory / 2 ** 20:8.1f} MiB rss' if memory is not None else ' ' * 16
+    print(f'{profile:<5} get {median * 1000:8.1f}ms median  {resources:6.1f} resources  '
+          f'{transferred / 1024:9.1f} KiB  heap {heap / 2 ** 20:6.1f} MiB  {memory_text}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the page loads of the full and the lean driver profile')
+    parser.add_argument('--url', default=config.API_BASE + '/pc/search?keyword=Python&searchType=2',
+                        help='page to load, default to the search page')
+    parser.add_argument('--loads', type=int, default=10)
+    parser.add_argument('--window', action='store_true', help='run with a visible window')
+    args = parser.parse_args()
+
+    for name in ['full', 'lean']:
+        try:
+            run(name, args.url, args.loads, headless=not args.window)
+        except Exception as e:
+            sys.exit('cannot start the browser: ' + str(e))
@@ -0,0 +1,168 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 04:10
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : size and scan speed of the flat and the dictionary-encoded sqlite layout
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import logging
+import tempfile
+from spider.mockserver import MockServer, AREAS
+from spider.normalizer import normalize
+from spider.query import JobQuery
+from spider.sink.sqlitesink import SQLiteSink
+from spider.sink.dictsink import DictionarySQLiteSink
+
+PAGE_SIZE = 200
+
+COMPANY_TYPES = ['民营', '国企', '外资（欧美）', '合资', '上市公司', '事业单位']
+COMPANY_SIZES = ['少于50人', '50-150人', '150-500人', '500-1000人', '1000-5000人', '5000-10000人']
+CITIES = ['北京', '上海', '广州', '深圳', '杭州', '宁波', '南京', '苏州', '成都', '武汉', '西安', '厦门']
+WORDS = ['华信', '博远', '智联', '云启', '鼎盛', '恒通', '创新', '天成', '卓越', '汇丰', '中科', '星海', '安达', '宏图']
+INDUSTRIES = ['信息技术', '网络科技', '软件开发', '电子商务', '数据服务', '智能科技', '金融服务', '教育科技']
+TAGS = ['五险一金', '带薪年假', '绩效奖金', '专业培训', '定期体检', '员工旅游', '餐饮补贴', '交通补贴', '年终奖金',
+        '弹性工作', '周末双休', '节日福利', '通讯补贴', '股票期权', '免费班车', '包住', '加班补助', '全勤奖',
+        '出国机会', '住房补贴', 'Python', 'Django', 'Linux', 'MySQL', 'Redis', '爬虫', '数据分析', '机器学习']
+
+# Scans of the compatibility view, as the readers of the flat job51 run them
+SCANS = {
+    'full scan': 'SELECT * FROM `job51`;',
+    'count by area': 'SELECT `area`, COUNT(*) FROM `job51` GROUP BY `area`;',
+    'count by companyType': 'SELECT `companyType`, COUNT(*) FROM `job51` GROUP BY `companyType`;',
+    'degree filter': "SELECT COUNT(*) FROM `job51` WHERE `degree` = '本科';",
+    'salary range': 'SELECT COUNT(*) FROM `job51` WHERE `salaryMin` >= 10000;',
+}
+
+
+def make_tables(count: int):
+    """ Build normalized tables of synthetic postings, with the company and tag columns of a real crawl
+
+    The mock postings share short company names, one company type and size, an empty logo and two tags,
+    here they vary per company as they do on the site, and a posting has 3 to 6 tags.
+
+    :Args:
+     - count: Number of postings
+    """
+    rand = random.Random(0)
+    tables = []
+    for start in range(0, count, PAGE_SIZE):
+        items = []
+        for index in range(start, min(start + PAGE_SIZE, count)):
+            code, area = AREAS[1 + index % (len(AREAS) - 1)]
+            items.append(MockServer.posting('keyword=Python&jobArea=' + code, 'Python', area, index))
+        table = normalize(items)
+        company = table['companyName'].str.slice(8).astype(int)
+        table['companyName'] = [CITIES[i % len(CITIES)] + WORDS[i // 12 % len(WORDS)] +
+                                INDUSTRIES[i // 168 % len(INDUSTRIES)] + '有限公司' + (str(i) if i >= 1344 else '')
+                                for i in company]
+        table['tags'] = [','.join(rand.sample(TAGS, rand.randint(3, 6))) for _ in company]
+        table['companyType'] = [COMPANY_TYPES[i % len(COMPANY_TYPES)] for i in company]
+        table['companySize'] = [COMPANY_SIZES[i * 7 % len(COMPANY_SIZES)] for i in company]
+        table['logo'] = [f'https://img01.51jobcdn.com/im/images/ehire/logo/{i:08d}/company_logo_{i}.jpg'
+                         for i in company]
+        tables.append(table)
+    return tables
+
+
+def write(cls, tables: list, output: str):
+    """ Write the tables a page at a time
+
+    :Args:
+     - cls: Sink class
+     - tables: Normalized tables
+     - output: Data output path
+    """
+    sink = cls(output)
+    for table in tables:
+        sink.write_table(table)
+        sink.commit()
+    sink.close()
+
+
+def timed(func, repeat: int = 3):
+    """ Best time of a function over the repeats
+
+    :Args:
+     - func: Function without arguments
+     - repeat: Number of runs
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def connect_company(output: str):
+    """ Get the company of the last stored posting, it has few postings
+
+    :Args:
+     - output: Data output path
+    """
+    connect = sqlite3.connect(output)
+    company = connect.execute('SELECT `companyName` FROM `job51` ORDER BY rowid DESC LIMIT 1;').fetchone()[0]
+    connect.close()
+    return company
+
+
+def measure(output: str):
+    """ Time the scans and the query API against an output DB
+
+    :Args:
+     - output: Data output path
+    """
+    connect = sqlite3.connect(f'file:{output}?mode=ro', uri=True)
+    results = {name: timed(lambda: connect.execute(sql).fetchall()) for name, sql in SCANS.items()}
+    connect.close()
+
+    query = JobQuery(output)
+    area = AREAS[3][1]
+    results['search area, 50 pages'] = timed(lambda: [query.search(area=area, pageSize=50) for _ in range(50)])
+    company = connect_company(output)
+    results['search company'] = timed(lambda: query.search(companyName=company, pageSize=50))
+    results['search text, 50 pages'] = timed(lambda: [query.search(text='Engineer', pageSize=50) for _ in range(50)])
+    query.close()
+    return results
+
+
+def bench(count: int):
+    """ Write the same postings in both layouts and compare them
+
+    :Args:
+     - count: Number of postings
+    """
+    tables = make_tables(count)
+    report = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, cls in [('flat', SQLiteSink), ('dict', DictionarySQLiteSink)]:
+            output = os.path.join(directory, cls.FILE)
+            elapsed = timed(lambda: write(cls, tables, output), repeat=1)
+            report[name] = {'write': elapsed, 'size': os.path.getsize(output)}
+            report[name].update(measure(output))
+
+    flat, dictionary = report['flat'], report['dict']
+    print(f"{count} postings")
+    print(f"{'size':<26} {flat['size'] / 2 ** 20:9.1f} MiB {dictionary['size'] / 2 ** 20:9.1f} MiB"
+          f"  {dictionary['size'] / flat['size']:6.2f}x")
+    for key in flat:
+        if key == 'size':
+            continue
+        print(f"{key:<26} {flat[key] * 1000:9.1f} ms  {dictionary[key] * 1000:9.1f} ms"
+              f"  {dictionary[key] / flat[key]:6.2f}x")
+    print()
+
+
+if __name__ == '__main__':
+    # The sinks log every batch, that is not part of the measured work
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"{'':<26} {'flat':>12} {'dict':>12}  {'dict/flat':>6}")
+    for size in [int(arg) for arg in sys.argv[1:]] or [10000, 100000]:
+        bench(size)
@@ -0,0 +1,135 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 05:50
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : k-way merge of shard outputs against re-inserting them through the sinks
+
+import os
+import time
+import sqlite3
+import logging
+import argparse
+import tempfile
+import pandas as pd
+from spider.merge import merge
+from spider.schema import COLUMNS
+from spider.sink.csvsink import CsvSink
+from spider.sink.sqlitesink import SQLiteSink
+from layout_bench import make_tables, PAGE_SIZE
+
+
+def make_shards(directory: str, shards: int, rows: int, overlap: float):
+    """ Write the sqlite and csv outputs of the shards, neighbouring shards share some postings
+
+    Finally, return the sqlite and csv paths
+
+    :Args:
+     - directory: Output directory
+     - shards: Number of shards
+     - rows: Postings per shard
+     - overlap: Share of the postings of a shard also crawled by the next shard
+    """
+    step = int(rows * (1 - overlap)) // PAGE_SIZE
+    tables = make_tables(step * PAGE_SIZE * (shards - 1) + rows)
+    databases, files = [], []
+    for shard in range(shards):
+        path = os.path.join(directory, 'shards', str(shard))
+        os.makedirs(path)
+        sinks = [SQLiteSink(os.path.join(path, '51job.db')), CsvSink(os.path.join(path, '51job.csv'))]
+        for table in tables[shard * step:shard * step + rows // PAGE_SIZE]:
+            for sink in sinks:
+                sink.write_table(table)
+                sink.commit()
+        for sink in sinks:
+            sink.close()
+        databases.append(sinks[0].output)
+        files.append(sinks[1].output)
+    return databases, files
+
+
+def reinsert_db(inputs: list, output: str):
+    """ Merge by reading every shard and writing its rows through a new SQLiteSink
+
+    :Args:
+     - inputs: Shard DBs
+     - output: Merged DB path
+    """
+    sink = SQLiteSink(output)
+    columns = ', '.join(f'`{column}`' for column in COLUMNS)
+    for path in inputs:
+        connect = sqlite3.connect(path)
+        cursor = connect.execute(f'SELECT {columns} FROM `job51` ORDER BY rowid;')
+        while True:
+            records = cursor.fetchmany(PAGE_SIZE)
+            if not records:
+                break
+            sink.write_records(records)
+        connect.close()
+    sink.close()
+
+
+def reinsert_csv(inputs: list, output: str):
+    """ Merge by reading every shard and writing its rows through a new CsvSink
+
+    :Args:
+     - inputs: Shard csv files
+     - output: Merged csv path
+    """
+    sink = CsvSink(output)
+    for path in inputs:
+        for table in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=10000):
+            sink.write_table(table)
+    sink.close()
+
+
+def count(output: str):
+    """ Number of postings of a merged output
+
+    :Args:
+     - output: Merged output path
+    """
+    if output.endswith('.csv'):
+        return sum(1 for _ in open(output + '.idx', encoding='utf-8'))
+    connect = sqlite3.connect(output)
+    total = connect.execute('SELECT COUNT(*) FROM `posting51`;').fetchone()[0]
+    connect.close()
+    return total
+
+
+def bench(shards: int, rows: int, overlap: float):
+    """ Time both ways of merging the sqlite and the csv outputs
+
+    :Args:
+     - shards: Number of shards
+     - rows: Postings per shard
+     - overlap: Share of the postings of a shard also crawled by the next shard
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        databases, files = make_shards(directory, shards, rows, overlap)
+        print(f"{shards} shards of {rows} postings, {overlap:.0%} overlap")
+        for kind, inputs, reinsert in [('db', databases, reinsert_db), ('csv', files, reinsert_csv)]:
+            results = {}
+            for name, func in [('reinsert', reinsert), ('merge', merge)]:
+                output = os.path.join(directory, name + '.' + kind)
+                start = time.perf_counter()
+                func(inputs, output)
+                results[name] = (time.perf_counter() - start, count(output))
+            (slow, total), (fast, merged) = results['reinsert'], results['merge']
+            print(f"{kind:<4} reinsert {slow:8.2f}s   merge {fast:8.2f}s   {slow / fast:5.1f}x faster   "
+                  f"{merged} postings" + ('' if merged == total else f', reinsert has {total}'))
+        print()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the merge of shard outputs')
+    parser.add_argument('--shards', type=int, default=8, help='number of shards')
+    parser.add_argument('--rows', type=int, nargs='+', default=[20000, 100000], help='postings per shard')
+    parser.add_argument('--overlap', type=float, default=0.2, help='share of postings also in the next shard')
+    args = parser.parse_args()
+
+    # The sinks log every batch, that is not part of the measured work
+    logging.getLogger().setLevel(logging.WARNING)
+
+    for size in args.rows:
+        bench(args.shards, size, args.overlap)
@@ -0,0 +1,86 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 16:50
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : item normalization benchmark
+
+import re
+import time
+import random
+from spider.normalizer import normalize
+
+SALARIES = ['1-1.5万', '6千-1.2万', '1.5-2万·13薪', '150-200元/天', '10-20万/年', '面议', '1万以上']
+
+
+def make_items(count: int):
+    """ Build synthetic raw items shaped like resultbody.job.items
+
+    :Args:
+     - count: Number of items
+    """
+    items = []
+    for i in range(count):
+        items.append({
+            'jobName': 'Python Engineer ' + str(i),
+            'jobTags': ['3-4年', '本科', '五险一金', '员工旅游'],
+            'jobAreaString': '宁波',
+            'jobAreaLevelDetail': {'provinceString': '浙江省', 'cityString': '宁波', 'districtString': ''},
+            'provideSalaryString': random.choice(SALARIES),
+            'workYearString': '3-4年',
+            'degreeString': '本科',
+            'fullCompanyName': 'Company ' + str(i % 5000),
+            'companyTypeString': '民营',
+            'companySizeString': '50-150人',
+            'companyLogo': 'https://img04.51jobcdn.com/im/mkt/app/51job_phone/app/homelogo/new/home_logo_default.png',
+            'issueDateString': '2023-12-12 09:22:00'
+        })
+    return items
+
+
+def per_row(items: list):
+    """ The previous path, one dictionary per item
+
+    :Args:
+     - items: Raw items
+    """
+    details = []
+    for item in items:
+        if 'jobAreaLevelDetail' not in item:
+            item['jobAreaLevelDetail'] = item['jobAreaString']
+
+        details.append({
+            'jobName': item['jobName'],
+            'tags': ",".join(item['jobTags']),
+            'area': ''.join(re.findall(r'[\u4e00-\u9fa5]+', str(item['jobAreaLevelDetail']))),
+            'salary': item['provideSalaryString'],
+            'workYear': item['workYearString'],
+            'degree': item['degreeString'],
+            'companyName': item['fullCompanyName'],
+            'companyType': item['companyTypeString'],
+            'companySize': item['companySizeString'],
+            'logo': item['companyLogo'],
+            'issueDate': item['issueDateString']
+        })
+    return details
+
+
+def bench(name: str, func, items: list):
+    """ Time a normalizer
+
+    :Args:
+     - name: Benchmark name
+     - func: Normalizer function
+     - items: Raw items
+    """
+    start = time.perf_counter()
+    func(items)
+    elapsed = time.perf_counter() - start
+    print(f'{name:<10} {len(items):>8} items  {elapsed:8.3f}s  {len(items) / elapsed:12.0f} items/s')
+
+
+if __name__ == '__main__':
+    for count in [1000, 100000]:
+        items = make_items(count)
+        bench('per-row', per_row, items)
+        bench('columnar', normalize, items)
@@ -0,0 +1,261 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 20:40
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : per stage benchmark of the fetch, normalize and save pipeline
+
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+import pandas as pd
+from spider.normalizer import normalize, posting_keys, fingerprints
+from spider.mockserver import MockServer, AREAS
+from spider.sink.csvsink import CsvSink
+from spider.sink.sqlitesink import SQLiteSink
+
+PAGE_SIZE = 200
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def make_bodies(count: int, duplicate_every: int = 10):
+    """ Build synthetic response bodies shaped like the search API, every n-th posting repeats a previous one
+
+    :Args:
+     - count: Number of postings
+     - duplicate_every: Interval of duplicate postings, as pages of overlapping queries have
+    """
+    bodies = []
+    for start in range(0, count, PAGE_SIZE):
+        items = []
+        for index in range(start, min(start + PAGE_SIZE, count)):
+            key = index - 1 if duplicate_every and index % duplicate_every == 0 and index > 0 else index
+            code, area = AREAS[1 + key % (len(AREAS) - 1)]
+            items.append(MockServer.posting('keyword=Python&jobArea=' + code, 'Python', area, key))
+        job = {'items': items, 'totalCount': count}
+        bodies.append(json.dumps({'status': '1', 'resultbody': {'job': job}}, ensure_ascii=False))
+    return bodies
+
+
+def parse(bodies: list):
+    """ JSON parse stage, as the fetcher decodes every response
+
+    :Args:
+     - bodies: Response bodies
+    """
+    return [json.loads(body)['resultbody']['job']['items'] for body in bodies]
+
+
+def normalize_pages(pages: list):
+    """ Normalization stage of save, one table per page
+
+    :Args:
+     - pages: Items of every page
+    """
+    return [normalize(items) for items in pages]
+
+
+def dedup(tables: list):
+    """ Dedup stage, the posting key and fingerprint hashing and lookup of the csv sink
+
+    :Args:
+     - tables: Normalized tables
+    """
+    seen, fresh = {}, 0
+    for table in tables:
+        keys, prints = posting_keys(table), fingerprints(table)
+        changed = pd.Series([seen.get(key) != fingerprint for key, fingerprint in zip(keys, prints)], index=keys.index)
+        keep = changed & ~keys.duplicated(keep='last')
+        seen.update(zip(keys[keep], prints[keep]))
+        fresh += int(keep.sum())
+    return fresh
+
+
+def save_csv(tables: list, directory: str):
+    """ Csv sink stage, a commit per page as the spider does
+
+    :Args:
+     - tables: Normalized tables
+     - directory: Output directory
+    """
+    sink = CsvSink(os.path.join(directory, CsvSink.FILE))
+    for table in tables:
+        sink.write_table(table)
+        sink.commit()
+    sink.close()
+
+
+def save_sqlite(tables: list, directory: str):
+    """ Sqlite sink stage, a commit per page as the spider does
+
+    :Args:
+     - tables: Normalized tables
+     - directory: Output directory
+    """
+    sink = SQLiteSink(os.path.join(directory, SQLiteSink.FILE))
+    for table in tables:
+        sink.write_table(table)
+        sink.commit()
+    sink.close()
+
+
+def save_parquet(tables: list, directory: str):
+    """ Parquet sink stage, a commit per page as the spider does
+
+    :Args:
+     - tables: Normalized tables
+     - directory: Output directory
+    """
+    from spider.sink.parquetsink import ParquetSink
+
+    sink = ParquetSink(os.path.join(directory, ParquetSink.FILE))
+    for table in tables:
+        sink.write_table(table)
+        sink.commit()
+    sink.close()
+
+
+def measure(stage: str, rows: int, func, *args, memory: bool = True, output: bool = False):
+    """ Time a stage, then run it again under tracemalloc for the peak memory
+
+    The timed run is not traced, since tracing slows the allocations down.
+
+    :Args:
+     - stage: Stage name
+     - rows: Number of rows of the input
+     - func: Stage function
+     - args: Stage input
+     - memory: Measure the peak memory
+     - output: The stage takes a fresh output directory as the last argument
+    """
+    def run():
+        directory = tempfile.mkdtemp(prefix='pipeline-') if output else None
+        try:
+            return func(*args, directory) if output else func(*args)
+        finally:
+            if directory is not None:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    gc.collect()
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    record = {'stage': stage, 'rows': rows, 'seconds': round(elapsed, 4),
+              'rows_per_sec': round(rows / elapsed, 1), 'peak_bytes': peak}
+    memory_text = f'{peak / 2 ** 20:9.1f} MiB' if peak is not None else ' ' * 13
+    print(f'{stage:<10} {rows:>9} rows  {elapsed:8.3f}s  {rows / elapsed:11.0f} rows/s  {memory_text}')
+    return record, result
+
+
+def run_size(count: int, memory: bool, parquet: bool):
+    """ Run every stage over a synthetic crawl
+
+    :Args:
+     - count: Number of postings
+     - memory: Measure the peak memory
+     - parquet: Run the parquet sink stage
+    """
+    bodies = make_bodies(count)
+    records = []
+
+    record, pages = measure('parse', count, parse, bodies, memory=memory)
+    records.append(record)
+    del bodies
+
+    record, tables = measure('normalize', count, normalize_pages, pages, memory=memory)
+    records.append(record)
+    del pages
+
+    records.append(measure('dedup', count, dedup, tables, memory=memory)[0])
+    records.append(measure('csv', count, save_csv, tables, memory=memory, output=True)[0])
+    records.append(measure('sqlite', count, save_sqlite, tables, memory=memory, output=True)[0])
+    if parquet:
+        records.append(measure('parquet', count, save_parquet, tables, memory=memory, output=True)[0])
+    return records
+
+
+def revision():
+    """ Get the git revision of the tree, or None outside a git checkout """
+
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(records: list, baseline: str):
+    """ Print the rows per second change against a previous result file
+
+    :Args:
+     - records: Stage records of this run
+     - baseline: Path of a previous result file
+    """
+    with open(baseline, encoding='utf-8') as file:
+        previous = {(record['stage'], record['rows']): record for record in json.load(file)['results']}
+
+    print('\nagainst ' + baseline)
+    for record in records:
+        before = previous.get((record['stage'], record['rows']))
+        if before is None:
+            continue
+        change = record['rows_per_sec'] / before['rows_per_sec'] - 1
+        flag = '  REGRESSION' if change < -0.1 else ''
+        print(f"{record['stage']:<10} {record['rows']:>9} rows  {change:+8.1%}{flag}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the stages of the save pipeline')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--no-memory', action='store_true', help='skip the traced run of the peak memory')
+    parser.add_argument('--output', help='result file, default to benchmark/results/pipeline-<time>.json')
+    parser.add_argument('--baseline', help='previous result file to compare with')
+    args = parser.parse_args()
+
+    # The sinks log every batch, that is not part of the measured work
+    logging.getLogger().setLevel(logging.WARNING)
+
+    try:
+        import pyarrow
+        parquet = True
+    except ImportError:
+        parquet = False
+
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, memory=not args.no_memory, parquet=parquet))
+
+    report = {
+        'benchmark': 'pipeline',
+        'revision': revision(),
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, 'pipeline-' + time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print('\nresults written to ' + output)
+
+    if args.baseline:
+        compare(results, args.baseline)
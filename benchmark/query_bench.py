@@ -0,0 +1,94 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 18:50
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : query API latency benchmark
+
+import os
+import sys
+import time
+import random
+import tempfile
+from spider.query import JobQuery
+from spider.sink.sqlitesink import SQLiteSink
+
+NAMES = ['Python开发工程师', 'Java后端开发', '前端开发工程师', '数据分析师', '算法工程师', '测试工程师',
+         '运维工程师', '产品经理', 'Golang开发', '大数据开发工程师']
+TAGS = ['五险一金', '员工旅游', '年终奖金', '弹性工作', '餐饮补贴', '定期体检', '带薪年假', '股票期权']
+AREAS = ['浙江省宁波', '北京', '上海', '广东省深圳', '广东省广州', '浙江省杭州', '四川省成都', '湖北省武汉']
+DEGREES = ['大专', '本科', '硕士', '博士']
+
+
+def make_records(count: int, seed: int = 0):
+    """ Build synthetic job rows as tuples in COLUMNS order
+
+    :Args:
+     - count: Number of rows
+     - seed: Random seed
+    """
+    rand = random.Random(seed)
+    for i in range(count):
+        low = rand.randrange(3, 40) * 1000
+        yield (rand.choice(NAMES) + str(i), ','.join(rand.sample(TAGS, 3)), rand.choice(AREAS),
+               f'{low // 1000}千-{low * 2 // 1000}千', '3-4年', rand.choice(DEGREES),
+               'Company ' + str(rand.randrange(50000)), '民营', '50-150人', '',
+               f'2023-{rand.randrange(1, 13):02d}-{rand.randrange(1, 29):02d} 09:22:00',
+               float(low), float(low * 2), 'month')
+
+
+def build(output: str, count: int):
+    """ Fill an output DB through the sqlite sink
+
+    :Args:
+     - output: Data output path
+     - count: Number of rows
+    """
+    sink = SQLiteSink(output, batch_size=10000)
+    start = time.perf_counter()
+    sink.write_records(list(make_records(count)))
+    sink.close()
+    elapsed = time.perf_counter() - start
+    print(f'{count:>10} rows written in {elapsed:.2f}s, {count / elapsed:.0f} rows/s with the indexes')
+
+
+def bench(query: JobQuery, name: str, pages: int = 3, **filters):
+    """ Time the first and a deep page of a query
+
+    :Args:
+     - query: Query API
+     - name: Benchmark name
+     - pages: Number of pages to walk
+     - filters: Filters of search
+    """
+    cursor, timings, rows = None, [], 0
+    for _ in range(pages):
+        start = time.perf_counter()
+        items, cursor = query.search(pageSize=50, cursor=cursor, **filters)
+        timings.append((time.perf_counter() - start) * 1000)
+        rows += len(items)
+        if cursor is None:
+            break
+    print(f'{name:<28} {rows:>6} rows  first {timings[0]:7.2f}ms  max {max(timings):7.2f}ms')
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, '51job.db')
+        build(output, count)
+
+        query = JobQuery(output)
+        bench(query, 'latest')
+        bench(query, 'area', area='浙江省宁波')
+        bench(query, 'companyName', companyName='Company 4242')
+        bench(query, 'issueDate range', issuedAfter='2023-06-01', issuedBefore='2023-06-02')
+        bench(query, 'salary', salaryMin=39000)
+        bench(query, 'text', text='Python开发')
+        bench(query, 'text + area', text='算法工程师', area='北京')
+        bench(query, 'tag', tag='股票期权')
+        bench(query, 'short text', text='前端')
+        bench(query, 'rare text', text='Golang开发77')
+        bench(query, 'degree', degree='博士')
+        query.close()
+
@@ -0,0 +1,105 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 12:05
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : sqlite writer benchmark
+
+import os
+import time
+import sqlite3
+import tempfile
+from spider.sink.sqlitesink import SQLiteSink, SQL_TABLE
+
+
+def make_rows(count: int, duplicate_every: int = 10):
+    """ Build synthetic job rows, every n-th row repeats a previous primary key
+
+    :Args:
+     - count: Number of rows
+     - duplicate_every: Interval of duplicate rows
+    """
+    rows = []
+    for i in range(count):
+        key = i - 1 if duplicate_every and i % duplicate_every == 0 and i > 0 else i
+        rows.append({
+            'jobName': 'Python Engineer ' + str(key),
+            'tags': '3-4年,本科,五险一金,员工旅游',
+            'area': '浙江省宁波',
+            'salary': '1-1.5万',
+            'workYear': '3-4年',
+            'degree': '本科',
+            'companyName': 'Company ' + str(key % 5000),
+            'companyType': '民营',
+            'companySize': '50-150人',
+            'logo': 'https://img04.51jobcdn.com/im/mkt/app/51job_phone/app/homelogo/new/home_logo_default.png',
+            'issueDate': '2023-12-12 09:22:00'
+        })
+    return rows
+
+
+def per_row(rows: list, output: str):
+    """ The previous path, one connection, schema check and commit per item
+
+    :Args:
+     - rows: Job rows
+     - output: Data output path
+    """
+    for row in rows:
+        connect = sqlite3.connect(output)
+        cursor = connect.cursor()
+        try:
+            cursor.execute(SQL_TABLE)
+            cursor.execute('INSERT INTO `job51` (`jobName`, `tags`, `area`, `salary`, `workYear`, `degree`, '
+                           '`companyName`, `companyType`, `companySize`, `logo`, `issueDate`) '
+                           'VALUES(:jobName, :tags, :area, :salary, :workYear, :degree, '
+                           ':companyName, :companyType, :companySize, :logo, :issueDate);', row)
+            connect.commit()
+        except sqlite3.IntegrityError:
+            pass
+        finally:
+            cursor.close()
+            connect.close()
+
+
+def batched(rows: list, output: str, page_size: int = 200):
+    """ The batched writer, one flush per page of items
+
+    :Args:
+     - rows: Job rows
+     - output: Data output path
+     - page_size: Number of items per page
+    """
+    sink = SQLiteSink(output)
+    for start in range(0, len(rows), page_size):
+        sink.write_many(rows[start:start + page_size])
+        sink.flush()
+    sink.close()
+
+
+def bench(name: str, func, rows: list):
+    """ Time a writer on a fresh database
+
+    :Args:
+     - name: Benchmark name
+     - func: Writer function
+     - rows: Job rows
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, '51job.db')
+        start = time.perf_counter()
+        func(rows, output)
+        elapsed = time.perf_counter() - start
+
+        connect = sqlite3.connect(output)
+        stored = connect.execute('SELECT COUNT(*) FROM `job51`;').fetchone()[0]
+        connect.close()
+
+    print(f'{name:<10} {len(rows):>8} rows  {elapsed:8.2f}s  {len(rows) / elapsed:12.0f} rows/s  {stored} stored')
+
+
+if __name__ == '__main__':
+    bench('per-row', per_row, make_rows(10000))
+    bench('batched', batched, make_rows(10000))
+    bench('batched', batched, make_rows(100000))
+    bench('batched', batched, make_rows(1000000))
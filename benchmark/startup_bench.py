@@ -0,0 +1,184 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 02:40
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : import time and first request latency of fresh processes
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from spider import config
+from spider.mockserver import MockServer
+from pipeline_bench import revision
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmark', 'results')
+
+MODULES = ['spider', 'spider.area.areaspider51', 'spider.jobspider51', 'spider.scheduler', 'spider.worker',
+           'spider.query']
+
+# Dependencies that should only be loaded by the code paths that use them
+HEAVY = ['pandas', 'pyarrow', 'selenium', 'fake_useragent', 'colorlog']
+
+IMPORT_SCRIPT = '''
+import sys, json, time, importlib
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(json.dumps({'import': time.perf_counter() - start, 'loaded': [m for m in sys.argv[2:] if m in sys.modules]}))
+'''
+
+# Mirrors jobspider51.start for one page, with the time of every step
+REQUEST_SCRIPT = '''
+import json, time
+start = time.perf_counter()
+from spider import jobspider51, preload
+from spider.ratelimit import TokenBucket
+from spider.sink.base import close_sinks, sink_modules
+imported = time.perf_counter()
+preload('spider.normalizer', *sink_modules('job', 'db'))
+spider = jobspider51.JobSipder51(keyword='Python', page=1, pageSize=50, area='010000',
+                                 limiter=TokenBucket(rate=1000, burst=10))
+items = spider.get_data_json()
+fetched = time.perf_counter()
+spider.save(items, 'db')
+close_sinks()
+saved = time.perf_counter()
+print(json.dumps({'import': imported - start, 'first_request': fetched - start, 'first_save': saved - start}))
+'''
+
+
+def child(script: str, args: list, cwd: str):
+    """ Run a script in a fresh interpreter, return its timings and the wall time of the process
+
+    :Args:
+     - script: Python source that prints a JSON object as its last line
+     - args: Script arguments
+     - cwd: Working directory
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT, JOB51_LOG_LEVEL='WARNING')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', script] + args, cwd=cwd, env=env, capture_output=True,
+                            text=True, check=True)
+    wall = time.perf_counter() - start
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['process'] = wall
+    return timings
+
+
+def median(runs: list, key: str):
+    """ Median of a timing over the runs
+
+    :Args:
+     - runs: Timings of every run
+     - key: Timing name
+    """
+    return statistics.median(run[key] for run in runs)
+
+
+def bench_imports(runs: int):
+    """ Time the import of every entry module in fresh processes
+
+    :Args:
+     - runs: Number of processes per module
+    """
+    records = []
+    for module in MODULES:
+        timings = [child(IMPORT_SCRIPT, [module] + HEAVY, ROOT) for _ in range(runs)]
+        record = {'case': 'import ' + module, 'seconds': round(median(timings, 'import'), 4),
+                  'process': round(median(timings, 'process'), 4), 'loaded': timings[-1]['loaded']}
+        print(f"{record['case']:<36} {record['seconds'] * 1000:8.1f}ms  process {record['process'] * 1000:8.1f}ms"
+              f"  loaded {', '.join(record['loaded']) or '-'}")
+        records.append(record)
+    return records
+
+
+def bench_request(runs: int, latency: float):
+    """ Time the first request and the first saved page of fresh processes against the mock server
+
+    A cold process starts from an empty output directory, so the user-agent pool is drawn and cached,
+    a warm one finds the cached pool and an existing output DB.
+
+    :Args:
+     - runs: Number of processes per case
+     - latency: Seconds every response is delayed, the import of pandas and the sinks overlaps it
+    """
+    records = []
+    server = MockServer(total=1000, latency=latency, error_rate=0.0, seed=0).start()
+    previous = (config.API_BASE, config.AREA_URL)
+    server.configure()
+    directory = tempfile.mkdtemp(prefix='startup-')
+    try:
+        for case in ['cold', 'warm']:
+            timings = []
+            for _ in range(runs):
+                if case == 'cold':
+                    shutil.rmtree(directory, ignore_errors=True)
+                # The spiders write to ../output relative to the working directory
+                os.makedirs(os.path.join(directory, 'run'), exist_ok=True)
+                timings.append(child(REQUEST_SCRIPT, [], os.path.join(directory, 'run')))
+
+            for key in ['import', 'first_request', 'first_save']:
+                record = {'case': case + ' ' + key, 'seconds': round(median(timings, key), 4)}
+                print(f"{record['case']:<36} {record['seconds'] * 1000:8.1f}ms")
+                records.append(record)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+        server.stop()
+        config.configure(*previous)
+    return records
+
+
+def compare(records: list, baseline: str):
+    """ Print the change of every timing against a previous result file
+
+    :Args:
+     - records: Records of this run
+     - baseline: Path of a previous result file
+    """
+    with open(baseline, encoding='utf-8') as file:
+        previous = {record['case']: record for record in json.load(file)['results']}
+
+    print('\nagainst ' + baseline)
+    for record in records:
+        before = previous.get(record['case'])
+        if before is None:
+            continue
+        change = record['seconds'] / before['seconds'] - 1
+        flag = '  REGRESSION' if change > 0.1 else ''
+        print(f"{record['case']:<36} {change:+8.1%}{flag}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the import time and first request latency')
+    parser.add_argument('--runs', type=int, default=5, help='fresh processes per case, the median is reported')
+    parser.add_argument('--latency', type=float, default=0.2, help='response delay of the mock server in seconds')
+    parser.add_argument('--output', help='result file, default to benchmark/results/startup-<time>.json')
+    parser.add_argument('--baseline', help='previous result file to compare with')
+    args = parser.parse_args()
+
+    results = bench_imports(args.runs) + bench_request(args.runs, args.latency)
+
+    report = {
+        'benchmark': 'startup',
+        'revision': revision(),
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, 'startup-' + time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print('\nresults written to ' + output)
+
+    if args.baseline:
+        compare(results, args.baseline)
@@ -0,0 +1,127 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 06:30
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : dashboard statistics from the aggregate tables against a pandas scan of job51
+
+import os
+import sys
+import sqlite3
+import logging
+import tempfile
+import pandas as pd
+from spider.query import JobQuery
+from spider.sink.sqlitesink import SQLiteSink
+from layout_bench import make_tables, timed
+
+KEYWORDS = ['Python', 'Java', 'Golang', '数据分析']
+
+# The dashboard views, grouping and filters of JobQuery.stats
+VIEWS = {
+    'by area': {'by': 'area'},
+    'by day': {'by': 'day'},
+    'by degree, one keyword': {'by': 'degree', 'keyword': 'Python'},
+    'by companySize, one area': {'by': 'companySize', 'area': '北京'},
+}
+
+
+class NoStats(object):
+    """ Aggregate store that counts nothing, for the write time without the statistics """
+
+    def apply(self, postings: dict):
+        pass
+
+
+class PlainSink(SQLiteSink):
+    """ SQLiteSink without the statistics """
+
+    def __init__(self, output: str):
+        super().__init__(output)
+        self.aggregate = NoStats()
+
+
+def write(cls, tables: list, output: str):
+    """ Write the tables a page at a time, every keyword finds a page and the next keyword finds half of it
+
+    :Args:
+     - cls: Sink class
+     - tables: Normalized tables
+     - output: Data output path
+    """
+    sink = cls(output)
+    for index, table in enumerate(tables):
+        for keyword, part in [(KEYWORDS[index % len(KEYWORDS)], table),
+                              (KEYWORDS[(index + 1) % len(KEYWORDS)], table.iloc[:len(table) // 2])]:
+            part = part.copy()
+            part.attrs['keyword'] = keyword
+            sink.write_table(part)
+            sink.commit()
+    sink.close()
+
+
+def scan(output: str, by: str, keyword: str = None, area: str = None):
+    """ Compute a view from the rows of job51 by pandas, as a dashboard without the aggregate tables does
+
+    :Args:
+     - output: Data output path
+     - by: Grouping
+     - keyword: Search keyword, the keyword links are read for it
+     - area: Area name
+    """
+    connect = sqlite3.connect(f'file:{output}?mode=ro', uri=True)
+    table = pd.read_sql('SELECT p.`postingKey`, j.* FROM `posting51` p JOIN `job51` j ON j.rowid = p.`jobRowid`;',
+                        connect)
+    if keyword is not None:
+        keys = pd.read_sql('SELECT `postingKey` FROM `keyword51` WHERE `keyword` = ?;', connect, params=(keyword,))
+        table = table[table['postingKey'].isin(keys['postingKey'])]
+    connect.close()
+    if area is not None:
+        table = table[table['area'] == area]
+    table = table.assign(day=table['issueDate'].str.slice(0, 10))
+    monthly = table['salaryPeriod'] == 'month'
+    table = table.assign(salary=table[['salaryMin', 'salaryMax']].mean(axis=1).where(monthly))
+    groups = table.groupby(by)['salary']
+    return pd.DataFrame({'postings': groups.size(), 'salaryMean': groups.mean(),
+                         'salaryMedian': groups.quantile(0.5, interpolation='lower')})
+
+
+def bench(count: int):
+    """ Time the writes with and without the statistics and the dashboard views both ways
+
+    :Args:
+     - count: Number of postings
+    """
+    tables = make_tables(count)
+    with tempfile.TemporaryDirectory() as directory:
+        plain = os.path.join(directory, 'plain.db')
+        output = os.path.join(directory, SQLiteSink.FILE)
+        before = timed(lambda: write(PlainSink, tables, plain), repeat=1)
+        after = timed(lambda: write(SQLiteSink, tables, output), repeat=1)
+
+        connect = sqlite3.connect(output)
+        rows = [connect.execute(f'SELECT COUNT(*) FROM `{table}`;').fetchone()[0]
+                for table in ['job51', 'stats51', 'salaryhist51']]
+        connect.close()
+        print(f"{count} postings, {rows[1]} stats rows, {rows[2]} histogram rows")
+        print(f"{'write, plain vs stats':<28} {before:9.2f} s  {after:9.2f} s  {after / before:6.2f}x")
+
+        query = JobQuery(output)
+        for name, view in VIEWS.items():
+            expected = scan(output, **view)
+            groups = query.stats(**view)
+            assert {group[view['by']]: group['postings'] for group in groups} == expected['postings'].to_dict()
+            slow = timed(lambda: scan(output, **view))
+            fast = timed(lambda: query.stats(**view))
+            print(f"{name:<28} {slow * 1000:9.1f} ms {fast * 1000:9.1f} ms  {slow / fast:6.0f}x faster")
+        query.close()
+    print()
+
+
+if __name__ == '__main__':
+    # The sinks log every batch, that is not part of the measured work
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"{'':<28} {'scan':>12} {'stats':>12}")
+    for size in [int(arg) for arg in sys.argv[1:]] or [10000, 100000]:
+        bench(size)
@@ -6,31 +6,110 @@
 # @Desc    : customized log handler
 
 import os
-import logging
 import sys
+import json
+import queue
+import atexit
+import logging
 import colorlog
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+DATE_FORMAT = '%m/%d/%Y %H:%M:%S %p'
+
+
+class JsonFormatter(logging.Formatter):
+    """ JSON lines formatter, the structured fields of a record are written as top level keys """
+
+    def format(self, record: logging.LogRecord):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """ Queue handler that leaves the formatting to the listener thread
+
+    QueueHandler formats the message in the calling thread so the record can be pickled, the queue
+    here is in-process so the record is enqueued as is. Arguments should not be mutated after logging.
+    """
+
+    def prepare(self, record: logging.LogRecord):
+        return record
 
 
 class HandlerLogger:
     """ Customized log handler,The main functions include console log highlighting
     and output formatting
+
+    In queued mode the calling thread only enqueues the record, a background listener formats it and
+    writes it to the file and the console, so logging I/O and handler locks stay off the crawl path.
+    Messages take %-style arguments and keyword fields, both are only formatted if the level is enabled.
     """
 
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, level: int = logging.DEBUG, queued: bool = False, json_lines: bool = False):
+        """ Init the handlers
+
+        :Args:
+         - filename: log file prefix name
+         - level: lowest logged level
+         - queued: write the records from a background listener thread
+         - json_lines: write the log file as JSON lines with the structured fields
+        """
         self.logger = logging.getLogger()
-        self.formatter = self.__init_formatter()
+        self.level = level
+        self.formatter = JsonFormatter() if json_lines else self.__init_formatter()
         self.color_formatter = self.__init_color_formatter()
         self.log_handler = self.__init_handler(filename=filename)
         self.console_handler = self.__init_console_handler()
+        self.listener = None
         self.__set_log()
         self.__set_log_handler(self.log_handler)
         self.__set_console_handler(self.console_handler)
+        if queued:
+            self.__set_queue()
 
     def __set_log(self):
         """ Logging setting """
 
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(self.level)
+
+    def __set_queue(self):
+        """ Move the handlers behind a queue served by a listener thread """
+
+        self.logger.removeHandler(self.log_handler)
+        self.logger.removeHandler(self.console_handler)
+        self.queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+        self.logger.addHandler(self.queue_handler)
+        self.__start_listener()
+        atexit.register(self.stop)
+        os.register_at_fork(after_in_child=self.__restart_in_child)
+
+    def __start_listener(self):
+        """ Start a listener on a fresh queue, a forked process does not inherit the listener thread """
+
+        self.queue_handler.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue_handler.queue, self.log_handler, self.console_handler,
+                                      respect_handler_level=True)
+        self.listener.start()
+
+    def __restart_in_child(self):
+        """ Start the listener of a forked process, unless the logger was stopped before the fork """
+
+        if self.listener is not None:
+            self.__start_listener()
+
+    def stop(self):
+        """ Write the queued records and stop the listener """
+
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
 
     def __set_log_handler(self, log_handler: RotatingFileHandler):
         """ set log file logging handler
@@ -39,7 +118,7 @@ class HandlerLogger:
          - log_handler: log file logging handler
         """
 
-        log_handler.setLevel(logging.DEBUG)
+        log_handler.setLevel(self.level)
         log_handler.setFormatter(self.formatter)
         self.logger.addHandler(log_handler)
 
@@ -50,7 +129,7 @@ class HandlerLogger:
          - console_handler: console logging handler
         """
 
-        console_handler.setLevel(logging.DEBUG)
+        console_handler.setLevel(self.level)
         console_handler.setFormatter(self.color_formatter)
         self.logger.addHandler(console_handler)
 
@@ -64,7 +143,8 @@ class HandlerLogger:
 
         current_dir = os.path.dirname(__file__)
         abs_dir = os.path.join(current_dir, filename)
-        handler = RotatingFileHandler(filename=abs_dir, maxBytes=512 * 1024, encoding='utf-8', backupCount=3)
+        handler = RotatingFileHandler(filename=abs_dir, maxBytes=512 * 1024, encoding='utf-8', backupCount=3,
+                                      delay=True)
         return handler
 
     @staticmethod
@@ -79,7 +159,6 @@ class HandlerLogger:
         """ init log file formatter """
 
         LOG_FORMAT = '%(asctime)s [ %(levelname)s ]: %(message)s'
-        DATE_FORMAT = '%m/%d/%Y %H:%M:%S %p'
         formater = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
         return formater
 
@@ -89,7 +168,6 @@ class HandlerLogger:
 
         LOG_FORMAT = ('%(log_color)s%(asctime)s %(log_color)s[ %(levelname)s%(reset)s%(log_color)s ]'
                       '%(reset)s%(log_color)s: %(message)s')
-        DATE_FORMAT = '%m/%d/%Y %H:%M:%S %p'
 
         color_formatter = colorlog.ColoredFormatter(
             LOG_FORMAT,
@@ -104,47 +182,70 @@ class HandlerLogger:
         )
         return color_formatter
 
-    def debug(self, message):
+    def debug(self, message, *args, **fields):
         """ Log msg with severity 'DEBUG'.
 
         :Arg
-         - message: Log message
+         - message: Log message, %-style placeholders are filled by args
+         - fields: structured fields of the JSON lines format, such as keyword, area, page and latency
         """
-        self.logger.debug(message)
+        self.__log(logging.DEBUG, message, args, fields)
 
-    def info(self, message):
+    def info(self, message, *args, **fields):
         """ Log msg with severity 'INFO'.
 
         :Arg
-         - message: Log message
+         - message: Log message, %-style placeholders are filled by args
+         - fields: structured fields of the JSON lines format, such as keyword, area, page and latency
         """
-        self.logger.info(message)
+        self.__log(logging.INFO, message, args, fields)
 
-    def warning(self, message):
+    def warning(self, message, *args, **fields):
         """ Log msg with severity 'WARNING'.
 
         :Arg
-         - message: log message
+         - message: log message, %-style placeholders are filled by args
+         - fields: structured fields of the JSON lines format, such as keyword, area, page and latency
         """
-        self.logger.warning(message)
+        self.__log(logging.WARNING, message, args, fields)
 
-    def error(self, message):
+    def error(self, message, *args, **fields):
         """ Log msg with severity 'ERROR'.
 
         :Arg
-         - message: log message
+         - message: log message, %-style placeholders are filled by args
+         - fields: structured fields of the JSON lines format, such as keyword, area, page and latency
         """
-        self.logger.error(message)
+        self.__log(logging.ERROR, message, args, fields)
 
-    def critical(self, message):
+    def critical(self, message, *args, **fields):
         """ Log msg with severity 'CRITICAL'.
 
         :Arg
+         - message: log message, %-style placeholders are filled by args
+         - fields: structured fields of the JSON lines format, such as keyword, area, page and latency
+        """
+        self.__log(logging.CRITICAL, message, args, fields)
+
+    def __log(self, level: int, message, args: tuple, fields: dict):
+        """ Log a record if the level is enabled, nothing is formatted otherwise
+
+        :Arg
+         - level: record level
          - message: log message
+         - args: message arguments
+         - fields: structured fields
         """
-        self.logger.critical(message)
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, message, *args, extra={'fields': fields} if fields else None, stacklevel=3)
 
     def close(self):
-        """ logger close """
+        """ logger close, the queued records are written first and the later records are dropped """
 
         self.logger.disabled = True
+        self.stop()
+        for handler in [getattr(self, 'queue_handler', None), self.log_handler, self.console_handler]:
+            if handler is not None:
+                self.logger.removeHandler(handler)
+        self.log_handler.close()
+        self.console_handler.flush()
@@ -5,6 +5,59 @@
 # @Version : python3.10.6
 # @Desc    : global spider logger
 
-from log import handler_logger
+import os
+import logging
+import importlib
+import threading
 
-logger = handler_logger.HandlerLogger(filename='spider.log')
\ No newline at end of file
+
+class LazyLogger(object):
+    """ Build the HandlerLogger on first use
+
+    Importing spider then opens no log file and starts no listener thread, and colorlog is only imported
+    by the processes that log.
+    """
+
+    def __init__(self, **kwargs):
+        """ Keep the HandlerLogger param
+
+        :Args:
+         - kwargs: HandlerLogger param
+        """
+        self.__kwargs = kwargs
+        self.__logger = None
+        self.__lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        if self.__logger is None:
+            with self.__lock:
+                if self.__logger is None:
+                    from log import handler_logger
+                    self.__logger = handler_logger.HandlerLogger(**self.__kwargs)
+        return getattr(self.__logger, name)
+
+
+# JOB51_LOG_LEVEL such as INFO drops the debug records before they are formatted,
+# JOB51_LOG_FORMAT=json writes spider.log as JSON lines with the keyword, area, page and latency fields
+logger = LazyLogger(filename='spider.log',
+                    level=logging.getLevelName(os.environ.get('JOB51_LOG_LEVEL', 'DEBUG')),
+                    queued=True,
+                    json_lines=os.environ.get('JOB51_LOG_FORMAT') == 'json')
+
+
+def preload(*modules: str):
+    """ Import modules in a background thread, such as pandas and the sinks while the first request is in flight
+
+    A module that fails to import is left alone, the error shows up where the module is used.
+
+    :Args:
+     - modules: Module names
+    """
+    def load():
+        for module in modules:
+            try:
+                importlib.import_module(module)
+            except Exception:
+                return
+
+    threading.Thread(target=load, name='preload', daemon=True).start()
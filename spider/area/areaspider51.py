@@ -6,137 +6,85 @@
 # @Desc    : area data spider
 
 import os
-import re
-import sqlite3
-import requests
-import pandas as pd
-from spider import logger
-from fake_useragent import UserAgent
+from spider import logger, config
+from spider.sink.base import ALIASES, open_sinks, check_engine, sink_class
+from spider.cassette import CassetteStore
+from spider.area.registry import AreaRegistry
 
 class AreaSpider51(object):
     """ This crawler is crawled based on the API"""
 
-    def __init__(self):
-        """ Init the url param """
+    def __init__(self, cassette: CassetteStore = None, registry: AreaRegistry = None):
+        """ Init the url param
 
-        self.url = "https://js.51jobcdn.com/in/js/h5/dd/d_jobarea.js"
-        self.user_agent = UserAgent().random
-        self.headers = {
-            'User-Agent': self.user_agent,
-        }
+        :Args:
+         - cassette: Cassette that records or replays the area script, default to the live request
+         - registry: Cached area dictionary, default to one cached in the area output directory
+        """
+
+        self.url = config.AREA_URL
         self.CSV_FILE = '51area.csv'
         self.SQLITE_FILE = '51area.db'
-        self.create_output_dir()
+        self.directory = os.path.join(os.path.abspath('..'), "output/area")
+        self.registry = registry if registry is not None else AreaRegistry(self.directory, self.url,
+                                                                          cassette=cassette)
 
     def get_data_list(self):
         """ Get area list data
 
         The following is the execution order
 
-            Get row data by request
+            Get the cached script, revalidated by a conditional request once it is expired
             String processing
             Extract by regular expression
 
         Finally, return list data
         """
 
-        request = requests.get(self.url, headers=self.headers).text
-        start = request.find('hotcity') + 8
-        end = request.find(']', start)
-        hotcity = request[start:end + 1]
-
-        start = request.find('allProvince') + 12
-        end = request.find(']', start)
-        allProvince = request[start:end + 1]
-        data = (hotcity + allProvince).replace("][", ",")
-        areaList = data[1:-1]
-
-        pattern = r'{k:"(.*?)",v:"(.*?)"}'
-        areaTupleList = re.findall(pattern, areaList)
-        areaTupleList.pop(0)
-        return areaTupleList
-
-    @staticmethod
-    def create_output_dir():
-        """ Create output directory if not exists """
-
-        root = os.path.abspath('..')
-        directory = os.path.join(root, "output/area")
-        if not os.path.exists(directory):
-            os.makedirs(directory)
+        return self.registry.index.entries
 
     def save(self, data: list, type: str):
-        """ Save functions through different types of mappings
+        """ Save the area list by the sinks of the storage engine
 
         :Arg:
          - data: City List
          - type: Data storage engine, support for csv, db and both
         """
 
-        root = os.path.abspath('..')
-        CSV_FILE_PATH = os.path.join(root, "output/area/" + self.CSV_FILE)
-        SQLITE_FILE_PATH = os.path.join(root, "output/area/" + self.SQLITE_FILE)
+        import pandas as pd
 
-        save_to = {
-            'csv': lambda x: self.save_to_csv(x, CSV_FILE_PATH),
-            'db': lambda x: self.save_to_db(x, SQLITE_FILE_PATH),
-            'both': lambda x: (self.save_to_csv(x, CSV_FILE_PATH),
-                               self.save_to_db(x, SQLITE_FILE_PATH))
-        }
-        save = save_to[type]
-        save(data)
+        table = pd.DataFrame(data, columns=['code', 'area'])
+        for sink in open_sinks('area', type, self.directory):
+            sink.write_table(table)
 
-    def save_to_csv(self, data: list, output: str):
-        """ Save list data to csv
+    def is_saved(self, type: str):
+        """ Check that every output file of the storage engine exists
 
         :Arg:
-         - data: City List
-         - output: Data output path
+         - type: Data storage engine, support for csv, db and both
         """
-        label = (['code', 'area'])
-        df = pd.DataFrame(data, columns=['k', 'v'])
-        df.to_csv(output, index=False, header=label, encoding='utf-8')
+        return all(os.path.exists(os.path.join(self.directory, sink_class('area', name).FILE))
+                   for name in ALIASES.get(type, [type]))
 
-    def save_to_db(self, data: list, output: str):
-        """ Save list data to sqlite
 
-        :Arg:
-         - data: City List
-         - output: Data output path
-        """
-        connect = sqlite3.connect(output)
-        cursor = connect.cursor()
-        sqlClean = '''DROP TABLE IF EXISTS `area51`;'''
-
-        sqlTable = ('''CREATE TABLE IF NOT EXISTS `area51` (
-                  `code` VARCHAR(10) NOT NULL,
-                  `area` VARCHAR(10) NOT NULL,
-                  PRIMARY KEY (`code`)
-        );''')
-
-        sql = '''INSERT INTO `area51` VALUES(?, ?);'''
-
-        try:
-            cursor.execute(sqlClean)
-            cursor.execute(sqlTable)
-            cursor.executemany(sql, data)
-            connect.commit()
-        except Exception as e:
-            logger.warning("SQL execution failure of SQLite: " + str(e))
-        finally:
-            cursor.close()
-            connect.close()
-
-
-def start(save_engine: str):
+def start(save_engine: str, cassette: CassetteStore = None, force: bool = False):
     """ spider starter
 
+    The storage is only rewritten when the content of the area script changed or an output file is missing.
+
     :Arg:
      - save_engine: Data storage engine, support for csv, db and both
+     - cassette: Cassette that records or replays the area script
+     - force: Revalidate the cached script within the TTL and rewrite the storage
     """
-    if save_engine not in ['csv', 'db', 'both']:
-        return logger.error("The data storage engine must be 'csv' , 'db' or 'both' ")
+    error = check_engine('area', save_engine)
+    if error:
+        return logger.error(error)
+
+    spider = AreaSpider51(cassette)
+    changed = spider.registry.refresh(force=force)
+    if not (changed or force or not spider.is_saved(save_engine)):
+        return logger.info('area dictionary unchanged, storage kept')
 
-    spider = AreaSpider51()
     data = spider.get_data_list()
     spider.save(data, save_engine)
\ No newline at end of file
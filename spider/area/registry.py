@@ -0,0 +1,309 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 22:10
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : cached area dictionary and hierarchy index
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import requests
+from spider import logger, config
+from spider.cassette import CassetteStore
+from spider.useragent import random_agent
+
+NATIONWIDE = '000000'
+
+AREA_PATTERN = re.compile(r'{k:"(.*?)",v:"(.*?)"}')
+
+
+def parse_area_script(text: str):
+    """ Extract the (code, name) list of the hot cities and the provinces from d_jobarea.js
+
+    The first hot city entry, the nationwide code, is dropped and repeated codes are only kept once.
+
+    :Args:
+     - text: Content of d_jobarea.js
+    """
+    start = text.find('hotcity') + 8
+    end = text.find(']', start)
+    hotcity = text[start:end + 1]
+
+    start = text.find('allProvince') + 12
+    end = text.find(']', start)
+    allProvince = text[start:end + 1]
+    data = (hotcity + allProvince).replace("][", ",")
+
+    entries = AREA_PATTERN.findall(data[1:-1])[1:]
+    return list(dict(entries).items())
+
+
+def hierarchy(codes: list):
+    """ Build the child codes of every area by the code hierarchy in one pass
+
+    Province codes end with 0000, city codes end with 00, and the nationwide code is 000000.
+
+    :Args:
+     - codes: Area codes
+    """
+    known = set(codes)
+    children = {NATIONWIDE: []}
+    for code in codes:
+        if code == NATIONWIDE:
+            continue
+        if code.endswith('0000'):
+            parents = []
+        elif code.endswith('00'):
+            parents = [code[:2] + '0000']
+        else:
+            parents = [code[:4] + '00', code[:2] + '0000']
+
+        # An area whose parent is not in the dictionary hangs from the nearest known ancestor
+        parent = next((parent for parent in parents if parent in known), NATIONWIDE)
+        children.setdefault(parent, []).append(code)
+    return children
+
+
+class AreaIndex(object):
+    """ In-memory index of the area dictionary: code to name, name to code and the province to city tree """
+
+    def __init__(self, entries: list):
+        """ Build the index
+
+        :Args:
+         - entries: List of (code, name)
+        """
+        self.entries = list(entries)
+        self.names = dict(self.entries)
+        self.codes = {}
+        for code, name in self.entries:
+            self.codes.setdefault(name, code)
+        self.tree = hierarchy([code for code, _ in self.entries])
+
+    def name(self, code: str):
+        """ Get the name of an area code, or None
+
+        :Args:
+         - code: Area code
+        """
+        return self.names.get(code)
+
+    def code(self, name: str):
+        """ Get the code of an area name, or None
+
+        :Args:
+         - name: Area name, such as 北京
+        """
+        return self.codes.get(name)
+
+    def resolve(self, area: str):
+        """ Get the code of an area given by code or name, or None
+
+        :Args:
+         - area: Area code or name
+        """
+        return area if area in self.names or area == NATIONWIDE else self.codes.get(area)
+
+    def children(self, code: str):
+        """ Get the child codes of an area
+
+        :Args:
+         - code: Area code
+        """
+        return self.tree.get(code, [])
+
+    def expand(self, code: str):
+        """ Get the codes of an area and all of its descendants
+
+        :Args:
+         - code: Area code
+        """
+        codes, stack = [], [code]
+        while stack:
+            current = stack.pop()
+            codes.append(current)
+            stack.extend(reversed(self.children(current)))
+        return codes
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, code: str):
+        return code in self.names
+
+
+class AreaRegistry(object):
+    """ Area dictionary backed by a cached copy of d_jobarea.js
+
+    The cached script is used as is within the TTL. After that it is revalidated by a conditional request
+    with its ETag and Last-Modified, so an unchanged dictionary costs a 304 and no parsing. The content
+    hash tells whether the dictionary changed, the area storage only needs a rewrite when it did.
+    A failed request falls back to the stale copy. A copy cached from another url, such as the mock server,
+    is always refetched, and so is the script of a cassette, which is local or meant to be recorded.
+    """
+
+    SCRIPT = 'd_jobarea.js'
+    META = 'd_jobarea.json'
+
+    def __init__(self, directory: str = None, url: str = None, ttl: float = 86400, timeout: float = 15,
+                 cassette: CassetteStore = None):
+        """ Init the cache paths
+
+        :Args:
+         - directory: Cache directory, default to the area output directory
+         - url: Url of the area script, default to config.AREA_URL
+         - ttl: Seconds the cached script is used without revalidation
+         - timeout: Request timeout in seconds
+         - cassette: Cassette that records or replays the area script instead of the conditional request
+        """
+        self.directory = directory or os.path.join(os.path.abspath('..'), 'output/area')
+        self.url = url or config.AREA_URL
+        self.ttl = ttl
+        self.timeout = timeout
+        self.cassette = cassette
+        self.script_path = os.path.join(self.directory, self.SCRIPT)
+        self.meta_path = os.path.join(self.directory, self.META)
+        self.__index = None
+        self.__lock = threading.Lock()
+
+    @property
+    def index(self):
+        """ The area index, loaded from the cache or the network on first use """
+
+        with self.__lock:
+            if self.__index is None:
+                self.__refresh(force=False)
+            return self.__index
+
+    def refresh(self, force: bool = False):
+        """ Revalidate the cached script if it is expired
+
+        Finally, return True if the dictionary content changed
+
+        :Args:
+         - force: Revalidate within the TTL as well
+        """
+        with self.__lock:
+            return self.__refresh(force)
+
+    def __refresh(self, force: bool):
+        """ Revalidate the cached script and rebuild the index if needed
+
+        :Args:
+         - force: Revalidate within the TTL as well
+        """
+        meta = self.__read_meta()
+        text = self.__read_script() if meta.get('url') == self.url else None
+        expired = text is None or force or self.cassette is not None or time.time() - meta['fetched'] > self.ttl
+
+        if expired:
+            try:
+                fetched = self.__fetch(meta if text is not None else {})
+            except Exception as e:
+                if text is None:
+                    raise
+                logger.warning('area script request failed, using the cached copy: ' + str(e))
+                fetched = None
+
+            changed = False
+            if fetched is None:
+                meta['fetched'] = time.time()
+            else:
+                text, headers = fetched
+                digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+                changed = digest != meta.get('hash')
+                meta = {'url': self.url, 'etag': headers.get('ETag'), 'lastModified': headers.get('Last-Modified'),
+                        'hash': digest, 'fetched': time.time()}
+                self.__write(self.script_path, text)
+            self.__write(self.meta_path, json.dumps(meta))
+
+            if changed:
+                logger.info('area dictionary changed, hash ' + meta['hash'][:12])
+                self.__index = AreaIndex(parse_area_script(text))
+                return True
+
+        if self.__index is None:
+            self.__index = AreaIndex(parse_area_script(text))
+        return False
+
+    def __fetch(self, meta: dict):
+        """ Request the script, conditionally if a cached copy is known
+
+        Finally, return the text and the response headers, or None if the cached copy is still valid
+
+        :Args:
+         - meta: Validators of the cached copy
+        """
+        if self.cassette is not None:
+            return self.cassette.text(self.url, lambda: self.__get({}).text), {}
+
+        response = self.__get(meta)
+        if response.status_code == 304:
+            logger.info('area dictionary not modified')
+            return None
+        return response.text, response.headers
+
+    def __get(self, meta: dict):
+        """ Send the request with the validators of the cached copy
+
+        :Args:
+         - meta: Validators of the cached copy
+        """
+        headers = {'User-Agent': random_agent()}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('lastModified'):
+            headers['If-Modified-Since'] = meta['lastModified']
+
+        response = requests.get(self.url, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def __read_meta(self):
+        """ Read the validators, hash and fetch time of the cached copy """
+
+        try:
+            with open(self.meta_path, encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def __read_script(self):
+        """ Read the cached script, or None """
+
+        try:
+            with open(self.script_path, encoding='utf-8') as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def __write(self, path: str, text: str):
+        """ Write a cache file atomically
+
+        :Args:
+         - path: File path
+         - text: File content
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        temp = path + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(temp, path)
+
+
+_shared = None
+_lock = threading.Lock()
+
+
+def shared_registry():
+    """ Get the process wide area registry """
+
+    global _shared
+    with _lock:
+        if _shared is None:
+            _shared = AreaRegistry()
+        return _shared
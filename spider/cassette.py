@@ -0,0 +1,152 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 19:20
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : record and replay cassette of raw responses
+
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from spider import logger
+from spider.fetcher import Fetcher, shared_fetcher
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+# Query params that change on every request and do not select the response
+VOLATILE = ['timestamp', 'requestId']
+
+SQL_CASSETTE_TABLE = '''CREATE TABLE IF NOT EXISTS `cassette` (
+          `key` VARCHAR(1024) NOT NULL,
+          `url` TEXT NOT NULL,
+          `body` BLOB NOT NULL,
+          `recorded` VARCHAR(50) NULL,
+          PRIMARY KEY (`key`)
+);'''
+
+
+class CassetteMiss(Exception):
+    """ The replayed request was not recorded """
+
+
+class CassetteStore(object):
+    """ On-disk store of raw responses keyed by request
+
+    The responses are kept zlib compressed in one sqlite file. A request is keyed by its path and sorted
+    non-empty query params without the volatile ones, so the randomly dropped decoy param, the timestamp
+    and the host do not matter: a cassette recorded against 51job replays against the mock server.
+    """
+
+    def __init__(self, path: str, mode: str = REPLAY):
+        """ Open the cassette
+
+        :Args:
+         - path: Cassette file path
+         - mode: RECORD to fetch and store every response, REPLAY to serve the stored responses only
+        """
+        if mode not in [RECORD, REPLAY]:
+            raise ValueError("mode must be 'record' or 'replay'")
+
+        self.mode = mode
+        self.__lock = threading.Lock()
+        self.connect = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connect.execute('PRAGMA journal_mode=WAL;')
+        self.connect.execute(SQL_CASSETTE_TABLE)
+        self.connect.commit()
+
+    @staticmethod
+    def key(url: str):
+        """ Get the key of a request
+
+        :Args:
+         - url: Request url
+        """
+        parts = urlsplit(url)
+        params = sorted((name, value) for name, value in parse_qsl(parts.query) if value and name not in VOLATILE)
+        return parts.path + '?' + urlencode(params)
+
+    def get(self, url: str):
+        """ Get the stored response text of a request, or None
+
+        :Args:
+         - url: Request url
+        """
+        with self.__lock:
+            row = self.connect.execute('SELECT `body` FROM `cassette` WHERE `key` = ?;', (self.key(url),)).fetchone()
+        return None if row is None else zlib.decompress(row[0]).decode('utf-8')
+
+    def put(self, url: str, text: str):
+        """ Store the response text of a request, a later recording replaces an earlier one
+
+        :Args:
+         - url: Request url
+         - text: Response text
+        """
+        body = zlib.compress(text.encode('utf-8'), 9)
+        with self.__lock, self.connect:
+            self.connect.execute('INSERT OR REPLACE INTO `cassette` VALUES(?, ?, ?, ?);',
+                                 (self.key(url), url, body, time.strftime('%Y-%m-%d %H:%M:%S')))
+
+    def text(self, url: str, load):
+        """ Get the response text of a request by the mode of the cassette
+
+        :Args:
+         - url: Request url
+         - load: Function that fetches the response text, it is only called when recording
+        """
+        if self.mode == REPLAY:
+            text = self.get(url)
+            if text is None:
+                raise CassetteMiss('no recorded response of ' + url)
+            return text
+
+        text = load()
+        self.put(url, text)
+        return text
+
+    def __len__(self):
+        with self.__lock:
+            return self.connect.execute('SELECT COUNT(*) FROM `cassette`;').fetchone()[0]
+
+    def close(self):
+        """ Close the cassette """
+
+        with self.__lock:
+            self.connect.close()
+
+
+class CassetteFetcher(Fetcher):
+    """ Fetcher that records the JSON responses of another fetcher, or replays them offline """
+
+    def __init__(self, store: CassetteStore, fetcher: Fetcher = None):
+        """ Init the cassette
+
+        :Args:
+         - store: Cassette store
+         - fetcher: Fetcher of the recorded requests, default to the process wide fetcher, unused when replaying
+        """
+        self.store = store
+        self.fetcher = fetcher
+
+    def fetch(self, url: str):
+        """ Fetch url through the cassette
+
+        :Args:
+         - url: API url
+        """
+        def load():
+            fetcher = self.fetcher if self.fetcher is not None else shared_fetcher()
+            return json.dumps(fetcher.fetch(url), ensure_ascii=False)
+
+        return json.loads(self.store.text(url, load))
+
+    def close(self):
+        """ Close the given recorded fetcher, the store is owned by the caller """
+
+        logger.info('cassette holds ' + str(len(self.store)) + ' responses')
+        if self.fetcher is not None:
+            self.fetcher.close()
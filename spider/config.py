@@ -0,0 +1,66 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 19:10
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : endpoint and output configuration
+
+import os
+import re
+
+# Base url of the 51job API, such as http://127.0.0.1:8051 to crawl the local mock server
+API_BASE = os.environ.get('JOB51_API_BASE', 'https://we.51job.com')
+
+# Url of the area list script
+AREA_URL = os.environ.get('JOB51_AREA_URL', 'https://js.51jobcdn.com/in/js/h5/dd/d_jobarea.js')
+
+AREA_PATH = '/in/js/h5/dd/d_jobarea.js'
+
+# Shard id of the job outputs, such as a node or worker name. A shard writes its own output DB and csv under
+# output/job/shards/<shard>, so the crawls of several hosts or processes never share a file, see spider.merge
+SHARD = os.environ.get('JOB51_SHARD') or None
+
+
+def configure(api_base: str = None, area_url: str = None, shard: str = None):
+    """ Point the spiders at other endpoints and outputs
+
+    The environment variables are set as well, so worker processes started afterwards inherit the endpoints.
+
+    :Args:
+     - api_base: Base url of the 51job API
+     - area_url: Url of the area list script
+     - shard: Shard id of the job outputs, an empty string for the unsharded outputs
+    """
+    global API_BASE, AREA_URL, SHARD
+    if api_base is not None:
+        API_BASE = os.environ['JOB51_API_BASE'] = api_base.rstrip('/')
+    if area_url is not None:
+        AREA_URL = os.environ['JOB51_AREA_URL'] = area_url
+    if shard is not None:
+        check_shard(shard)
+        os.environ['JOB51_SHARD'] = shard
+        SHARD = shard or None
+
+
+def check_shard(shard: str):
+    """ Check a shard id, it is a directory name of letters, digits, '.', '_' and '-'
+
+    :Args:
+     - shard: Shard id
+    """
+    if shard and (not re.fullmatch(r'[\w.-]+', shard) or shard in ['.', '..']):
+        raise ValueError('Invalid shard id ' + repr(shard))
+
+
+def job_output_dir(shard: str = None):
+    """ Get the output directory of the job data, output/job or output/job/shards/<shard> of a shard
+
+    :Args:
+     - shard: Shard id, default to SHARD
+    """
+    directory = os.path.join(os.path.abspath('..'), 'output/job')
+    shard = shard if shard is not None else SHARD
+    if not shard:
+        return directory
+    check_shard(shard)
+    return os.path.join(directory, 'shards', shard)
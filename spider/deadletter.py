@@ -0,0 +1,218 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 00:40
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : dead-letter table of the permanently failed fetches
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from spider import logger, config
+
+SQL_TABLE = '''CREATE TABLE IF NOT EXISTS `dead51` (
+          `keyword` VARCHAR(255) NOT NULL,
+          `area` VARCHAR(10) NOT NULL,
+          `page` INTEGER NOT NULL,
+          `pageSize` INTEGER NOT NULL,
+          `filters` TEXT NOT NULL DEFAULT '{}',
+          `errorClass` VARCHAR(20) NOT NULL,
+          `error` TEXT NULL,
+          `attempts` INTEGER NOT NULL DEFAULT 0,
+          `failures` INTEGER NOT NULL DEFAULT 1,
+          `created` REAL NOT NULL,
+          `updated` REAL NOT NULL,
+          PRIMARY KEY (`keyword`, `area`, `page`, `filters`)
+);'''
+
+SQL_UPSERT = '''INSERT INTO `dead51` (`keyword`, `area`, `page`, `pageSize`, `filters`, `errorClass`, `error`,
+                                     `attempts`, `created`, `updated`)
+                VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (`keyword`, `area`, `page`, `filters`) DO UPDATE SET
+                `pageSize` = excluded.`pageSize`, `errorClass` = excluded.`errorClass`, `error` = excluded.`error`,
+                `attempts` = `attempts` + excluded.`attempts`, `failures` = `failures` + 1,
+                `updated` = excluded.`updated`;'''
+
+
+class ReplayPlan(object):
+    """ The dead-letter tasks taken for a replay, it can be run by CrawlScheduler or seeded into a TaskQueue """
+
+    def __init__(self, tasks: list):
+        """ Init the plan
+
+        :Args:
+         - tasks: List of url param
+        """
+        self.__tasks = tasks
+
+    def tasks(self):
+        """ Yield the url param of every task """
+
+        yield from self.__tasks
+
+    def __len__(self):
+        return len(self.__tasks)
+
+
+class DeadLetterStore(object):
+    """ (keyword, area, page) tasks whose fetch failed for good, stored in the output DB
+
+    A task is added once its retry policy is used up, with the failure class and the last error. A task
+    that fails again is merged into its row and the failures are counted. Replaying reads the tasks and
+    leaves them in the table, a task is deleted by resolve once its page is fetched and saved, so a replay
+    that crashes or fails again loses nothing.
+
+    The output DB is opened by the first call that needs it and created by the first failed task, so a run
+    that saves only csv and never fails for good leaves no DB behind.
+    """
+
+    def __init__(self, output: str):
+        """ Init the output DB path
+
+        :Args:
+         - output: Data output path
+        """
+        self.output = output
+        self.connect = None
+        self.__lock = threading.Lock()
+
+    def __open(self, create: bool):
+        """ Open the output DB and set up the table, the caller holds the lock
+
+        Finally, return the connection, None if the DB does not exist and is not to be created
+
+        :Args:
+         - create: Create the DB if it does not exist
+        """
+        if self.connect is None and (create or os.path.exists(self.output)):
+            os.makedirs(os.path.dirname(os.path.abspath(self.output)), exist_ok=True)
+            self.connect = sqlite3.connect(self.output, timeout=30, check_same_thread=False)
+            self.connect.execute('PRAGMA journal_mode=WAL;')
+            self.connect.execute(SQL_TABLE)
+            self.connect.commit()
+        return self.connect
+
+    def add(self, task: dict, errorClass: str, error: str, attempts: int):
+        """ Add a failed task
+
+        :Args:
+         - task: Url param, type Dict{'keyword': str, 'page': int, 'pageSize': int, 'area': str, 'filters': dict}
+         - errorClass: Failure class, see spider.retry
+         - error: Last error message
+         - attempts: Number of attempts spent
+        """
+        now = time.time()
+        row = (task['keyword'], task['area'], task['page'], task['pageSize'],
+               json.dumps(task.get('filters') or {}, sort_keys=True), errorClass, error, attempts, now, now)
+        with self.__lock:
+            try:
+                connect = self.__open(create=True)
+                connect.execute(SQL_UPSERT, row)
+                connect.commit()
+            except Exception as e:
+                logger.warning("SQL execution failure of SQLite: " + str(e))
+
+    def resolve(self, task: dict):
+        """ Delete a task whose page is fetched and saved, a task that is not in the table costs a read only
+
+        :Args:
+         - task: Url param, type Dict{'keyword': str, 'page': int, 'pageSize': int, 'area': str, 'filters': dict}
+        """
+        key = (task['keyword'], task['area'], task['page'], json.dumps(task.get('filters') or {}, sort_keys=True))
+        where = ''' WHERE `keyword` = ? AND `area` = ? AND `page` = ? AND `filters` = ?;'''
+        with self.__lock:
+            try:
+                connect = self.__open(create=False)
+                if connect is not None and connect.execute('SELECT 1 FROM `dead51`' + where, key).fetchone():
+                    connect.execute('DELETE FROM `dead51`' + where, key)
+                    connect.commit()
+            except Exception as e:
+                logger.warning("SQL execution failure of SQLite: " + str(e))
+
+    def replay(self, errorClass: str = None, limit: int = None):
+        """ Read the failed tasks, they stay in the table until they are resolved
+
+        Finally, return a ReplayPlan of the tasks
+
+        :Args:
+         - errorClass: Only take the tasks of a failure class, such as blocked, default to all
+         - limit: Max number of tasks to take
+        """
+        sql = '''SELECT `keyword`, `area`, `page`, `pageSize`, `filters` FROM `dead51`'''
+        params = []
+        if errorClass is not None:
+            sql += ''' WHERE `errorClass` = ?'''
+            params.append(errorClass)
+        sql += ''' ORDER BY `created`'''
+        if limit is not None:
+            sql += ''' LIMIT ?'''
+            params.append(limit)
+
+        with self.__lock:
+            try:
+                connect = self.__open(create=False)
+                rows = connect.execute(sql + ';', params).fetchall() if connect is not None else []
+            except Exception as e:
+                logger.warning("SQL execution failure of SQLite: " + str(e))
+                rows = []
+
+        tasks = [{'keyword': row[0], 'area': row[1], 'page': row[2], 'pageSize': row[3],
+                  'filters': json.loads(row[4])} for row in rows]
+        logger.info('replaying ' + str(len(tasks)) + ' dead-letter tasks')
+        return ReplayPlan(tasks)
+
+    def stats(self):
+        """ Count the failed tasks by failure class """
+
+        sql = 'SELECT `errorClass`, COUNT(*) FROM `dead51` GROUP BY `errorClass`;'
+        with self.__lock:
+            connect = self.__open(create=False)
+            rows = connect.execute(sql).fetchall() if connect is not None else []
+        return dict(rows)
+
+    def close(self):
+        """ Close the connection """
+
+        with self.__lock:
+            if self.connect is not None:
+                self.connect.close()
+                self.connect = None
+
+
+_shared = {}
+_lock = threading.Lock()
+
+# Stores of the parent of a forked worker, see _reset_in_child
+_inherited = []
+
+
+def shared_deadletter(directory: str = None):
+    """ Get the process wide dead-letter store of an output directory
+
+    The store is kept by the DB path, so a run after the shard or output is configured again records to its own DB.
+
+    :Args:
+     - directory: Job output directory, default to the one of the shard
+    """
+    output = os.path.join(directory or config.job_output_dir(), '51job.db')
+    with _lock:
+        if output not in _shared:
+            _shared[output] = DeadLetterStore(output)
+        return _shared[output]
+
+
+def _reset_in_child():
+    """ A forked worker opens its own connection, a sqlite connection must not cross a fork
+
+    The store of the parent is kept referenced and never used, so the child does not close its connection,
+    which is the parent's to close.
+    """
+    global _shared, _lock
+    _inherited.extend(_shared.values())
+    _shared = {}
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_in_child)
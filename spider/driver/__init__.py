@@ -0,0 +1,6 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 09:12
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : $END$
@@ -0,0 +1,244 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 09:20
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : reusable webdriver pool
+
+import os
+import time
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+from spider import logger, metrics
+from spider.driver.edgedriver import build_driver
+
+# Unhealthy builds in a row after which warm gives up, a broken driver binary or browser fails every build
+WARM_ATTEMPTS = 3
+
+
+class PooledDriver(object):
+    """ Webdriver wrapper with lease bookkeeping """
+
+    def __init__(self, web):
+        """ Init the driver record
+
+        :Args:
+         - web: Browser webdriver
+        """
+        self.web = web
+        self.pages = 0
+        self.created = time.time()
+
+
+class DriverPool(object):
+    """ Keep warm webdrivers alive and lease them to fetches
+
+    Starting a browser is the main cost of a request, so the drivers are built once and reused.
+    A driver is health checked before every lease, and recycled after it has served a number of pages
+    or its JS heap grows over the memory threshold.
+    """
+
+    def __init__(self, size: int = 1, builder=build_driver, max_pages: int = 100,
+                 max_memory: int = 512 * 1024 * 1024, timeout: float = 300):
+        """ Init the pool param
+
+        :Args:
+         - size: Max number of live drivers
+         - builder: Callable that returns a new webdriver
+         - max_pages: Recycle a driver after serving this number of pages
+         - max_memory: Recycle a driver when its used JS heap exceeds this number of bytes
+         - timeout: Max seconds to wait for an idle driver
+        """
+        self.size = size
+        self.builder = builder
+        self.max_pages = max_pages
+        self.max_memory = max_memory
+        self.timeout = timeout
+        self.__idle = queue.Queue()
+        self.__lock = threading.Lock()
+        self.__total = 0
+        self.__closed = False
+
+    def warm(self):
+        """ Build and verify drivers until the pool is full
+
+        Raise RuntimeError after WARM_ATTEMPTS unhealthy builds in a row
+        """
+        unhealthy = 0
+        while True:
+            driver = self.__grow()
+            if driver is None:
+                break
+            if not self.__is_healthy(driver):
+                self.__destroy(driver)
+                unhealthy += 1
+                if unhealthy >= WARM_ATTEMPTS:
+                    raise RuntimeError('driver pool warm up failed after ' + str(unhealthy) + ' unhealthy builds')
+                continue
+            unhealthy = 0
+            self.__idle.put(driver)
+
+    @contextmanager
+    def lease(self):
+        """ Lease a healthy webdriver, it is returned to the pool on exit
+
+        Usage:
+            with pool.lease() as web:
+                web.get(url)
+        """
+        driver = self.__acquire()
+        try:
+            yield driver.web
+        finally:
+            driver.pages += 1
+            self.__release(driver)
+
+    def close(self):
+        """ Quit all idle drivers, the leased drivers are quit when they are returned """
+
+        self.__closed = True
+        while True:
+            try:
+                driver = self.__idle.get_nowait()
+            except queue.Empty:
+                break
+            self.__destroy(driver)
+
+    def __acquire(self):
+        """ Get an idle driver, build one if the pool is not full yet """
+
+        if self.__closed:
+            raise RuntimeError('driver pool is closed')
+
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                driver = self.__idle.get_nowait()
+            except queue.Empty:
+                driver = self.__grow()
+
+            # All drivers are leased, wait for one to return or for a recycled slot to free up
+            if driver is None:
+                if time.time() > deadline:
+                    raise TimeoutError('no idle driver in ' + str(self.timeout) + ' seconds')
+                try:
+                    driver = self.__idle.get(timeout=1)
+                except queue.Empty:
+                    continue
+
+            if self.__is_healthy(driver):
+                return driver
+
+            logger.warning('driver health check failed, rebuilding')
+            self.__destroy(driver)
+
+    def __release(self, driver: PooledDriver):
+        """ Return a driver to the pool or recycle it
+
+        :Args:
+         - driver: Leased driver
+        """
+        if self.__closed:
+            return self.__destroy(driver)
+
+        if driver.pages >= self.max_pages:
+            logger.info('driver served ' + str(driver.pages) + ' pages, recycling')
+            return self.__destroy(driver)
+
+        memory = self.__used_memory(driver)
+        if memory > self.max_memory:
+            logger.info('driver heap reached ' + str(memory) + ' bytes, recycling')
+            return self.__destroy(driver)
+
+        self.__idle.put(driver)
+
+    def __grow(self):
+        """ Build a new driver if the pool is not full, otherwise return None """
+
+        with self.__lock:
+            if self.__total >= self.size:
+                return None
+            self.__total += 1
+
+        try:
+            with metrics.timer('driver_build'):
+                return PooledDriver(self.builder())
+        except Exception:
+            with self.__lock:
+                self.__total -= 1
+            raise
+
+    def __destroy(self, driver: PooledDriver):
+        """ Quit a driver and free its slot
+
+        :Args:
+         - driver: Driver to quit
+        """
+        try:
+            driver.web.quit()
+        except Exception as e:
+            logger.warning('driver quit failure: ' + str(e))
+        finally:
+            with self.__lock:
+                self.__total -= 1
+
+    @staticmethod
+    def __is_healthy(driver: PooledDriver):
+        """ Check that the browser process still answers
+
+        :Args:
+         - driver: Driver to check
+        """
+        try:
+            return driver.web.execute_script('return 1;') == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def __used_memory(driver: PooledDriver):
+        """ Get used JS heap size of the driver, 0 if unknown
+
+        :Args:
+         - driver: Driver to measure
+        """
+        script = 'return performance.memory ? performance.memory.usedJSHeapSize : 0;'
+        try:
+            return int(driver.web.execute_script(script) or 0)
+        except Exception:
+            return 0
+
+
+_shared = None
+_lock = threading.Lock()
+
+# Pool of the parent of a forked worker, see _reset_in_child
+_inherited = []
+
+
+def shared_pool():
+    """ Get the process wide driver pool, it is closed on exit """
+
+    global _shared
+    with _lock:
+        if _shared is None:
+            _shared = DriverPool()
+            atexit.register(_shared.close)
+        return _shared
+
+
+def _reset_in_child():
+    """ A forked worker opens its own pool, the webdriver sessions of the parent must not be used by two processes
+
+    The pool of the parent is kept referenced and no longer closed on exit, its browsers are the parent's to quit.
+    """
+    global _shared, _lock
+    if _shared is not None:
+        atexit.unregister(_shared.close)
+        _inherited.append(_shared)
+    _shared = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_in_child)
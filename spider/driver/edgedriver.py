@@ -0,0 +1,246 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 09:12
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : edge webdriver builder and slider verification
+
+import os
+import random
+from spider import logger
+from spider.useragent import random_agent
+from selenium import webdriver
+from selenium.webdriver import ActionChains
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+# Set JOB51_HEADLESS=0 to watch the browser
+HEADLESS = os.environ.get('JOB51_HEADLESS', '1') != '0'
+
+# Fixed viewport, the slider offset is measured in it whether or not the browser is headless
+WINDOW_SIZE = (1920, 1080)
+
+# Resources the crawler never reads, block_resources has the browser fail their requests by the DevTools
+# protocol Network.setBlockedURLs before they are sent
+BLOCKED_IMAGES = ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp']
+BLOCKED_FONTS = ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot']
+BLOCKED_MEDIA = ['*.mp4', '*.webm', '*.mp3', '*.m4a', '*.ogg', '*.wav']
+BLOCKED_STYLES = ['*.css']
+BLOCKED_URLS = BLOCKED_IMAGES + BLOCKED_FONTS + BLOCKED_MEDIA + BLOCKED_STYLES
+
+SLIDER_XPATH = '//div[@class="nc_bg"]'
+
+# States of a fetched page, see page_state
+LOADING = 'loading'
+READY = 'ready'
+SLIDER = 'slider'
+REJECTED = 'rejected'
+BLOCKED = 'blocked'
+
+# Classify the page in one round trip: the JSON body is parsed in the page, so a half rendered body is
+# still loading, the slider is rejected once the challenge shows its error, and a page that is neither
+# JSON nor a challenge but has a denial text or title is blocked
+STATE_SCRIPT = '''
+const body = document.body;
+if (!body) return ['loading', null];
+if (document.querySelector('div.nc_bg, #nc_1_wrapper')) {
+    const failed = document.querySelector('.errloading, #nc_1_refresh1, .nc-lang-cnt[data-nc-lang="_errorNetwork"]');
+    return [failed ? 'rejected' : 'slider', null];
+}
+for (const node of [document.querySelector('pre'), document.querySelector('div'), body]) {
+    const text = node ? node.innerText.trim() : '';
+    if (text.startsWith('{')) {
+        try { JSON.parse(text); return ['ready', text]; } catch (e) {}
+    }
+}
+const summary = (document.title + ' ' + body.innerText).slice(0, 500);
+if (/403|Forbidden|Access Denied|访问受限|访问被拒绝|请求过于频繁|禁止访问/.test(summary)) return ['blocked', summary];
+return ['loading', null];
+'''
+
+# Runs before any script of every page, an execute_script after the start only patches the blank page
+STEALTH_SCRIPT = 'Object.defineProperty(navigator, "webdriver", {get: () => false,});'
+
+
+def build_driver(headless: bool = None, lean: bool = True):
+    """ Init webdriver
+
+    During the building process, it is necessary to set up an anti crawler detection strategy by Option.
+
+        .add_argument('--headless=new')
+        -> Set headless page, run silently. The new headless mode runs the full browser, unlike the old
+        one it renders the slider like a visible window does
+
+        .add_argument("--window-size=1920,1080")
+        -> In headless status, browse without a window size, so if the size of the window is not specified,
+        sliding verification may fail
+
+        .add_experimental_option('excludeSwitches',['enable-automation','enable-logging'])
+        -> Disable auto control and log feature of the browser
+
+        .add_argument('--disable-blink-features=AutomationControlled')
+        -> Set navigator.webdriver=false
+
+        .add_experimental_option('useAutomationExtension', False)
+        -> Disable auto control extension of the browser
+
+        .add_argument(f'user-agent={user_agent}')
+        -> Add random UA, it also hides the HeadlessEdg token of the default UA
+
+        .add_argument('--inprivate')
+        -> Start by Private Browsing
+
+    The lean profile additionally sets up the following
+
+        .page_load_strategy = 'eager'
+        -> Return from get() on DOMContentLoaded, without waiting for the subresources
+
+        .add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        .add_argument('--blink-settings=imagesEnabled=false')
+        -> Tell the profile and the renderer not to show images, this blocks no request by itself
+
+        .add_argument('--disable-extensions'), '--disable-background-networking', '--disable-component-update',
+        '--disable-features=...', '--mute-audio'
+        -> Turn off the extensions, the browser's own background requests, component updates, the Edge
+        shopping, collections and sign-in features and the audio, none of them block a page resource
+
+        block_resources(web)
+        -> Block the requests of the images, fonts, media and stylesheets of the pages by the DevTools
+        protocol Network.setBlockedURLs, this is what keeps the page resources off the network
+
+    Finally, inject script to change navigator = false on every new document.
+
+    :Args:
+     - headless: Run without a window, default to JOB51_HEADLESS
+     - lean: Block the resources the crawler does not read
+    """
+    user_agent = random_agent()
+    headless = HEADLESS if headless is None else headless
+
+    options = webdriver.EdgeOptions()
+    if headless:
+        options.add_argument('--headless=new')
+
+    options.add_experimental_option('excludeSwitches', ['enable-automation', 'enable-logging'])
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_experimental_option('useAutomationExtension', False)
+    options.add_argument(f'user-agent={user_agent}')
+    options.add_argument('--window-size={},{}'.format(*WINDOW_SIZE))
+    options.add_argument('--inprivate')
+
+    if lean:
+        options.page_load_strategy = 'eager'
+        options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_argument('--disable-extensions')
+        options.add_argument('--disable-background-networking')
+        options.add_argument('--disable-component-update')
+        options.add_argument('--disable-features=msEdgeShopping,EdgeCollections,msImplicitSignin')
+        options.add_argument('--mute-audio')
+
+    web = webdriver.Edge(options=options)
+    web.set_window_size(*WINDOW_SIZE)
+    web.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': STEALTH_SCRIPT})
+    if lean:
+        block_resources(web)
+    return web
+
+
+def block_resources(web: webdriver, patterns: list = None):
+    """ Block the requests matching the url patterns in the browser
+
+    :Args:
+     - web: Browser webdriver
+     - patterns: Url wildcard patterns, default to BLOCKED_URLS, an empty list lifts the block
+    """
+    web.execute_cdp_cmd('Network.enable', {})
+    web.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URLS if patterns is None else patterns})
+
+
+def page_state(web: webdriver):
+    """ Classify the current page
+
+    Finally, return the state and the JSON text of a ready page, or the page summary of a blocked page
+
+    :Args:
+     - web: Browser webdriver
+    """
+    state, text = web.execute_script(STATE_SCRIPT)
+    return state, text
+
+
+def wait_for_state(web: webdriver, states: list, timeout: float, poll: float = 0.05):
+    """ Poll the page state until it is one of the states
+
+    The wait ends as soon as the state shows up, instead of sleeping a fixed time.
+    A TimeoutException is raised with the last state if it does not show up in time.
+
+    :Args:
+     - web: Browser webdriver
+     - states: Expected states
+     - timeout: Max seconds to wait
+     - poll: Seconds between the checks
+    """
+    last = [LOADING]
+
+    def reached(driver):
+        state, text = page_state(driver)
+        last[0] = state
+        return (state, text) if state in states else False
+
+    try:
+        return WebDriverWait(web, timeout, poll_frequency=poll).until(reached)
+    except TimeoutException:
+        raise TimeoutException(f'page stayed {last[0]} for {timeout}s, expected {"/".join(states)}')
+
+
+def slider_verify(web: webdriver):
+    """ Slider verification action
+
+    This requires the mouse to perform the following operations in following order
+
+        1. put mouse on slider       ->   .move_to_element(slider)
+        2. hold mouse on             ->   .click_and_hold()
+        3. move to target position   ->   .move_by_offset(300, 0)
+
+    Finally, perform action          ->   .perform()
+
+    The slider has no size while its stylesheet is blocked, then the stylesheets are let through for one
+    reload of the challenge page and blocked again afterwards.
+
+    :Args:
+     - web: Browser webdriver
+    """
+    slider = web.find_elements(By.XPATH, SLIDER_XPATH)
+
+    if len(slider) <= 0:
+        logger.warning("slider not found")
+        return
+
+    restyled = False
+    if not slider[0].size.get('width'):
+        block_resources(web, BLOCKED_IMAGES + BLOCKED_FONTS + BLOCKED_MEDIA)
+        restyled = True
+        web.refresh()
+        try:
+            # The eager load returns before the challenge script has built the slider
+            slider = WebDriverWait(web, 10).until(lambda driver: driver.find_elements(By.XPATH, SLIDER_XPATH))
+        except TimeoutException:
+            slider = []
+
+    try:
+        if len(slider) <= 0:
+            logger.warning("slider not found")
+            return
+
+        slider = slider[0]
+        action_chains = (ActionChains(web)
+                         .move_to_element(slider)
+                         .click_and_hold()
+                         .move_by_offset(300 + random.randint(1, 20), 0))
+
+        action_chains.perform()
+    finally:
+        if restyled:
+            block_resources(web)
@@ -0,0 +1,268 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 10:05
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : pluggable fetcher backend
+
+import os
+import json
+import threading
+import requests
+from typing import TYPE_CHECKING
+from spider import logger, config, metrics
+from requests.adapters import HTTPAdapter
+from spider.useragent import random_agent
+
+if TYPE_CHECKING:
+    from spider.driver.driverpool import DriverPool
+
+
+class SliderChallenge(Exception):
+    """ The response is a slider challenge page instead of JSON """
+
+
+class PageBlocked(Exception):
+    """ The site answered with a denial page, neither JSON nor a challenge """
+
+
+class StatusError(Exception):
+    """ The API answered with a status other than 1 """
+
+
+class Fetcher(object):
+    """ Fetch an API url and return the decoded JSON """
+
+    def fetch(self, url: str):
+        """ Fetch url and return JSON data
+
+        :Args:
+         - url: API url
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """ Release the resources held by the fetcher """
+
+
+# Statuses the WAF serves its slider challenge with, a non-JSON body with one of them is a challenge, not an error
+CHALLENGE_STATUS = {403, 405}
+
+
+class HttpFetcher(Fetcher):
+    """ Keep-alive, connection pooled HTTP client """
+
+    def __init__(self, pool_size: int = 10, timeout: float = 15):
+        """ Init the session
+
+        :Args:
+         - pool_size: Max number of kept alive connections per host
+         - timeout: Request timeout in seconds
+        """
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': random_agent(),
+            'Accept': 'application/json, text/plain, */*',
+            'Referer': config.API_BASE + '/pc/search',
+            'Connection': 'keep-alive',
+        })
+
+    def fetch(self, url: str):
+        """ Fetch url by the pooled session, raise SliderChallenge if the response is not JSON
+
+        The body is checked before the status, a challenge served with a CHALLENGE_STATUS is a SliderChallenge
+        that FallbackFetcher passes to the browser. Any other error status is raised as an HTTPError.
+
+        :Args:
+         - url: API url
+        """
+        with metrics.timer('http_get'):
+            response = self.session.get(url, timeout=self.timeout)
+        try:
+            with metrics.timer('parse'):
+                data = json.loads(response.text)
+        except ValueError:
+            if response.status_code not in CHALLENGE_STATUS:
+                response.raise_for_status()
+            metrics.count('challenges_total')
+            raise SliderChallenge('response of ' + url + ' is not JSON, status ' + str(response.status_code))
+        response.raise_for_status()
+        return data
+
+    def close(self):
+        """ Close the pooled connections """
+
+        self.session.close()
+
+
+class BrowserFetcher(Fetcher):
+    """ Selenium fetcher, it passes the slider verification by a leased webdriver
+
+    Selenium is imported when the fetcher is created, the HTTP fast path never loads it.
+
+    A fetch is a small state machine over the page state, every step waits only until the next state shows up
+
+        loading  --JSON parsed-->          ready     -> return the JSON
+        loading  --challenge shown-->      slider    -> verify, then wait again for ready
+        slider   --challenge error-->      rejected  -> raise SliderChallenge
+        any      --denial page-->          blocked   -> raise PageBlocked
+        no state change in time                      -> raise TimeoutException
+    """
+
+    def __init__(self, pool: 'DriverPool' = None, timeout: float = 15, verify_timeout: float = 10):
+        """ Init the driver pool
+
+        :Args:
+         - pool: Webdriver pool to lease browsers from, default to the process wide pool
+         - timeout: Max seconds to wait for the page to turn into JSON, a challenge or a denial
+         - verify_timeout: Max seconds to wait for the JSON after the slider was moved
+        """
+        from spider.driver.driverpool import shared_pool
+
+        self.pool = pool if pool is not None else shared_pool()
+        self.timeout = timeout
+        self.verify_timeout = verify_timeout
+
+    def fetch(self, url: str):
+        """ Fetch url by the browser
+
+        The following is the execution order
+
+            Leasing a driver from the pool and start url
+            Waiting for the JSON, the slider or a denial page
+            Passing slider verification if the slider is shown, and waiting for the JSON again
+            Json Parsing of the text extracted in the page
+
+        :Args:
+         - url: API url
+        """
+        from spider.driver.edgedriver import slider_verify, wait_for_state, READY, SLIDER, REJECTED, BLOCKED
+
+        with self.pool.lease() as web:
+            with metrics.timer('web_get'):
+                web.get(url)
+
+            with metrics.timer('page_wait'):
+                state, text = wait_for_state(web, [READY, SLIDER, BLOCKED], self.timeout)
+
+            if state == SLIDER:
+                metrics.count('sliders_total')
+                with metrics.timer('slider_verify'):
+                    slider_verify(web)
+                    state, text = wait_for_state(web, [READY, REJECTED, BLOCKED], self.verify_timeout)
+                if state == REJECTED:
+                    raise SliderChallenge('slider verification of ' + url + ' was rejected')
+
+        if state == BLOCKED:
+            raise PageBlocked('request of ' + url + ' was blocked: ' + text[:100])
+
+        with metrics.timer('parse'):
+            return json.loads(text)
+
+
+class FallbackFetcher(Fetcher):
+    """ Try the HTTP fast path first, fall back to the browser per request when a slider challenge shows up
+
+    The number of requests served by each path is counted, see stats()
+    The default browser fallback is only created by the first challenge.
+    """
+
+    def __init__(self, primary: Fetcher = None, fallback: Fetcher = None):
+        """ Init the fetchers
+
+        :Args:
+         - primary: Fast path fetcher, default to HttpFetcher
+         - fallback: Fetcher used on slider challenge, default to BrowserFetcher
+        """
+        self.primary = primary if primary is not None else HttpFetcher()
+        self.__fallback = fallback
+        self.__lock = threading.Lock()
+        self.__stats = {'requests': 0, 'primary': 0, 'challenge': 0, 'fallback': 0}
+
+    @property
+    def fallback(self):
+        """ Get the fallback fetcher, the default BrowserFetcher is created on first use """
+
+        with self.__lock:
+            if self.__fallback is None:
+                self.__fallback = BrowserFetcher()
+            return self.__fallback
+
+    def fetch(self, url: str):
+        """ Fetch url by the fast path, or by the fallback if challenged
+
+        :Args:
+         - url: API url
+        """
+        self.__count('requests')
+        try:
+            data = self.primary.fetch(url)
+            self.__count('primary')
+            return data
+        except SliderChallenge:
+            self.__count('challenge')
+            logger.info('slider challenge, fall back to browser')
+
+        data = self.fallback.fetch(url)
+        self.__count('fallback')
+        return data
+
+    def stats(self):
+        """ Get a copy of the request counters """
+
+        with self.__lock:
+            return dict(self.__stats)
+
+    def close(self):
+        """ Close both fetchers and log the counters """
+
+        stats = self.stats()
+        logger.info('fetcher stats: ' + json.dumps(stats))
+        self.primary.close()
+        if self.__fallback is not None:
+            self.__fallback.close()
+
+    def __count(self, key: str):
+        """ Increase a request counter
+
+        :Args:
+         - key: Counter name
+        """
+        with self.__lock:
+            self.__stats[key] += 1
+
+
+_shared = None
+_lock = threading.Lock()
+
+# Fetcher of the parent of a forked worker, see _reset_in_child
+_inherited = []
+
+
+def shared_fetcher():
+    """ Get the process wide fallback fetcher """
+
+    global _shared
+    with _lock:
+        if _shared is None:
+            _shared = FallbackFetcher()
+        return _shared
+
+
+def _reset_in_child():
+    """ A forked worker opens its own fetcher, the keep-alive sockets of a session must not cross a fork
+
+    The fetcher of the parent is kept referenced and never used, so the child does not close its connections.
+    """
+    global _shared, _lock
+    if _shared is not None:
+        _inherited.append(_shared)
+    _shared = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_in_child)
@@ -0,0 +1,133 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 14:20
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : issueDate watermarks of incremental recrawl
+
+import os
+import time
+import sqlite3
+import pandas as pd
+from spider.normalizer import row_keys
+
+SQL_WATERMARK_TABLE = '''CREATE TABLE IF NOT EXISTS `watermark51` (
+          `query` VARCHAR(255) NOT NULL,
+          `issueDate` VARCHAR(50) NULL,
+          `updated` VARCHAR(50) NULL,
+          PRIMARY KEY (`query`)
+);'''
+
+SQL_SEEN_TABLE = '''CREATE TABLE IF NOT EXISTS `seen51` (
+          `query` VARCHAR(255) NOT NULL,
+          `key` CHAR(16) NOT NULL,
+          `issueDate` VARCHAR(50) NULL,
+          PRIMARY KEY (`query`, `key`)
+) WITHOUT ROWID;'''
+
+
+class WatermarkStore(object):
+    """ Per query high-water mark of issueDateString, stored in the output DB
+
+    The primary key hashes of the postings at the watermark are kept as well, postings published
+    in the same second as the watermark are told apart by them. Older keys are pruned, since any
+    posting older than the watermark is known to be crawled already.
+
+    The saved rows of a crawl are held in memory by update and written by commit, once the crawl has
+    covered every posting down to the old watermark. A crawl that is not committed leaves no trace.
+    """
+
+    def __init__(self, output: str):
+        """ Open the output DB and set up the tables
+
+        :Args:
+         - output: Data output path
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        self.connect = sqlite3.connect(output, timeout=30, check_same_thread=False)
+        self.connect.execute('PRAGMA journal_mode=WAL;')
+        self.connect.execute(SQL_WATERMARK_TABLE)
+        self.connect.execute(SQL_SEEN_TABLE)
+        self.connect.commit()
+        self.pending = {}
+
+    @staticmethod
+    def query_key(keyword: str, area: str, filters: dict = None):
+        """ Build the key of a (keyword, area) query
+
+        :Args:
+         - keyword: Search keyword
+         - area: Area code
+         - filters: Search facets
+        """
+        facets = '&'.join(f'{key}={value}' for key, value in sorted((filters or {}).items()))
+        return f'{keyword}|{area}|{facets}'
+
+    def watermark(self, query: str):
+        """ Get the issueDate watermark of a query, None if it was never crawled
+
+        :Args:
+         - query: Query key
+        """
+        row = self.connect.execute('SELECT `issueDate` FROM `watermark51` WHERE `query` = ?;', (query,)).fetchone()
+        return row[0] if row else None
+
+    def fresh(self, query: str, watermark: str, table: pd.DataFrame):
+        """ Filter the rows that are neither seen nor older than the watermark
+
+        :Args:
+         - query: Query key
+         - watermark: issueDate watermark taken before the crawl
+         - table: Normalized table
+        """
+        if table.empty:
+            return table
+
+        keys = row_keys(table)
+        marks = ','.join('?' * len(keys))
+        sql = f'SELECT `key` FROM `seen51` WHERE `query` = ? AND `key` IN ({marks});'
+        seen = set(row[0] for row in self.connect.execute(sql, [query] + keys.tolist()))
+
+        fresh = ~keys.isin(seen)
+        if watermark is not None:
+            fresh &= table['issueDate'] >= watermark
+        return table[fresh]
+
+    def update(self, query: str, table: pd.DataFrame):
+        """ Hold the saved rows of a crawl until it is committed
+
+        :Args:
+         - query: Query key
+         - table: Normalized table of the saved rows
+        """
+        if table.empty:
+            return
+
+        self.pending.setdefault(query, []).extend(zip(row_keys(table), table['issueDate']))
+
+    def commit(self, query: str):
+        """ Record the held rows of a crawl and move the watermark forward
+
+        :Args:
+         - query: Query key
+        """
+        held = self.pending.pop(query, [])
+        if not held:
+            return
+
+        latest = max(issueDate for _, issueDate in held)
+        current = self.watermark(query)
+        if current is not None and current > latest:
+            latest = current
+
+        rows = [(query, key, issueDate) for key, issueDate in held]
+        with self.connect:
+            self.connect.executemany('INSERT OR IGNORE INTO `seen51` VALUES(?, ?, ?);', rows)
+            self.connect.execute('INSERT OR REPLACE INTO `watermark51` VALUES(?, ?, ?);',
+                                 (query, latest, time.strftime('%Y-%m-%d %H:%M:%S')))
+            self.connect.execute('DELETE FROM `seen51` WHERE `query` = ? AND `issueDate` < ?;', (query, latest))
+
+    def close(self):
+        """ Close the connection """
+
+        self.connect.close()
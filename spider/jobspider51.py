@@ -7,23 +7,32 @@
 
 import os
 import random
-import re
 import json
 import time
-import sqlite3
-import pandas as pd
-from spider import logger
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from fake_useragent import UserAgent
-from selenium.webdriver import ActionChains
-from selenium.webdriver.common.by import By
+import math
+from typing import TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+from spider import logger, config, metrics, preload
+from spider.fetcher import Fetcher, StatusError, shared_fetcher
+from spider.ratelimit import TokenBucket, shared_limiter
+from spider.retry import CircuitBreaker, POLICIES, classify, shared_breaker
+from spider.deadletter import DeadLetterStore, shared_deadletter
+from spider.sink.base import open_sinks, check_engine, sink_modules
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MAX_PAGE = 200
+SORT_BY_RELEVANCE = '0'
+SORT_BY_DATE = '1'
 
 
 class JobSipder51(object):
     """ This crawler is crawled based on the API"""
 
-    def __init__(self, keyword: str, page: int, pageSize: int, area: str):
+    def __init__(self, keyword: str, page: int, pageSize: int, area: str, fetcher: Fetcher = None,
+                 limiter: TokenBucket = None, filters: dict = None, sortType: str = SORT_BY_RELEVANCE,
+                 breaker: CircuitBreaker = None, deadletter: DeadLetterStore = None):
         """ Init the url param
 
         :Args:
@@ -31,299 +40,284 @@ class JobSipder51(object):
          - page: Page number
          - pageSize: Specify the number of data per page
          - area: Specify the area to search for
+         - fetcher: Fetcher backend, default to the process wide HTTP fetcher with browser fallback
+         - limiter: Rate limiter taken by every request attempt, default to the process wide limiter
+         - filters: Search facets, type Dict{'salary': str, 'workYear': str, 'degree': str, ...}
+         - sortType: Result order, SORT_BY_RELEVANCE or SORT_BY_DATE
+         - breaker: Circuit breaker that pauses the requests while the site is blocking, default to the process wide one
+         - deadletter: Dead-letter store of the pages that failed for good, None to not record them
         """
         self.keyword = keyword
         self.page = page
         self.pageSize = pageSize
         self.area = area
+        self.filters = filters or {}
+        self.fetcher = fetcher if fetcher is not None else shared_fetcher()
+        self.limiter = limiter if limiter is not None else shared_limiter()
+        self.breaker = breaker if breaker is not None else shared_breaker()
+        self.deadletter = deadletter
+        self.failed_page = None
         self.timestamp = str(int(time.time()))
-        self.baseUrl = ('https://we.51job.com/api/job/search-pc?api_key=51job&searchType=2&pageCode=sou%7Csou%7Csoulb'
-                        '&sortType=0&function=&industry=&landmark=&metro=&requestId=&source=1&accountId=')
+        self.baseUrl = (config.API_BASE + '/api/job/search-pc?api_key=51job&searchType=2&pageCode=sou%7Csou%7Csoulb'
+                        f'&sortType={sortType}&function=&industry=&landmark=&metro=&requestId=&source=1&accountId=')
         self.fakeUrl = '&jobArea2=&jobType=&salary=&workYear=&degree=&companyType=&companySize=&issueDate='
+        for key, value in self.filters.items():
+            self.fakeUrl = self.fakeUrl.replace(f'&{key}=', f'&{key}={value}')
         self.root = os.path.abspath('..')
+        self.OUTPUT_DIR = config.job_output_dir()
         self.CSV_FILE = '51job.csv'
         self.SQLITE_FILE = '51job.db'
-        self.CSV_FILE_PATH = os.path.join(self.root, "output/job/" + self.CSV_FILE)
-        self.SQLITE_FILE_PATH = os.path.join(self.root, "output/job/" + self.SQLITE_FILE)
-        self.__create_output_dir()
-
-    @staticmethod
-    def __create_output_dir():
-        """ Create output directory if not exists """
-
-        root = os.path.abspath('..')
-
-        directory = os.path.join(root, "output/job")
-        if not os.path.exists(directory):
-            os.makedirs(directory)
-
-    def __driver_builder(self):
-        """ Init webdriver
-
-        During the building process, it is necessary to set up an anti crawler detection strategy by Option.
-
-            .add_argument('headless')
-            -> Set headless page, run silently
-
-            .add_argument("--window-size=1920,1080")
-            -> In headless status, browse without a window size, so if the size of the window is not specified,
-            sliding verification may fail
+        self.CSV_FILE_PATH = os.path.join(self.OUTPUT_DIR, self.CSV_FILE)
+        self.SQLITE_FILE_PATH = os.path.join(self.OUTPUT_DIR, self.SQLITE_FILE)
 
-            .add_experimental_option('excludeSwitches',['enable-automation','enable-logging'])
-            -> Disable auto control and log feature of the browser
+    def normalize(self, items: json):
+        """ Turn the items of a page into a normalized table
 
-            .add_argument('--disable-blink-features=AutomationControlled')
-            -> Set navigator.webdriver=false
+        pandas is imported by the first page, see preload
 
-            .add_argument('--disable-blink-features=AutomationControlled')
-            -> Disable auto control extension of the browser
-
-            .add_argument(f'user-agent={user_agent}')
-            -> Add random UA
-
-            .add_argument("--start-maximized")
-            -> Maximize the browser on startup
-
-            .add_argument('--inprivate')
-            -> Start by Private Browsing
-
-        Additionally, if use the visible window execution, you need to add the following operations
-
-            -> remove options.add_argument('headless')
-
-        Finally, inject script to change navigator = false.
+        :Args:
+         - items: JSON data list
         """
-        user_agent = UserAgent().random
-
-        options = webdriver.EdgeOptions()
+        from spider.normalizer import normalize
 
-        # TODO: slide failed issue
-        # options.add_argument('headless')
+        logger.info('processing %s items', len(items), keyword=self.keyword, area=self.area, items=len(items))
+        with metrics.timer('normalize'):
+            return normalize(items)
 
-        options.add_experimental_option('excludeSwitches', ['enable-automation', 'enable-logging'])
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_experimental_option('useAutomationExtension', False)
-        options.add_argument(f'user-agent={user_agent}')
-        options.add_argument("--start-maximized")
-        options.add_argument('--inprivate')
-
-        web = webdriver.Edge(options=options)
-
-        script = 'Object.defineProperty(navigator, "webdriver", {get: () => false,});'
-        web.execute_script(script)
-        return web
-
-    def __slider_verify(self, web: webdriver):
-        """ Slider verification action
-
-        This requires the mouse to perform the following operations in following order
-
-            1. put mouse on slider       ->   .move_to_element(slider)
-            2. hold mouse on             ->   .click_and_hold()
-            3. move to target position   ->   .move_by_offset(300, 0)
-
-        Finally, perform action          ->   .perform()
+    def save(self, items: json, type: str):
+        """ Normalize the items and save them by specify type.
 
         :Args:
-         - web: Browser webdriver
+         - item: JSON data list
+         - type: Data storage engine, such as csv, db, both or parquet
         """
-        slider = web.find_elements(By.XPATH, '//div[@class="nc_bg"]')
-
-        if len(slider) <= 0:
-            logger.warning("slider not found")
+        if items is None:
             return
 
-        slider = slider[0]
-        action_chains = (ActionChains(web)
-                         .move_to_element(slider)
-                         .click_and_hold()
-                         .move_by_offset(300 + random.randint(1, 20), 0))
+        self.save_table(self.normalize(items), type)
 
-        action_chains.perform()
+    def save_table(self, table: 'pd.DataFrame', type: str):
+        """ Save a normalized table by the sinks of the storage engine.
 
-    def __save_to_csv(self, detail: dict, output: str):
-        """ Save dict data to csv
+        Each sink takes the whole table in one call, and commits at the page boundary.
+        The search keyword goes with the table in its attrs, for the statistics of the sqlite sink.
 
-        :Arg:
-         - detail: Dictionary of a single data
-         - output: Data output path
+        :Args:
+         - table: Normalized table
+         - type: Data storage engine, such as csv, db, both or parquet
         """
-        detail = [v for k, v in enumerate(detail.values())]
-        df = pd.DataFrame([detail])
-        df.to_csv(output, index=False, header=False, mode='a', encoding='utf-8')
+        table.attrs['keyword'] = self.keyword
+        for sink in open_sinks('job', type, self.OUTPUT_DIR):
+            name = sink.__class__.__name__
+            with metrics.timer('save', sink=name):
+                sink.write_table(table)
+                sink.commit()
+            metrics.count('saved_total', len(table), sink=name)
 
-    def __save_to_db(self, detail: dict, output: str):
-        """ Save dict data to sqlite
+    def get_data_json(self):
+        """ Get job JSON data of the page
 
-        :Arg:
-         - output: Data output path
+        Finally, return json data
         """
-        connect = sqlite3.connect(output)
-        cursor = connect.cursor()
-        sqlTable = ('''CREATE TABLE IF NOT EXISTS `job51` (
-                  `jobName` VARCHAR(255) NOT NULL,
-                  `tags` VARCHAR(255) NULL,
-                  `area` VARCHAR(50) NULL,
-                  `salary` VARCHAR(255) NULL,
-                  `workYear` VARCHAR(10) NULL,
-                  `degree` VARCHAR(10) NULL,
-                  `companyName` VARCHAR(255) NULL,
-                  `companyType` VARCHAR(255) NULL,
-                  `companySize` VARCHAR(10) NULL,
-                  `logo` VARCHAR(255) NULL,
-                  `issueDate` VARCHAR(50) NULL,
-                  PRIMARY KEY (`jobName`,`area`,`companyName`,`issueDate`)
-        );''')
-
-        sql = '''INSERT INTO `job51` VALUES(
-            :jobName,
-            :tags,
-            :area,
-            :salary,
-            :workYear,
-            :degree,
-            :companyName,
-            :companyType,
-            :companySize,
-            :logo,
-            :issueDate
-        );'''
+        job = self.get_page_json(self.page)
+        if job is None:
+            return None
+        return job['items']
 
-        try:
-            cursor.execute(sqlTable)
-            cursor.execute(sql, detail)
-            connect.commit()
-        except Exception as e:
-            logger.warning("SQL execution failure of SQLite: " + str(e))
-        finally:
-            cursor.close()
-            connect.close()
+    def get_page_json(self, page: int):
+        """ Get job JSON data of a page
 
-    def save(self, items: json, type: str):
-        """ Iterate through the dictionary to get each item, save each data by specify type.
+        The following is the execution order
 
-        Otherwise, the process will try to crawl work requirements and work position.
-        If crawl failed, it is set empty and skip after three retries.
+            Waiting while the circuit breaker is open
+            Waiting for a token of the rate limiter
+            Fetching url by the fetcher backend, the browser is only used when a slider challenge shows up
+            Checking response status
+            On failure, retrying by the policy of the failure class with exponential backoff, see spider.retry,
+            and adding the page to the dead-letter store once the attempts are used up
+            Counting the pages, items, retries and failures by class, see spider.metrics
 
-        Finally, add column header and remove duplicate rows
+        Finally, return the resultbody.job json data, including items and totalCount
 
         :Args:
-         - item: JSON data list
-         - type: Data storage engine, support for csv, db and both
-        """
-        if items is None:
-            return
-
-        save_to = {
-            'csv': lambda x: self.__save_to_csv(x, self.CSV_FILE_PATH),
-            'db': lambda x: self.__save_to_db(x, self.SQLITE_FILE_PATH),
-            'both': lambda x: (self.__save_to_csv(x, self.CSV_FILE_PATH),
-                               self.__save_to_db(x, self.SQLITE_FILE_PATH))
-        }
-
-        for key, item in enumerate(items):
-            logger.info('processing in item' + str(key + 1))
-
-            if 'jobAreaLevelDetail' not in item:
-                item['jobAreaLevelDetail'] = item['jobAreaString']
-
-            jobDetailDict = {
-                'jobName': item['jobName'],
-                'tags': ",".join(item['jobTags']),
-                'area': ''.join(re.findall(r'[\u4e00-\u9fa5]+', str(item['jobAreaLevelDetail']))),
-                'salary': item['provideSalaryString'],
-                'workYear': item['workYearString'],
-                'degree': item['degreeString'],
-                'companyName': item['fullCompanyName'],
-                'companyType': item['companyTypeString'],
-                'companySize': item['companySizeString'],
-                'logo': item['companyLogo'],
-                'issueDate': item['issueDateString']
-            }
-            save = save_to[type]
-            save(jobDetailDict)
-
-        if type in ['csv', 'both']:
-            label = (['jobName', 'tags', 'area', 'salary', 'workYear', 'degree',
-                      'companyName', 'companyType', 'companySize', 'logo', 'issueDate'])
-
-            header = pd.read_csv(self.CSV_FILE_PATH, nrows=0).columns.tolist()
-            names, set_header = None, False
-            if not set(label).intersection(header):
-                names = label
-                set_header = True
-
-            df = pd.read_csv(self.CSV_FILE_PATH, header=None, names=names, delimiter=',')
-            df.drop_duplicates(inplace=True)
-            df.to_csv(self.CSV_FILE_PATH, index=False, header=set_header, encoding='utf-8')
-
-    def get_data_json(self):
-        """ Get job JSON data
-
-        The following is the execution order
-
-            Driver building and start url
-            Passing slider verification
-            Getting HTML source
-            Parsing HTML by BeautifulSoup, obtain the data through the first div
-            Json Parsing
-
-        Finally, return json data
+         - page: Page number
         """
-        extra = f"&timestamp={self.timestamp}&keyword={self.keyword}&pageNum={self.page}&pageSize={self.pageSize}&jobArea={self.area}"
+        extra = f"&timestamp={self.timestamp}&keyword={self.keyword}&pageNum={page}&pageSize={self.pageSize}&jobArea={self.area}"
         fake = self.fakeUrl.split('&')
-        fake.remove(random.choice(fake))
+        fake.remove(random.choice([param for param in fake if param.endswith('=')]))
         fake = '&'.join(fake)
 
         url = self.baseUrl + extra + fake
-        logger.info('Crawling page ' + str(self.page))
-        logger.info('Crawling ' + url)
-
-        web = self.__driver_builder()
-        count = 3
-        dataJson = None
-        while (count > 0):
+        fields = {'keyword': self.keyword, 'area': self.area, 'page': page}
+        logger.info('Crawling page %s', page, **fields)
+        logger.debug('Crawling %s', url, **fields)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            waited, probe = self.breaker.wait()
+            if waited:
+                metrics.observe('breaker_wait', waited)
+            metrics.observe('rate_limit', self.limiter.acquire())
+            metrics.count('requests_total')
             try:
-                time.sleep(random.uniform(5, 10))
-                print(url)
-                web.get(url)
-
-                time.sleep(random.uniform(1, 2))
-                self.__slider_verify(web)
-                time.sleep(random.uniform(1, 2))
-
-                html = web.page_source
-                soup = BeautifulSoup(html, "html.parser")
-                data = soup.find('div').text
-
-                dataJson = json.loads(data)
+                start = time.perf_counter()
+                dataJson = self.fetcher.fetch(url)
+                latency = time.perf_counter() - start
+                metrics.observe('fetch', latency)
+
+                if dataJson.get('status') != '1':
+                    raise StatusError('status ' + str(dataJson.get('status')) + ': ' + str(dataJson.get('message')))
+                dataJson = dataJson['resultbody']['job']
+                items = len(dataJson['items'])
+            except Exception as e:
+                errorClass = classify(e)
+                policy = POLICIES[errorClass]
+                self.breaker.record(not policy.trips, probe)
+                metrics.count('failures_total', cause=errorClass)
+
+                if attempt >= policy.attempts:
+                    logger.warning('data json sipder failed after %s attempts, %s error: %s', attempt, errorClass, e,
+                                   errorClass=errorClass, error=str(e), **fields)
+                    if self.deadletter is not None:
+                        task = {'keyword': self.keyword, 'area': self.area, 'page': page, 'pageSize': self.pageSize,
+                                'filters': self.filters}
+                        self.deadletter.add(task, errorClass, str(e), attempt)
+                    return None
+
+                delay = policy.delay(attempt)
+                metrics.count('retries_total', cause=errorClass)
+                logger.warning('data json sipder failed, %s error, try again in %.1fs', errorClass, delay,
+                               errorClass=errorClass, error=str(e), **fields)
+                time.sleep(delay)
+                continue
+
+            self.breaker.record(True, probe)
+            metrics.count('pages_total')
+            metrics.count('items_total', items)
+            logger.info('Fetched page %s in %.3fs', page, latency, latency=round(latency, 3), items=items, **fields)
+            return dataJson
+
+    def iter_pages(self, max_page: int = MAX_PAGE):
+        """ Iterate through the result pages from self.page, yield the items of each page
+
+        The page count is read from resultbody.job.totalCount of the first page, and limited by the API page cap.
+        The next page is fetched in background while the caller is processing the current one,
+        so at most two pages are held in memory. Paging that stops at a page that failed to be fetched
+        leaves its number in self.failed_page, else it is None.
 
-                if dataJson['status'] != '1':
-                    logger.warning('Request failed, the request is unavailable')
-                    dataJson = None
+        :Args:
+         - max_page: Last page number to fetch, the API does not serve pages after 200
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+        page = self.page
+        self.failed_page = None
+        future = executor.submit(self.get_page_json, page)
+        try:
+            while future is not None:
+                job = future.result()
+                future = None
+                if job is None:
+                    self.failed_page = page
+                    break
+                if not job['items']:
                     break
 
-                dataJson = dataJson['resultbody']['job']['items']
-                break
-            except:
-                count = count - 1
-                logger.warning("data json sipder failed, waiting for try again, Remaining retry attempts: "
-                               + str(count))
+                total = int(job.get('totalCount', 0))
+                last = min(math.ceil(total / self.pageSize), max_page, MAX_PAGE)
+                if page < last:
+                    future = executor.submit(self.get_page_json, page + 1)
 
-        web.close()
-        return dataJson
+                yield job['items']
+                page += 1
+        finally:
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=True)
 
 
-def start(args: dict, save_engine: str):
+def start(args: dict, save_engine: str, fetcher: Fetcher = None, limiter: TokenBucket = None,
+          all_pages: bool = False, incremental: bool = False):
     """ spider starter
 
     :Args:
-     - param: Url param, type Dict{'keyword': str, 'page': int, 'pageSize': int, 'area': str}
-     - save_engine: Data storage engine, support for csv, db and both
+     - param: Url param, type Dict{'keyword': str, 'page': int, 'pageSize': int, 'area': str, 'filters': dict}
+     - save_engine: Data storage engine, such as csv, db, both or parquet
+     - fetcher: Fetcher backend shared by the whole run, default to the process wide fetcher
+     - limiter: Rate limiter shared by the whole run, default to the process wide limiter
+     - all_pages: Crawl every result page from args['page'] instead of the single page
+     - incremental: Crawl by date from the first page and stop at the postings saved by the previous run
+
+    The pages that fail for good are added to the dead-letter table of the output DB, see DeadLetterStore.replay
     """
-    if save_engine not in ['csv', 'db', 'both']:
-        return logger.error("The data storage engine must be 'csv' , 'db' or 'both' ")
+    error = check_engine('job', save_engine)
+    if error:
+        return logger.error(error)
+
+    # pandas and the sinks are imported while the first request is in flight
+    preload('spider.normalizer', *sink_modules('job', save_engine))
+
+    if incremental:
+        spider = JobSipder51(keyword=args['keyword'], page=1, pageSize=args['pageSize'], area=args['area'],
+                             fetcher=fetcher, limiter=limiter, filters=args.get('filters'), sortType=SORT_BY_DATE,
+                             deadletter=shared_deadletter())
+        return crawl_incremental(spider, save_engine)
+
+    spider = JobSipder51(keyword=args['keyword'], page=args['page'], pageSize=args['pageSize'], area=args['area'],
+                         fetcher=fetcher, limiter=limiter, filters=args.get('filters'), deadletter=shared_deadletter())
+    if all_pages:
+        for items in spider.iter_pages():
+            spider.save(items, save_engine)
+        return
 
-    spider = JobSipder51(keyword=args['keyword'], page=args['page'], pageSize=args['pageSize'], area=args['area'])
     data_json = spider.get_data_json()
-    spider.save(data_json, save_engine)
+    if data_json is not None:
+        spider.save(data_json, save_engine)
+        spider.deadletter.resolve(args)
+
+
+def crawl_incremental(spider: JobSipder51, save_engine: str):
+    """ Crawl the postings published since the previous run
+
+    The spider must sort by date. Paging stops at the first page that ends with a posting that is
+    already seen or older than the issueDate watermark of the (keyword, area) query, every later page
+    holds only such postings.
+
+    The watermark is moved only when paging stops there or at the last page. When a page fails to be
+    fetched, the older postings of the later pages are not covered, the watermark is left as it was and
+    the next run pages down to it again.
+
+    :Args:
+     - spider: Spider sorted by date
+     - save_engine: Data storage engine, such as csv, db, both or parquet
+    """
+    from spider.incremental import WatermarkStore
+
+    store = WatermarkStore(spider.SQLITE_FILE_PATH)
+    query = store.query_key(spider.keyword, spider.area, spider.filters)
+    watermark = store.watermark(query)
+    saved = 0
+    try:
+        pages = spider.iter_pages()
+        for items in pages:
+            table = spider.normalize(items)
+            fresh = store.fresh(query, watermark, table)
+            if len(fresh):
+                spider.save_table(fresh, save_engine)
+                store.update(query, fresh)
+                saved += len(fresh)
+
+            if not len(fresh) or table.index[-1] not in fresh.index:
+                pages.close()
+                break
+
+        if spider.failed_page is None:
+            store.commit(query)
+        else:
+            logger.warning('incremental crawl of %s stopped at failed page %s, the watermark is kept', query,
+                           spider.failed_page, query=query, page=spider.failed_page)
+    finally:
+        store.close()
+
+    logger.info('incremental crawl of %s saved %s new postings', query, saved, query=query, saved=saved)
+    return saved
@@ -0,0 +1,491 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 05:20
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : k-way merge of the job outputs of the shards
+
+import os
+import csv
+import glob
+import heapq
+import pickle
+import sqlite3
+import argparse
+import itertools
+import tempfile
+from spider import logger, config
+from spider.schema import COLUMNS, IDENTITY, CONTENT, digest
+
+# Rows of a csv shard sorted in memory at a time, every sorted run is spilled to a temporary file
+RUN_SIZE = 200000
+
+# Rows written per executemany or csv write, and per pickled block of a run
+BATCH_SIZE = 10000
+
+# Building a new file, a crash leaves only the temporary file behind
+MERGE_PRAGMAS = [
+    'PRAGMA journal_mode=OFF;',
+    'PRAGMA synchronous=OFF;',
+    'PRAGMA cache_size=-65536;',
+]
+
+# Merged rows staged by posting key, before they are numbered by firstSeen
+SQL_STAGE_TABLE = ('''CREATE TABLE `merge51` (
+          `postingKey` CHAR(16) NOT NULL PRIMARY KEY,
+          `fingerprint` CHAR(16) NOT NULL,
+          `version` INTEGER NOT NULL,
+          `firstSeen` REAL NOT NULL,
+          `lastSeen` REAL NOT NULL,
+''' + ''.join(f'          `{column}` NULL,\n' for column in COLUMNS)[:-2] + '''
+) WITHOUT ROWID;''')
+
+SQL_STAGE = '''INSERT INTO `merge51` VALUES(''' + ', '.join('?' * (5 + len(COLUMNS))) + ''');'''
+
+SQL_VERSION = '''INSERT INTO `version51` VALUES(?, ?, ?, ?, ?, ?);'''
+
+# job51 is numbered by firstSeen, so the rows keep the newest stored last order of the query API. Only the keys
+# are sorted, the rowid of a key in order51 is the rowid of its job51 row
+SQL_ORDER = [
+    '''CREATE TABLE `order51` AS SELECT `postingKey` FROM `merge51` ORDER BY `firstSeen`, `postingKey`;''',
+    '''CREATE UNIQUE INDEX `order51_key` ON `order51` (`postingKey`);''',
+]
+
+SQL_FILL_JOBS = ('''INSERT INTO `job51` (rowid, ''' + ', '.join(f'`{column}`' for column in COLUMNS) + ''')
+                    SELECT o.rowid, ''' + ', '.join(f'm.`{column}`' for column in COLUMNS) + ''' FROM `order51` o
+                    JOIN `merge51` m ON m.`postingKey` = o.`postingKey` ORDER BY o.rowid;''')
+
+SQL_FILL_POSTINGS = '''INSERT INTO `posting51` SELECT m.`postingKey`, o.rowid, m.`fingerprint`, m.`version`,
+                       m.`firstSeen`, m.`lastSeen` FROM `merge51` m JOIN `order51` o ON o.`postingKey` = m.`postingKey`
+                       ORDER BY m.`postingKey`;'''
+
+SQL_SELECT_POSTINGS = ('''SELECT p.`postingKey`, p.`lastSeen`, ''' + ', '.join(f'j.`{column}`' for column in COLUMNS) +
+                       ''' FROM `posting51` p JOIN `job51` j ON j.rowid = p.`jobRowid` ORDER BY p.`postingKey`;''')
+
+SQL_SELECT_VERSIONS = '''SELECT `postingKey`, `version`, `fingerprint`, `changes`, `firstSeen`, `lastSeen`
+                         FROM `version51` ORDER BY `postingKey`, `version`;'''
+
+# The small tables of a shard are merged by SQL, a dead-letter task counts the failures of every shard and
+# a query keeps its highest watermark with the keys seen at it
+SQL_MERGE_TABLES = [
+    '''INSERT INTO `dead51` SELECT * FROM `shard`.`dead51` WHERE 1
+       ON CONFLICT (`keyword`, `area`, `page`, `filters`) DO UPDATE SET
+       `attempts` = `attempts` + excluded.`attempts`, `failures` = `failures` + excluded.`failures`,
+       `created` = MIN(`created`, excluded.`created`),
+       `errorClass` = CASE WHEN excluded.`updated` > `updated` THEN excluded.`errorClass` ELSE `errorClass` END,
+       `error` = CASE WHEN excluded.`updated` > `updated` THEN excluded.`error` ELSE `error` END,
+       `updated` = MAX(`updated`, excluded.`updated`);''',
+    '''INSERT INTO `watermark51` SELECT * FROM `shard`.`watermark51` WHERE 1
+       ON CONFLICT (`query`) DO UPDATE SET
+       `issueDate` = MAX(COALESCE(`issueDate`, excluded.`issueDate`), COALESCE(excluded.`issueDate`, `issueDate`)),
+       `updated` = MAX(COALESCE(`updated`, excluded.`updated`), COALESCE(excluded.`updated`, `updated`));''',
+    '''INSERT OR IGNORE INTO `seen51` SELECT * FROM `shard`.`seen51`;''',
+    '''INSERT OR IGNORE INTO `keyword51` SELECT * FROM `shard`.`keyword51`;''',
+]
+
+SQL_PRUNE_SEEN = '''DELETE FROM `seen51` WHERE `issueDate` < (SELECT `issueDate` FROM `watermark51` w
+                    WHERE w.`query` = `seen51`.`query`);'''
+
+IDENTITY_INDEX = [COLUMNS.index(column) for column in IDENTITY]
+CONTENT_INDEX = [COLUMNS.index(column) for column in CONTENT]
+
+
+def shard_outputs(file: str):
+    """ Get the output files of every shard, such as 51job.db
+
+    :Args:
+     - file: Output file name
+    """
+    return sorted(glob.glob(os.path.join(config.job_output_dir(''), 'shards', '*', file)))
+
+
+def merge(inputs: list, output: str, run_size: int = RUN_SIZE):
+    """ Merge shard outputs into one deduplicated output, a sqlite DB or a csv by the extension of output
+
+    The merged output is built in a temporary file and replaces output at the end, output may be one of the
+    inputs. The inputs are only read. Nothing may write the inputs or output while they are merged.
+
+    Finally, return the number of postings of the merged output
+
+    :Args:
+     - inputs: Output files of the shards, all sqlite DBs or all csv files
+     - output: Merged output path
+     - run_size: Rows of a csv shard sorted in memory at a time
+    """
+    inputs = [os.path.abspath(path) for path in inputs if os.path.exists(path)]
+    output = os.path.abspath(output)
+    if not inputs:
+        return logger.error('There is no shard output to merge')
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    if output.endswith('.csv'):
+        merger = CsvMerger(inputs, run_size)
+    else:
+        merger = SQLiteMerger(inputs)
+
+    temp = output + '.merging'
+    for path in [temp, temp + '.idx']:
+        if os.path.exists(path):
+            os.remove(path)
+    count = merger.merge(temp)
+
+    if output.endswith('.csv'):
+        os.replace(temp + '.idx', output + '.idx')
+    elif os.path.exists(output + '-wal'):
+        # A connection still open on the old output would lose its WAL, the merged DB is left beside it
+        return logger.error(output + ' is in use, the merged DB is left in ' + temp)
+    os.replace(temp, output)
+    logger.info('merged ' + str(len(inputs)) + ' shard outputs into ' + output + ' with ' + str(count) + ' postings')
+    return count
+
+
+class SQLiteMerger(object):
+    """ k-way merge of the sqlite output DBs of the shards
+
+    posting51 and version51 are clustered by the posting key, so every shard is read as a stream sorted by
+    the key without a sort, and the streams are merged by a heap. Memory holds one posting per shard.
+
+    The versions of a posting seen by several shards are merged by firstSeen, adjacent versions of the same
+    fingerprint are one version. The latest version is the current one, its job51 row is taken from the shard
+    that stored it. The changes of a version are kept when its previous version is the one of its shard, else
+    they are unknown and left NULL.
+
+    The merged rows are staged, then written to job51 in firstSeen order and to the other tables in key order,
+    and the secondary and full-text indexes are built once at the end, rather than row by row as a sink does.
+    A job51 row without a posting, such as an older copy left by the tracking backfill, is not merged.
+    The keywords of the postings are merged and the statistics are counted once from the merged postings.
+
+    The inputs are only read. An older input without the posting tracking is copied to a temporary directory
+    and the copy is backfilled by the sink of its layout.
+    """
+
+    def __init__(self, inputs: list):
+        """ Init the inputs
+
+        :Args:
+         - inputs: Output DBs of the shards
+        """
+        self.inputs = inputs
+        self.sources = inputs
+
+    def merge(self, output: str):
+        """ Merge the inputs into a new DB
+
+        Finally, return the number of postings
+
+        :Args:
+         - output: New DB path
+        """
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(output)) as directory:
+            self.sources = [self.__track(path, os.path.join(directory, f'{index}.db'))
+                            for index, path in enumerate(self.inputs)]
+            return self.__merge(output)
+
+    def __merge(self, output: str):
+        """ Merge the tracked sources into a new DB
+
+        Finally, return the number of postings
+
+        :Args:
+         - output: New DB path
+        """
+        from spider.sink.sqlitesink import (SQL_TABLE, SQL_POSTING_TABLE, SQL_VERSION_TABLE, SQL_VERSION_INDEX,
+                                            FlatStore)
+        from spider.deadletter import SQL_TABLE as SQL_DEAD_TABLE
+        from spider.incremental import SQL_WATERMARK_TABLE, SQL_SEEN_TABLE
+        from spider.sink.aggregate import SQL_KEYWORD_TABLE, AggregateStore
+
+        connect = sqlite3.connect(output)
+        try:
+            for sql in MERGE_PRAGMAS + [SQL_TABLE, SQL_POSTING_TABLE, SQL_VERSION_TABLE, SQL_STAGE_TABLE,
+                                        SQL_DEAD_TABLE, SQL_WATERMARK_TABLE, SQL_SEEN_TABLE, SQL_KEYWORD_TABLE]:
+                connect.execute(sql)
+
+            count = self.__stage(connect)
+            for sql in SQL_ORDER + [SQL_FILL_JOBS, SQL_FILL_POSTINGS, 'DROP TABLE `order51`;', 'DROP TABLE `merge51`;']:
+                connect.execute(sql)
+            connect.execute(SQL_VERSION_INDEX)
+            FlatStore(connect).setup()
+            connect.commit()
+
+            for path in self.sources:
+                self.__merge_tables(connect, path)
+            connect.execute(SQL_PRUNE_SEEN)
+            AggregateStore(connect).setup()
+            connect.commit()
+            connect.execute('PRAGMA journal_mode=WAL;')
+        finally:
+            connect.close()
+        return count
+
+    def __stage(self, connect: sqlite3.Connection):
+        """ Stream the postings of every input in key order and stage the merged ones
+
+        Finally, return the number of postings
+
+        :Args:
+         - connect: Connection of the new DB
+        """
+        shards = [sqlite3.connect(f'file:{path}?mode=ro', uri=True) for path in self.sources]
+        try:
+            streams = [self.__read(shard, index) for index, shard in enumerate(shards)]
+            staged, versions, count = [], [], 0
+            for key, group in itertools.groupby(heapq.merge(*streams), key=lambda entry: entry[0]):
+                row, merged = self.__merge_versions(list(group))
+                lastSeen = max(version[4] for version in merged)
+                staged.append((key, merged[-1][1], len(merged), merged[0][3], lastSeen) + row)
+                versions.extend((key, version + 1, fingerprint, changes, firstSeen,
+                                 lastSeen if version + 1 < len(merged) else None)
+                                for version, (_, fingerprint, changes, firstSeen, lastSeen) in enumerate(merged))
+                count += 1
+                if len(staged) >= BATCH_SIZE:
+                    self.__write(connect, staged, versions)
+            self.__write(connect, staged, versions)
+        finally:
+            for shard in shards:
+                shard.close()
+        return count
+
+    @staticmethod
+    def __read(shard: sqlite3.Connection, index: int):
+        """ Yield the postings of a shard in key order, with their job51 row and versions
+
+        An entry is (postingKey, index, job51 row, versions), the current version takes the lastSeen of the posting.
+
+        :Args:
+         - shard: Connection of the input DB
+         - index: Input index, it orders the entries of a key
+        """
+        versions = itertools.groupby(shard.cursor().execute(SQL_SELECT_VERSIONS), key=lambda row: row[0])
+        pending = next(versions, None)
+        for posting in shard.cursor().execute(SQL_SELECT_POSTINGS):
+            key, lastSeen, row = posting[0], posting[1], posting[2:]
+            while pending is not None and pending[0] < key:
+                pending = next(versions, None)
+            if pending is None or pending[0] != key:
+                continue
+
+            history = [[version, fingerprint, changes, firstSeen, seen or firstSeen]
+                       for _, version, fingerprint, changes, firstSeen, seen in pending[1]]
+            history[-1][4] = lastSeen
+            yield key, index, row, history
+
+    @staticmethod
+    def __merge_versions(group: list):
+        """ Merge the versions of a posting from the shards
+
+        Finally, return the job51 row of the current version and the versions as
+        [version, fingerprint, changes, firstSeen, lastSeen]
+
+        :Args:
+         - group: Entries of the key from __read
+        """
+        seen = []
+        for _, index, row, history in group:
+            previous = None
+            for version in history:
+                seen.append((version[3], index, version, previous, row))
+                previous = version[1]
+
+        merged, row = [], None
+        for firstSeen, index, version, previous, source in sorted(seen, key=lambda item: item[:2]):
+            if merged and merged[-1][1] == version[1]:
+                merged[-1][4] = max(merged[-1][4], version[4])
+            else:
+                changes = version[2] if previous == (merged[-1][1] if merged else None) else None
+                merged.append([len(merged), version[1], changes, firstSeen, version[4]])
+            row = source
+        return row, merged
+
+    @staticmethod
+    def __write(connect: sqlite3.Connection, staged: list, versions: list):
+        """ Write the staged postings and their versions, the lists are emptied
+
+        :Args:
+         - connect: Connection of the new DB
+         - staged: merge51 rows
+         - versions: version51 rows
+        """
+        connect.executemany(SQL_STAGE, staged)
+        connect.executemany(SQL_VERSION, versions)
+        staged.clear()
+        versions.clear()
+
+    @staticmethod
+    def __merge_tables(connect: sqlite3.Connection, path: str):
+        """ Merge the dead-letter, watermark and keyword tables of an input
+
+        :Args:
+         - connect: Connection of the new DB
+         - path: Input DB path
+        """
+        connect.execute('ATTACH DATABASE ? AS `shard`;', (path,))
+        try:
+            tables = {row[0] for row in connect.execute("SELECT name FROM `shard`.sqlite_master WHERE type = 'table';")}
+            for table, sql in zip(['dead51', 'watermark51', 'seen51', 'keyword51'], SQL_MERGE_TABLES):
+                if table in tables:
+                    connect.execute(sql)
+            connect.commit()
+        finally:
+            connect.execute('DETACH DATABASE `shard`;')
+
+    @staticmethod
+    def __track(path: str, copy: str):
+        """ Get the DB to read of an input, an input without the posting tracking is copied and backfilled
+
+        Finally, return the input path, or the path of the backfilled copy
+
+        :Args:
+         - path: Input DB path
+         - copy: Path of the copy
+        """
+        from spider.sink.sqlitesink import SQLiteSink
+        from spider.sink.dictsink import DictionarySQLiteSink
+
+        connect = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            tracked = connect.execute("SELECT 1 FROM sqlite_master WHERE name = 'posting51';").fetchone()
+            kind = connect.execute("SELECT type FROM sqlite_master WHERE name = 'job51';").fetchone()
+            if tracked:
+                return path
+            target = sqlite3.connect(copy)
+            connect.backup(target)
+            target.close()
+        finally:
+            connect.close()
+
+        sink = DictionarySQLiteSink if kind == ('view',) else SQLiteSink
+        sink(copy).close()
+        logger.info(path + ' has no posting tracking, it is merged from a backfilled copy')
+        return copy
+
+
+class CsvMerger(object):
+    """ External k-way merge of the csv outputs of the shards
+
+    The rows of every shard are read in runs of run_size, the last row of a posting in a run is kept and the
+    run is sorted by the posting key. The runs are kept in memory up to run_size rows in all, the others are
+    spilled to temporary files in pickled blocks. The runs are merged by a heap, so memory holds run_size rows
+    and one block per spilled run.
+
+    A csv is a change log without timestamps, the last row of a posting in the last input that holds it is
+    its current version and the only one merged. The inputs are given oldest first. The merged csv is in
+    posting key order, with its sidecar index, see spider.sink.csvsink.
+    """
+
+    def __init__(self, inputs: list, run_size: int = RUN_SIZE):
+        """ Init the inputs
+
+        :Args:
+         - inputs: Output csv files of the shards
+         - run_size: Rows sorted in memory at a time
+        """
+        self.inputs = inputs
+        self.run_size = run_size
+
+    def merge(self, output: str):
+        """ Merge the inputs into a new csv and its sidecar index output + '.idx'
+
+        Finally, return the number of postings
+
+        :Args:
+         - output: New csv path
+        """
+        with tempfile.TemporaryDirectory(prefix='merge-', dir=os.path.dirname(output)) as directory:
+            streams = [iter(run) if isinstance(run, list) else self.__read(run) for run in self.__spill(directory)]
+            count, rows, lines = 0, [], []
+            with open(output, 'w', encoding='utf-8', newline='') as out, \
+                    open(output + '.idx', 'w', encoding='utf-8') as index:
+                writer = csv.writer(out, lineterminator=os.linesep)
+                writer.writerow(COLUMNS)
+                for key, group in itertools.groupby(heapq.merge(*streams), key=lambda entry: entry[0]):
+                    row = list(group)[-1][3:]
+                    rows.append(row)
+                    lines.append(f'{key} {digest([row[i] for i in CONTENT_INDEX])}\n')
+                    count += 1
+                    if len(rows) >= BATCH_SIZE:
+                        self.__write(writer, index, rows, lines)
+                self.__write(writer, index, rows, lines)
+        return count
+
+    def __spill(self, directory: str):
+        """ Sort the runs of the inputs, the runs past the first run_size rows are written to files
+
+        Finally, return the runs as entry lists or file paths
+
+        :Args:
+         - directory: Temporary directory
+        """
+        import pandas as pd
+
+        runs, held = [], 0
+        for index, path in enumerate(self.inputs):
+            if os.path.getsize(path) == 0:
+                continue
+            chunks = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=self.run_size)
+            for number, chunk in enumerate(chunks):
+                chunk = chunk.reindex(columns=COLUMNS, fill_value='')
+                rows = {}
+                for row in chunk.itertuples(index=False, name=None):
+                    rows[digest([row[i] for i in IDENTITY_INDEX])] = row
+                # The input and chunk numbers keep the copies of a key in write order through the merge
+                entries = [(key, index, number) + rows[key] for key in sorted(rows)]
+                if held + len(entries) <= self.run_size:
+                    held += len(entries)
+                    runs.append(entries)
+                    continue
+
+                run = os.path.join(directory, f'run-{len(runs):06d}.pickle')
+                with open(run, 'wb') as file:
+                    for start in range(0, len(entries), BATCH_SIZE):
+                        pickle.dump(entries[start:start + BATCH_SIZE], file, pickle.HIGHEST_PROTOCOL)
+                runs.append(run)
+        return runs
+
+    @staticmethod
+    def __read(run: str):
+        """ Yield the entries of a run, a block at a time
+
+        :Args:
+         - run: Run path
+        """
+        with open(run, 'rb') as file:
+            while True:
+                try:
+                    block = pickle.load(file)
+                except EOFError:
+                    return
+                yield from block
+
+    @staticmethod
+    def __write(writer, index, rows: list, lines: list):
+        """ Write merged rows and their index lines, the lists are emptied
+
+        :Args:
+         - writer: csv writer of the merged csv
+         - index: Sidecar index file
+         - rows: Row lists in COLUMNS order
+         - lines: Index lines
+        """
+        writer.writerows(rows)
+        index.write(''.join(lines))
+        rows.clear()
+        lines.clear()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Merge the job outputs of the shards into one deduplicated output')
+    parser.add_argument('inputs', nargs='*', help='shard outputs, default to every shard under output/job/shards')
+    parser.add_argument('--engine', choices=['db', 'csv'], default='db', help='output kind of the shards')
+    parser.add_argument('--output', help='merged output, default to output/job/51job.db or 51job.csv, '
+                                         'an existing one is merged as the first input')
+    parser.add_argument('--run-size', type=int, default=RUN_SIZE, help='csv rows sorted in memory at a time')
+    args = parser.parse_args()
+
+    file = '51job.db' if args.engine == 'db' else '51job.csv'
+    target = args.output or os.path.join(config.job_output_dir(''), file)
+    sources = args.inputs or shard_outputs(file)
+    if os.path.exists(target) and target not in sources:
+        sources = [target] + sources
+    merge(sources, target, args.run_size)
+    logger.close()
@@ -0,0 +1,355 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 21:20
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : stage timings and counters exported as prometheus text and JSON
+
+import os
+import json
+import time
+import atexit
+import threading
+from contextlib import nullcontext
+
+PREFIX = 'jobspider_'
+
+# Upper bounds in seconds of the histogram buckets, from a cached parse to a slow slider verification
+BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+HELP = {
+    'stage_seconds': 'Duration of a pipeline stage',
+    'requests_total': 'Fetch attempts',
+    'pages_total': 'Fetched result pages',
+    'items_total': 'Fetched postings',
+    'retries_total': 'Fetch attempts that were retried, by failure class',
+    'breaker_trips_total': 'Times the circuit breaker opened',
+    'challenges_total': 'Slider challenges met by the HTTP fetcher',
+    'sliders_total': 'Slider challenges shown in the browser',
+    'failures_total': 'Failed fetch attempts by failure class',
+    'saved_total': 'Rows handed to a sink',
+}
+
+# Returned in place of a timer while the metrics are disabled, so a disabled timer costs one function call
+NULL_TIMER = nullcontext()
+
+
+class Histogram(object):
+    """ Cumulative bucket counts, sum and max of the observed values """
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """ Add a value
+
+        :Args:
+         - value: Observed value
+        """
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+
+class Timer(object):
+    """ Context manager that observes its duration into a stage histogram """
+
+    __slots__ = ('metrics', 'key', 'start')
+
+    def __init__(self, metrics, key: tuple):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.metrics.observe_key(self.key, time.perf_counter() - self.start)
+
+
+class Metrics(object):
+    """ Process wide counters and stage histograms
+
+    The prometheus textfile is rewritten every interval by a background thread, such as for the textfile
+    collector of node_exporter, and a JSON summary with the run rates is written when the run ends.
+    A {pid} in the paths is replaced by the process id, so that worker processes do not share a file.
+    """
+
+    def __init__(self, textfile: str = None, summary: str = None, interval: float = 15):
+        """ Init the metrics
+
+        :Args:
+         - textfile: Prometheus textfile path, None to skip
+         - summary: JSON summary path, None to skip
+         - interval: Seconds between the textfile writes
+        """
+        self.textfile = textfile
+        self.summary = summary
+        self.interval = interval
+        self.started = time.time()
+        self.__counters = {}
+        self.__histograms = {}
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    def start(self):
+        """ Start the periodic textfile writer """
+
+        if self.textfile is not None:
+            self.__thread = threading.Thread(target=self.__run, name='metrics', daemon=True)
+            self.__thread.start()
+        return self
+
+    def count(self, name: str, value: float = 1, **labels):
+        """ Increase a counter
+
+        :Args:
+         - name: Counter name
+         - value: Increment
+         - labels: Counter labels
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+    def observe_key(self, key: tuple, seconds: float):
+        """ Add a duration to a stage histogram
+
+        :Args:
+         - key: Stage labels
+         - seconds: Duration
+        """
+        with self.__lock:
+            histogram = self.__histograms.get(key)
+            if histogram is None:
+                histogram = self.__histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def timer(self, stage: str, **labels):
+        """ Get a timer of a stage
+
+        :Args:
+         - stage: Stage name
+         - labels: Extra labels, such as the sink
+        """
+        return Timer(self, tuple(sorted(dict(labels, stage=stage).items())))
+
+    def prometheus(self):
+        """ Render the metrics in the prometheus text format """
+
+        with self.__lock:
+            counters = dict(self.__counters)
+            histograms = {key: (list(h.buckets), h.count, h.sum) for key, h in self.__histograms.items()}
+
+        lines = []
+        for name in sorted(set(name for name, _ in counters)):
+            lines.append(f'# HELP {PREFIX}{name} {HELP.get(name, name)}')
+            lines.append(f'# TYPE {PREFIX}{name} counter')
+            for (counter, labels), value in sorted(counters.items()):
+                if counter == name:
+                    lines.append(f'{PREFIX}{name}{self.__labels(labels)} {value:g}')
+
+        if histograms:
+            name = PREFIX + 'stage_seconds'
+            lines.append(f'# HELP {name} {HELP["stage_seconds"]}')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, (buckets, count, total) in sorted(histograms.items()):
+                cumulative = 0
+                for bound, bucket in zip(BUCKETS, buckets):
+                    cumulative += bucket
+                    lines.append(f'{name}_bucket{self.__labels(labels + (("le", f"{bound:g}"),))} {cumulative}')
+                lines.append(f'{name}_bucket{self.__labels(labels + (("le", "+Inf"),))} {count}')
+                lines.append(f'{name}_sum{self.__labels(labels)} {total:.6f}')
+                lines.append(f'{name}_count{self.__labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def report(self):
+        """ Summarize the run, with the page, item and challenge rates """
+
+        elapsed = max(time.time() - self.started, 1e-9)
+        with self.__lock:
+            counters = {}
+            for (name, labels), value in self.__counters.items():
+                counters.setdefault(name, {})[self.__key(labels) or 'total'] = value
+            stages = {}
+            for labels, histogram in sorted(self.__histograms.items()):
+                stages[self.__key(labels)] = {
+                    'count': histogram.count,
+                    'seconds': round(histogram.sum, 6),
+                    'mean': round(histogram.sum / histogram.count, 6) if histogram.count else None,
+                    'max': round(histogram.max, 6),
+                }
+
+        def total(name: str):
+            return sum(counters.get(name, {}).values())
+
+        requests = total('requests_total')
+        return {
+            'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+            'seconds': round(elapsed, 3),
+            'pages_per_sec': round(total('pages_total') / elapsed, 3),
+            'items_per_sec': round(total('items_total') / elapsed, 3),
+            'challenge_rate': round(total('challenges_total') / requests, 4) if requests else None,
+            'failures': counters.get('failures_total', {}),
+            'counters': counters,
+            'stages': stages,
+        }
+
+    def write_textfile(self):
+        """ Rewrite the prometheus textfile atomically """
+
+        if self.textfile is not None:
+            self.__write(self.textfile, self.prometheus())
+
+    def close(self):
+        """ Stop the writer, write the textfile and the JSON summary """
+
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+        self.write_textfile()
+        if self.summary is not None:
+            self.__write(self.summary, json.dumps(self.report(), ensure_ascii=False, indent=2))
+
+    def __run(self):
+        """ Write the textfile every interval until closed """
+
+        while not self.__stop.wait(self.interval):
+            self.write_textfile()
+
+    @staticmethod
+    def __write(path: str, text: str):
+        """ Write a file under a temporary name and rename it into place, readers never see a partial file
+
+        :Args:
+         - path: File path, {pid} is replaced by the process id
+         - text: File content
+        """
+        path = path.format(pid=os.getpid())
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp = os.path.join(directory, '.' + os.path.basename(path) + '.tmp')
+        with open(temp, 'w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(temp, path)
+
+    @staticmethod
+    def __key(labels: tuple):
+        """ Render the labels of a sample as a JSON key, such as sink=CsvSink,stage=save
+
+        :Args:
+         - labels: Sorted label pairs
+        """
+        return ','.join(f'{key}={value}' for key, value in labels)
+
+    @staticmethod
+    def __labels(labels: tuple):
+        """ Render the labels of a sample
+
+        :Args:
+         - labels: Sorted label pairs
+        """
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+_shared = None
+_lock = threading.Lock()
+
+
+def enable(textfile: str = None, summary: str = None, interval: float = 15):
+    """ Start recording the metrics of this process, they are written at exit
+
+    :Args:
+     - textfile: Prometheus textfile path, None to skip
+     - summary: JSON summary path, None to skip
+     - interval: Seconds between the textfile writes
+    """
+    global _shared
+    with _lock:
+        if _shared is not None:
+            _shared.close()
+        _shared = Metrics(textfile, summary, interval).start()
+        return _shared
+
+
+def shared_metrics():
+    """ Get the process wide metrics, None when they are disabled """
+
+    return _shared
+
+
+def close():
+    """ Write the metrics and stop recording """
+
+    global _shared
+    with _lock:
+        if _shared is not None:
+            _shared.close()
+            _shared = None
+
+
+def timer(stage: str, **labels):
+    """ Time a stage, a no-op context when the metrics are disabled
+
+    :Args:
+     - stage: Stage name, such as web_get or save
+     - labels: Extra labels, such as the sink
+    """
+    metrics = _shared
+    if metrics is None:
+        return NULL_TIMER
+    return metrics.timer(stage, **labels)
+
+
+def count(name: str, value: float = 1, **labels):
+    """ Increase a counter, a no-op when the metrics are disabled
+
+    :Args:
+     - name: Counter name, such as pages_total
+     - value: Increment
+     - labels: Counter labels, such as the failure cause
+    """
+    metrics = _shared
+    if metrics is not None:
+        metrics.count(name, value, **labels)
+
+
+def observe(stage: str, seconds: float, **labels):
+    """ Add a measured duration to a stage, a no-op when the metrics are disabled
+
+    :Args:
+     - stage: Stage name
+     - seconds: Duration
+     - labels: Extra labels
+    """
+    metrics = _shared
+    if metrics is not None:
+        metrics.observe_key(tuple(sorted(dict(labels, stage=stage).items())), seconds)
+
+
+def _restart_in_child():
+    """ A forked worker starts from empty metrics with its own writer thread and files """
+
+    global _shared
+    if _shared is not None:
+        _shared = Metrics(_shared.textfile, _shared.summary, _shared.interval).start()
+
+
+os.register_at_fork(after_in_child=_restart_in_child)
+atexit.register(close)
+
+# Set JOB51_METRICS to a textfile path such as ../output/metrics/spider-{pid}.prom to record every run,
+# the JSON summary is written next to it
+if os.environ.get('JOB51_METRICS'):
+    enable(textfile=os.environ['JOB51_METRICS'], summary=os.path.splitext(os.environ['JOB51_METRICS'])[0] + '.json')
@@ -0,0 +1,269 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 19:40
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : local mock 51job server for offline load testing
+
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from spider import logger, config
+from spider.cassette import CassetteStore, REPLAY
+
+SEARCH_PATH = '/api/job/search-pc'
+
+AREAS = [('000000', '全国'), ('010000', '北京'), ('020000', '上海'), ('030200', '广东省广州'),
+         ('040000', '广东省深圳'), ('050000', '天津'), ('060000', '重庆'), ('070200', '江苏省南京'),
+         ('080200', '浙江省杭州'), ('081100', '浙江省宁波'), ('090200', '四川省成都'), ('180200', '湖北省武汉')]
+
+NAMES = ['Python开发工程师', 'Java开发工程师', '前端开发工程师', '数据分析师', '算法工程师', '测试工程师']
+SALARIES = ['6千-1.2万', '1-1.5万', '1.5-2万', '2-3万', '150-200元/天', '面议']
+WORK_YEARS = ['无需经验', '1-3年', '3-4年', '5-7年']
+DEGREES = ['大专', '本科', '硕士']
+TAGS = ['五险一金', '员工旅游', '年终奖金', '弹性工作', '餐饮补贴', '定期体检']
+
+SLIDER_PAGE = '<html><body><div id="nc_1_wrapper">slider verification</div></body></html>'
+
+
+class MockServer(object):
+    """ Stand-in of the 51job API and area script
+
+    A request recorded in the cassette is replayed as is, any other search request gets a synthesized page
+    of a result set of `total` postings, sorted by issue date, so arbitrarily many pages can be crawled.
+    Every response is delayed by the configured latency, and a share of the requests fails with a 503
+    or a slider challenge page to exercise the retry and fallback paths.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, cassette: CassetteStore = None, total: int = 2000,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, challenge_rate: float = 0.0,
+                 seed: int = None):
+        """ Init the server param
+
+        :Args:
+         - host: Listening host
+         - port: Listening port, 0 to take a free port
+         - cassette: Cassette of the recorded responses to replay
+         - total: Number of postings of every synthesized search
+         - latency: Seconds every response is delayed
+         - jitter: Max random seconds added to the latency
+         - error_rate: Share of the requests answered by a 503
+         - challenge_rate: Share of the requests answered by a slider challenge page
+         - seed: Random seed of the latency and failures
+        """
+        if cassette is not None and cassette.mode != REPLAY:
+            raise ValueError('the cassette of the mock server must be in replay mode')
+
+        self.cassette = cassette
+        self.total = total
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.challenge_rate = challenge_rate
+        self.random = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.__stats = {'requests': 0, 'replayed': 0, 'synthesized': 0, 'errors': 0, 'challenges': 0}
+        self.__thread = None
+
+        self.httpd = ThreadingHTTPServer((host, port), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+
+    @property
+    def url(self):
+        """ Base url of the server """
+
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """ Serve in a background thread """
+
+        self.__thread = threading.Thread(target=self.httpd.serve_forever, name='mockserver', daemon=True)
+        self.__thread.start()
+        logger.info('mock server listening on ' + self.url)
+        return self
+
+    def configure(self):
+        """ Point the spiders of this and the later started processes at the server """
+
+        config.configure(api_base=self.url, area_url=self.url + config.AREA_PATH)
+        return self
+
+    def stop(self):
+        """ Stop serving and log the counters """
+
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.__thread is not None:
+            self.__thread.join()
+        logger.info('mock server stats: ' + json.dumps(self.stats()))
+
+    def stats(self):
+        """ Get a copy of the request counters """
+
+        with self.__lock:
+            return dict(self.__stats)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def respond(self, url: str):
+        """ Get the status, content type and body of a request
+
+        :Args:
+         - url: Request path and query
+        """
+        with self.__lock:
+            self.__stats['requests'] += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            roll = self.random.random()
+
+        time.sleep(delay)
+        if roll < self.error_rate:
+            self.__count('errors')
+            return 503, 'text/plain', 'Service Unavailable'
+        if roll < self.error_rate + self.challenge_rate:
+            self.__count('challenges')
+            return 200, 'text/html; charset=utf-8', SLIDER_PAGE
+
+        path = urlsplit(url).path
+        recorded = self.cassette.get(url) if self.cassette is not None else None
+        if recorded is not None:
+            self.__count('replayed')
+            kind = 'application/javascript' if path == config.AREA_PATH else 'application/json'
+            return 200, kind + '; charset=utf-8', recorded
+
+        if path == SEARCH_PATH:
+            self.__count('synthesized')
+            return 200, 'application/json; charset=utf-8', json.dumps(self.search(url), ensure_ascii=False)
+        if path == config.AREA_PATH:
+            self.__count('synthesized')
+            return 200, 'application/javascript; charset=utf-8', self.area_script()
+        return 404, 'text/plain', 'Not Found'
+
+    def search(self, url: str):
+        """ Synthesize a search response
+
+        The postings are derived from the query and their position, so a page is the same on every request.
+
+        :Args:
+         - url: Request path and query
+        """
+        params = dict(parse_qsl(urlsplit(url).query))
+        page = max(int(params.get('pageNum', 1)), 1)
+        pageSize = max(int(params.get('pageSize', 20)), 1)
+        area = dict(AREAS).get(params.get('jobArea'), '北京')
+        query = '|'.join(f'{key}={value}' for key, value in sorted(params.items()) if key not in ['pageNum', 'timestamp'])
+
+        start = (page - 1) * pageSize
+        items = [self.posting(query, params.get('keyword', ''), area, index)
+                 for index in range(start, min(start + pageSize, self.total))]
+        return {'status': '1', 'message': 'ok', 'resultbody': {'job': {'items': items, 'totalCount': self.total}}}
+
+    @staticmethod
+    def posting(query: str, keyword: str, area: str, index: int):
+        """ Synthesize the raw item of a posting
+
+        :Args:
+         - query: Query key
+         - keyword: Search keyword
+         - area: Area name
+         - index: Position in the result set
+        """
+        digest = hashlib.blake2b(f'{query}|{index}'.encode('utf-8'), digest_size=8).digest()
+
+        def pick(values: list, byte: int):
+            return values[digest[byte] % len(values)]
+
+        issued = time.localtime(1700000000 - index * 60)
+        return {
+            'jobName': keyword + ' ' + pick(NAMES, 0) + ' ' + digest.hex()[:6],
+            'jobTags': [pick(TAGS, 1), pick(TAGS, 2)],
+            'jobAreaString': area,
+            'jobAreaLevelDetail': {'provinceString': area, 'cityString': '', 'districtString': ''},
+            'provideSalaryString': pick(SALARIES, 3),
+            'workYearString': pick(WORK_YEARS, 4),
+            'degreeString': pick(DEGREES, 5),
+            'fullCompanyName': 'Company ' + str(int.from_bytes(digest[6:], 'big') % 5000),
+            'companyTypeString': '民营',
+            'companySizeString': '50-150人',
+            'companyLogo': '',
+            'issueDateString': time.strftime('%Y-%m-%d %H:%M:%S', issued),
+        }
+
+    @staticmethod
+    def area_script():
+        """ Synthesize the area list script in the layout read by AreaSpider51 """
+
+        entries = ','.join(f'{{k:"{code}",v:"{name}"}}' for code, name in AREAS)
+        return f'var d_jobarea={{hotcity:[{entries}],allProvince:[]}};'
+
+    def __count(self, key: str):
+        """ Increase a request counter
+
+        :Args:
+         - key: Counter name
+        """
+        with self.__lock:
+            self.__stats[key] += 1
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """ Request handler of the mock server """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        status, kind, body = self.server.mock.respond(self.path)
+        data = body.encode('utf-8')
+
+        # The area script carries an ETag like the CDN copy does, so conditional requests get a 304
+        etag = None
+        if status == 200 and urlsplit(self.path).path == config.AREA_PATH:
+            etag = '"' + hashlib.sha1(data).hexdigest()[:16] + '"'
+            if self.headers.get('If-None-Match') == etag:
+                status, data = 304, b''
+
+        self.send_response(status)
+        self.send_header('Content-Type', kind)
+        self.send_header('Content-Length', str(len(data)))
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        """ The requests are counted instead of logged """
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local mock 51job server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8051)
+    parser.add_argument('--cassette', help='cassette file of the recorded responses to replay')
+    parser.add_argument('--total', type=int, default=2000, help='number of postings of every synthesized search')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds every response is delayed')
+    parser.add_argument('--jitter', type=float, default=0.0, help='max random seconds added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of the requests answered by a 503')
+    parser.add_argument('--challenge-rate', type=float, default=0.0, help='share of the slider challenge pages')
+    args = parser.parse_args()
+
+    store = CassetteStore(args.cassette) if args.cassette else None
+    server = MockServer(host=args.host, port=args.port, cassette=store, total=args.total, latency=args.latency,
+                        jitter=args.jitter, error_rate=args.error_rate, challenge_rate=args.challenge_rate)
+    print('export JOB51_API_BASE=' + server.url)
+    print('export JOB51_AREA_URL=' + server.url + config.AREA_PATH)
+    server.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,162 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 16:10
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : columnar normalization of job items
+
+import hashlib
+import pandas as pd
+from spider.schema import COLUMNS, PRIMARY_KEY, IDENTITY, CONTENT, digest
+
+SOURCE = {
+    'jobName': 'jobName',
+    'salary': 'provideSalaryString',
+    'workYear': 'workYearString',
+    'degree': 'degreeString',
+    'companyName': 'fullCompanyName',
+    'companyType': 'companyTypeString',
+    'companySize': 'companySizeString',
+    'logo': 'companyLogo',
+    'issueDate': 'issueDateString',
+}
+
+SALARY_PATTERN = (r'^(?P<low>\d+(?:\.\d+)?)(?P<lowUnit>[千万])?'
+                  r'(?:-(?P<high>\d+(?:\.\d+)?)(?P<highUnit>[千万])?)?'
+                  r'(?:元)?(?P<bound>以下|以上)?(?:/(?P<period>小时|天|月|年))?')
+
+UNITS = {'千': 1000, '万': 10000}
+PERIODS = {'小时': 'hour', '天': 'day', '月': 'month', '年': 'year'}
+
+
+def by_unique(column: pd.Series, func):
+    """ Apply a column function to the distinct values only and spread the result back
+
+    Areas and salary strings repeat a lot within a crawl, so this saves most of the string work.
+
+    :Args:
+     - column: Column of hashable values
+     - func: Function from a Series of distinct values to a Series or a tuple of Series
+    """
+    codes, uniques = pd.factorize(column, use_na_sentinel=False)
+    result = func(pd.Series(uniques, dtype=object))
+    if isinstance(result, tuple):
+        return tuple(pd.Series(part.to_numpy()[codes], index=column.index) for part in result)
+    return pd.Series(result.to_numpy()[codes], index=column.index)
+
+
+def parse_salary(salary: pd.Series):
+    """ Parse provideSalaryString into numeric min, max and period columns
+
+    Such as '6千-1.2万' -> (6000, 12000, month), '150-200元/天' -> (150, 200, day), '1万以上' -> (10000, NaN, month).
+    The amounts are in yuan, a string that can not be parsed, such as '面议', gets NaN.
+
+    :Args:
+     - salary: Column of provideSalaryString
+    """
+    parts = salary.fillna('').astype(str).str.extract(SALARY_PATTERN)
+
+    # '6-8千' gives the unit only once, the low value takes the unit of the high value
+    highUnit = parts['highUnit'].fillna(parts['lowUnit']).map(UNITS).fillna(1)
+    lowUnit = parts['lowUnit'].fillna(parts['highUnit']).map(UNITS).fillna(1)
+    low = pd.to_numeric(parts['low']) * lowUnit
+    high = pd.to_numeric(parts['high']) * highUnit
+
+    below = parts['bound'] == '以下'
+    above = parts['bound'] == '以上'
+    salaryMin = low.where(~below)
+    salaryMax = high.where(parts['high'].notna(), low).where(~above)
+
+    period = parts['period'].map(PERIODS)
+    period = period.where(period.notna() | parts['low'].isna(), 'month')
+    return salaryMin, salaryMax, period
+
+
+def area_text(item: dict):
+    """ Get the raw area text of an item
+
+    jobAreaLevelDetail is a dict of province, city and district names, only its values are taken since
+    the area cleanup keeps the chinese characters. jobAreaString is the fallback.
+
+    :Args:
+     - item: Raw item
+    """
+    detail = item.get('jobAreaLevelDetail', item.get('jobAreaString'))
+    if isinstance(detail, dict):
+        return ''.join(map(str, detail.values()))
+    return str(detail)
+
+
+def normalize(items: list):
+    """ Turn a list of raw items into a columnar table in one pass
+
+    The area cleanup keeps the chinese characters of jobAreaLevelDetail, falling back to jobAreaString,
+    and the tags are joined by comma. The salary string is parsed into salaryMin, salaryMax and salaryPeriod.
+
+    :Args:
+     - items: JSON data list of resultbody.job.items
+    """
+    table = pd.DataFrame({column: [item.get(source) for item in items] for column, source in SOURCE.items()})
+
+    area = [area_text(item) for item in items]
+    table['area'] = by_unique(pd.Series(area, dtype=object),
+                              lambda x: x.str.replace(r'[^\u4e00-\u9fa5]+', '', regex=True))
+
+    table['tags'] = [','.join(item.get('jobTags') or []) for item in items]
+
+    table['salaryMin'], table['salaryMax'], table['salaryPeriod'] = by_unique(table['salary'], parse_salary)
+    return table[COLUMNS]
+
+
+def row_keys(table: pd.DataFrame):
+    """ Hash the primary key of every row
+
+    :Args:
+     - table: Normalized table
+    """
+    joined = table[PRIMARY_KEY[0]].astype(str)
+    for column in PRIMARY_KEY[1:]:
+        joined = joined.str.cat(table[column].astype(str), sep='\x1f')
+    return joined.map(lambda key: hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest())
+
+
+def hash_columns(table: pd.DataFrame, columns: list):
+    """ Hash some columns of every row by digest
+
+    A loop over the column lists costs less than the pandas string methods on tables of a page.
+
+    :Args:
+     - table: Normalized table
+     - columns: Columns to hash
+    """
+    rows = zip(*[table[column].tolist() for column in columns])
+    return pd.Series([digest(row) for row in rows], index=table.index, dtype=object)
+
+
+def posting_keys(table: pd.DataFrame):
+    """ Hash the identity of every row, it does not change when the posting is refreshed
+
+    :Args:
+     - table: Normalized table
+    """
+    return hash_columns(table, IDENTITY)
+
+
+def fingerprints(table: pd.DataFrame):
+    """ Hash the content of every row
+
+    :Args:
+     - table: Normalized table
+    """
+    return hash_columns(table, CONTENT)
+
+
+def to_records(table: pd.DataFrame, columns: list = None):
+    """ Get the rows of a table as tuples, NaN is replaced by None
+
+    :Args:
+     - table: Normalized table
+     - columns: Columns to take, default to all the columns
+    """
+    table = table[columns or list(table.columns)]
+    return list(table.astype(object).where(table.notna(), None).itertuples(index=False, name=None))
@@ -0,0 +1,242 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 13:30
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : adaptive query partitioning planner
+
+import math
+from spider import logger
+from spider.fetcher import Fetcher
+from spider.ratelimit import TokenBucket
+from spider.jobspider51 import JobSipder51, MAX_PAGE
+from spider.area.registry import NATIONWIDE, hierarchy
+
+# Filter codes of the 51job search page, the values of one facet do not overlap.
+# issueDate is left out on purpose, its windows are nested (1 day ⊂ 3 days ⊂ ...) and never cover old postings.
+FACETS = {
+    'salary': ['01', '02', '03', '04', '05', '06', '07', '08', '09', '10', '11', '12'],
+    'workYear': ['01', '02', '03', '04', '05', '06'],
+    'degree': ['01', '02', '03', '04', '05', '06', '07'],
+    'companyType': ['01', '02', '03', '04', '05', '06', '07', '08', '09', '10', '11'],
+}
+
+SPLIT_ORDER = ['jobArea', 'salary', 'workYear', 'degree', 'companyType']
+
+# Attempts of a probe, a probe that still fails leaves the count of its query unknown rather than 0
+PROBE_ATTEMPTS = 2
+
+
+class Partition(object):
+    """ A query whose result set fits under the API page cap """
+
+    def __init__(self, keyword: str, area: str, filters: dict, count: int, pageSize: int, uncovered: bool = False):
+        """ Init the partition
+
+        :Args:
+         - keyword: Search keyword
+         - area: Area code
+         - filters: Search facets
+         - count: Number of results reported by the probe
+         - pageSize: Specify the number of data per page
+         - uncovered: The partition is over the cap and was not split because the probes of its split failed
+        """
+        self.keyword = keyword
+        self.area = area
+        self.filters = filters
+        self.count = count
+        self.pageSize = pageSize
+        self.pages = min(math.ceil(count / pageSize), MAX_PAGE)
+        self.truncated = count > MAX_PAGE * pageSize
+        self.uncovered = uncovered
+
+    def __repr__(self):
+        return f'Partition({self.keyword!r}, {self.area!r}, {self.filters!r}, count={self.count})'
+
+
+class PartitionPlan(object):
+    """ The crawl plan made by the planner, it can be run by CrawlScheduler """
+
+    def __init__(self, partitions: list, probes: int, failed: list = None):
+        """ Init the plan
+
+        :Args:
+         - partitions: List of Partition
+         - probes: Number of requests spent on probing
+         - failed: (keyword, area, filters) of the probes that failed for good
+        """
+        self.partitions = partitions
+        self.probes = probes
+        self.failed = list(failed or [])
+
+    def tasks(self):
+        """ Yield the url param of every page of every partition """
+
+        for partition in self.partitions:
+            for page in range(1, partition.pages + 1):
+                yield {'keyword': partition.keyword, 'page': page, 'pageSize': partition.pageSize,
+                       'area': partition.area, 'filters': partition.filters}
+
+    def report(self):
+        """ Summarize the expected cost of the crawl """
+
+        return {
+            'partitions': len(self.partitions),
+            'results': sum(partition.count for partition in self.partitions),
+            'requests': len(self),
+            'probes': self.probes,
+            'truncated': sum(1 for partition in self.partitions if partition.truncated),
+            'uncovered': sum(1 for partition in self.partitions if partition.uncovered),
+            'failed probes': len(self.failed),
+        }
+
+    def __len__(self):
+        return sum(partition.pages for partition in self.partitions)
+
+
+class QueryPlanner(object):
+    """ Probe result counts and split the queries that hit the page cap
+
+    A query is split along the first facet whose values cover all of its results, the area hierarchy first,
+    then the other facets. Splitting stops as soon as a partition fits under the cap, so the crawl takes the
+    fewest requests that still cover the whole result set.
+
+    A probe that fails is not a count of 0. A facet with a failed probe is not used, since it is unknown what
+    it covers, and a query left without a usable facet is kept whole and reported as uncovered.
+    """
+
+    def __init__(self, areas: list = None, pageSize: int = 200, fetcher: Fetcher = None, limiter: TokenBucket = None):
+        """ Init the planner param
+
+        :Args:
+         - areas: Known area codes, used to expand an area into its children, such as AreaRegistry.index.names
+         - pageSize: Specify the number of data per page of the crawl
+         - fetcher: Fetcher backend of the probes
+         - limiter: Rate limiter of the probes
+        """
+        self.areas = list(areas or [])
+        self.tree = hierarchy(self.areas)
+        self.pageSize = pageSize
+        self.fetcher = fetcher
+        self.limiter = limiter
+        self.probes = 0
+        self.failed = []
+
+    def plan(self, keywords: list, area: str = NATIONWIDE):
+        """ Partition the queries of every keyword
+
+        Finally, return a PartitionPlan and log its expected cost
+
+        :Args:
+         - keywords: Search keywords
+         - area: Root area code
+        """
+        self.probes, self.failed = 0, []
+        partitions = []
+        for keyword in keywords:
+            count = self.probe(keyword, area, {})
+            if count is None:
+                logger.warning('probe failed, skip keyword %s', keyword, keyword=keyword, area=area)
+                continue
+            partitions.extend(self.__split(keyword, area, {}, count, SPLIT_ORDER))
+
+        plan = PartitionPlan(partitions, self.probes, self.failed)
+        report = plan.report()
+        logger.info('crawl plan: %s', report, plan=report)
+        return plan
+
+    def probe(self, keyword: str, area: str, filters: dict):
+        """ Get the number of results of a query, None if every attempt of the probe failed
+
+        :Args:
+         - keyword: Search keyword
+         - area: Area code
+         - filters: Search facets
+        """
+        spider = JobSipder51(keyword=keyword, page=1, pageSize=1, area=area, fetcher=self.fetcher,
+                             limiter=self.limiter, filters=filters)
+        for _ in range(PROBE_ATTEMPTS):
+            self.probes += 1
+            job = spider.get_page_json(1)
+            if job is not None:
+                return int(job.get('totalCount', 0))
+
+        self.failed.append((keyword, area, filters))
+        logger.warning('probe of %s %s %s failed %s times', keyword, area, filters, PROBE_ATTEMPTS,
+                       keyword=keyword, area=area, filters=filters)
+        return None
+
+    def children(self, area: str):
+        """ Get the child area codes of an area by the code hierarchy
+
+        The tree is built once from the known areas, an area whose parent is unknown hangs from the nearest
+        known ancestor, so that no area is left out of the split.
+
+        :Args:
+         - area: Area code
+        """
+        return self.tree.get(area, [])
+
+    def __split(self, keyword: str, area: str, filters: dict, count: int, facets: list):
+        """ Recursively split a query until every partition fits under the cap
+
+        :Args:
+         - keyword: Search keyword
+         - area: Area code
+         - filters: Search facets
+         - count: Number of results of the query
+         - facets: Facets still available for splitting
+        """
+        if count <= MAX_PAGE * self.pageSize or not facets:
+            if count > MAX_PAGE * self.pageSize:
+                logger.warning('no facet left to split %s %s %s, %s results truncated', keyword, area, filters, count,
+                               keyword=keyword, area=area, filters=filters, count=count)
+            return [Partition(keyword, area, filters, count, self.pageSize)]
+
+        best, best_facet, best_covered, failed = None, None, -1, False
+        for facet in facets:
+            if facet == 'jobArea':
+                children = [(code, filters) for code in self.children(area)]
+            else:
+                children = [(area, dict(filters, **{facet: value})) for value in FACETS[facet]]
+            if not children:
+                continue
+
+            counts = []
+            for child_area, child_filters in children:
+                child_count = self.probe(keyword, child_area, child_filters)
+                if child_count is None:
+                    break
+                counts.append((child_area, child_filters, child_count))
+            if len(counts) < len(children):
+                logger.warning('%s is not used to split %s %s %s, a probe failed', facet, keyword, area, filters,
+                               facet=facet, keyword=keyword, area=area, filters=filters)
+                failed = True
+                continue
+
+            covered = sum(child_count for _, _, child_count in counts)
+            if covered > best_covered:
+                best, best_facet, best_covered = counts, facet, covered
+            if covered >= count:
+                break
+            logger.info('%s covers %s of %s results of %s %s %s', facet, covered, count, keyword, area, filters,
+                        facet=facet, covered=covered, count=count, keyword=keyword, area=area, filters=filters)
+
+        if best is None:
+            logger.warning('cannot split %s %s %s, %s results truncated', keyword, area, filters, count,
+                           keyword=keyword, area=area, filters=filters, count=count)
+            return [Partition(keyword, area, filters, count, self.pageSize, uncovered=failed)]
+
+        if best_covered < count:
+            logger.warning('%s split of %s %s %s misses %s results', best_facet, keyword, area, filters,
+                           count - best_covered, facet=best_facet, keyword=keyword, area=area, filters=filters,
+                           missed=count - best_covered)
+
+        # The area hierarchy can be split again at the next level, the other facets only once
+        remaining = [facet for facet in facets if facet != best_facet or facet == 'jobArea']
+        partitions = []
+        for child_area, child_filters, child_count in best:
+            if child_count == 0:
+                continue
+            partitions.extend(self.__split(keyword, child_area, child_filters, child_count, remaining))
+        return partitions
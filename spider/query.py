@@ -0,0 +1,240 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 18:30
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : paginated query API over the sqlite job store
+
+import json
+import time
+import sqlite3
+from spider.schema import COLUMNS, digest
+from spider.sink.aggregate import ALL, FACETS, quantiles
+
+# The trigram tokenizer only matches terms of three characters or more, shorter terms fall back to LIKE
+MIN_MATCH = 3
+
+# Groupings of the statistics, a facet is a breakdown of the groups, the others are columns of them
+GROUPINGS = ['keyword', 'area', 'day'] + FACETS
+
+# On the dictionary-encoded layout job51 is a view, see spider.sink.dictsink. A company has few rows, its filter
+# looks up the id of the name and reads the index of the fact table rather than every row of the view. An area
+# has many, a newest first scan of the view finds a page of them sooner than the sorted list of all its rows
+DICTIONARY_FILTERS = {
+    'companyName': '''j.rowid IN (SELECT `jobId` FROM `jobfact51`
+                      WHERE `companyId` = (SELECT `companyId` FROM `company51` WHERE `companyName` = ?))''',
+}
+
+
+class JobQuery(object):
+    """ Read-only query API of the sqlite output DB
+
+    Rows come out newest stored first and are paginated by a rowid cursor rather than an offset, so
+    every page is an index range read no matter how deep it is. The filters are served by the secondary
+    indexes and the keyword search by the full-text index of jobName and tags, see spider.sink.sqlitesink.
+    Both the flat and the dictionary-encoded layout are read. The statistics are read from the tables
+    kept by spider.sink.aggregate.
+    """
+
+    def __init__(self, output: str):
+        """ Open the output DB read-only
+
+        :Args:
+         - output: Data output path
+        """
+        self.connect = sqlite3.connect(f'file:{output}?mode=ro', uri=True, timeout=30, check_same_thread=False)
+        kind = self.connect.execute("SELECT type FROM sqlite_master WHERE name = 'job51';").fetchone()
+        self.filters = {'area': 'j.`area` = ?', 'companyName': 'j.`companyName` = ?'}
+        if kind == ('view',):
+            self.filters.update(DICTIONARY_FILTERS)
+
+    def search(self, text: str = None, tag: str = None, area: str = None, companyName: str = None,
+               degree: str = None, issuedAfter: str = None, issuedBefore: str = None, salaryMin: float = None,
+               salaryMax: float = None, pageSize: int = 50, cursor: int = None):
+        """ Get a page of jobs
+
+        Finally, return the rows as dictionaries and the cursor of the next page, which is None on the last page
+
+        :Args:
+         - text: Keyword searched in jobName and tags
+         - tag: Keyword searched in tags only
+         - area: Area name, such as 浙江省宁波
+         - companyName: Full company name
+         - degree: Degree string, such as 本科
+         - issuedAfter: Lowest issueDate, inclusive, such as 2023-12-01
+         - issuedBefore: Highest issueDate, exclusive
+         - salaryMin: Lowest salaryMin in yuan
+         - salaryMax: Highest salaryMax in yuan
+         - pageSize: Number of rows per page
+         - cursor: Cursor returned with the previous page
+        """
+        match, conditions, params = [], [], []
+        for column, value in [(None, text), ('tags', tag)]:
+            if not value:
+                continue
+            if len(value) >= MIN_MATCH:
+                phrase = '"' + value.replace('"', '""') + '"'
+                match.append(f'{column} : {phrase}' if column else phrase)
+            else:
+                columns = [column] if column else ['jobName', 'tags']
+                conditions.append('(' + ' OR '.join(f'j.`{name}` LIKE ?' for name in columns) + ')')
+                params.extend(['%' + value + '%'] * len(columns))
+
+        for condition, value in [(self.filters['area'], area),
+                                 (self.filters['companyName'], companyName),
+                                 ('j.`degree` = ?', degree),
+                                 ('j.`issueDate` >= ?', issuedAfter),
+                                 ('j.`issueDate` < ?', issuedBefore),
+                                 ('j.`salaryMin` >= ?', salaryMin),
+                                 ('j.`salaryMax` <= ?', salaryMax)]:
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+
+        select = 'SELECT j.rowid, ' + ', '.join(f'j.`{column}`' for column in COLUMNS)
+        if match:
+            # The full-text index drives the query, it yields the matches in rowid order
+            sql = select + ' FROM `job51_fts` f JOIN `job51` j ON j.rowid = f.rowid WHERE `job51_fts` MATCH ?'
+            params.insert(0, ' AND '.join(match))
+            rowid = 'f.rowid'
+        else:
+            sql = select + ' FROM `job51` j WHERE 1'
+            rowid = 'j.rowid'
+
+        if cursor is not None:
+            conditions.append(rowid + ' < ?')
+            params.append(cursor)
+
+        sql += ''.join(' AND ' + condition for condition in conditions) + ' ORDER BY ' + rowid + ' DESC LIMIT ?;'
+        params.append(pageSize)
+
+        rows = self.connect.execute(sql, params).fetchall()
+        items = [dict(zip(COLUMNS, row[1:])) for row in rows]
+        return items, rows[-1][0] if len(rows) == pageSize else None
+
+    def iter(self, pageSize: int = 500, **filters):
+        """ Stream every matching job page by page
+
+        :Args:
+         - pageSize: Number of rows per page
+         - filters: Filters of search
+        """
+        cursor = None
+        while True:
+            items, cursor = self.search(pageSize=pageSize, cursor=cursor, **filters)
+            yield from items
+            if cursor is None:
+                return
+
+    def changes(self, since, until=None, pageSize: int = 500, cursor: tuple = None):
+        """ Get a page of the postings that are new or changed in a time range, from the version history
+
+        A new posting comes with version 1 and no changes, a changed one with the {column: [old, new]}
+        of the content columns that changed, see spider.sink.sqlitesink.
+
+        Finally, return the rows as dictionaries and the cursor of the next page, which is None on the last page
+
+        :Args:
+         - since: Start time, inclusive, as a unix time or a string such as 2023-12-01 or 2023-12-01 08:00:00
+         - until: End time, exclusive, default to now
+         - pageSize: Number of rows per page
+         - cursor: Cursor returned with the previous page
+        """
+        since, until = self.__time(since), self.__time(until) if until is not None else time.time()
+        params = [since, until]
+        sql = ('''SELECT v.`firstSeen`, v.`postingKey`, v.`version`, v.`changes`, j.rowid, ''' +
+               ', '.join(f'j.`{column}`' for column in COLUMNS) +
+               ''' FROM `version51` v JOIN `posting51` p ON p.`postingKey` = v.`postingKey`
+                  JOIN `job51` j ON j.rowid = p.`jobRowid` WHERE v.`firstSeen` >= ? AND v.`firstSeen` < ?''')
+        if cursor is not None:
+            sql += ''' AND (v.`firstSeen`, v.`postingKey`, v.`version`) > (?, ?, ?)'''
+            params.extend(cursor)
+        sql += ''' ORDER BY v.`firstSeen`, v.`postingKey`, v.`version` LIMIT ?;'''
+        params.append(pageSize)
+
+        rows = self.connect.execute(sql, params).fetchall()
+        items = [dict(zip(COLUMNS, row[5:]), version=row[2], changes=json.loads(row[3]) if row[3] else None,
+                      firstSeen=row[0]) for row in rows]
+        return items, tuple(rows[-1][:3]) if len(rows) == pageSize else None
+
+    def history(self, jobName: str, area: str, companyName: str):
+        """ Get every version of a posting, oldest first
+
+        :Args:
+         - jobName: Job name
+         - area: Area name
+         - companyName: Full company name
+        """
+        key = digest([jobName, area, companyName])
+        sql = '''SELECT v.`version`, v.`fingerprint`, v.`changes`, v.`firstSeen`, COALESCE(v.`lastSeen`, p.`lastSeen`)
+                 FROM `version51` v JOIN `posting51` p ON p.`postingKey` = v.`postingKey`
+                 WHERE v.`postingKey` = ? ORDER BY v.`version`;'''
+        return [{'version': row[0], 'fingerprint': row[1], 'changes': json.loads(row[2]) if row[2] else None,
+                 'firstSeen': row[3], 'lastSeen': row[4]} for row in self.connect.execute(sql, (key,))]
+
+    def stats(self, by: str = 'area', keyword: str = None, area: str = None, issuedAfter: str = None,
+              issuedBefore: str = None, ranks: tuple = (0.25, 0.5, 0.75)):
+        """ Get the posting counts and monthly salary statistics grouped by a column, most postings first
+
+        A posting found by several keywords counts once, unless grouped by keyword. The salary quantiles are
+        estimated from histograms, within 1% of the exact ones, the other values are exact.
+
+        Finally, return the groups as dictionaries
+
+        :Args:
+         - by: Grouping, one of keyword, area, day, degree and companySize
+         - keyword: Search keyword, default to all
+         - area: Area name, such as 浙江省宁波
+         - issuedAfter: Lowest issue day, inclusive, such as 2023-12-01
+         - issuedBefore: Highest issue day, exclusive
+         - ranks: Quantiles of the salary, such as 0.5 for the median
+        """
+        if by not in GROUPINGS:
+            raise ValueError('unknown grouping ' + str(by) + ', expected one of ' + ', '.join(GROUPINGS))
+
+        facet = by if by in FACETS else ''
+        conditions, params = ['`facet` = ?'], [facet]
+        if by == 'keyword' and keyword is None:
+            conditions.append('`keyword` != ?')
+            params.append(ALL)
+        else:
+            conditions.append('`keyword` = ?')
+            params.append(ALL if keyword is None else keyword)
+        for condition, value in [('`area` = ?', area), ('`day` >= ?', issuedAfter), ('`day` < ?', issuedBefore)]:
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+
+        column = '`value`' if facet else f'`{by}`'
+        where = ' WHERE ' + ' AND '.join(conditions)
+        sql = (f'''SELECT {column}, SUM(`postings`), SUM(`salaried`), TOTAL(`salarySum`), MIN(`salaryMin`),
+                   MAX(`salaryMax`) FROM `stats51`''' + where + f''' GROUP BY {column} ORDER BY 2 DESC, 1;''')
+        groups = self.connect.execute(sql, params).fetchall()
+
+        histograms = {}
+        sql = (f'''SELECT {column}, `bucket`, SUM(`postings`) FROM `salaryhist51`''' + where +
+               f''' GROUP BY {column}, `bucket` ORDER BY {column}, `bucket`;''')
+        for value, bucket, count in self.connect.execute(sql, params):
+            histograms.setdefault(value, []).append((bucket, count))
+
+        return [{by: value, 'postings': postings, 'salaried': salaried,
+                 'salaryMean': total / salaried if salaried else None, 'salaryMin': low, 'salaryMax': high,
+                 'salaryQuantiles': dict(zip(ranks, quantiles(histograms.get(value, []), ranks)))}
+                for value, postings, salaried, total, low, high in groups]
+
+    @staticmethod
+    def __time(value):
+        """ Get the unix time of a time given as a number or a local time string
+
+        :Args:
+         - value: Unix time, or a string such as 2023-12-01 or 2023-12-01 08:00:00
+        """
+        if isinstance(value, (int, float)):
+            return float(value)
+        layout = '%Y-%m-%d %H:%M:%S' if ' ' in value else '%Y-%m-%d'
+        return time.mktime(time.strptime(value, layout))
+
+    def close(self):
+        """ Close the connection """
+
+        self.connect.close()
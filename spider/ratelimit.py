@@ -0,0 +1,83 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 10:48
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : token bucket rate limiter
+
+import os
+import time
+import threading
+
+
+class TokenBucket(object):
+    """ Thread safe token bucket
+
+    Tokens are refilled at a constant rate up to the burst capacity, each request takes one token.
+    A caller only waits as long as needed to keep the requests-per-second budget.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """ Init the bucket param
+
+        :Args:
+         - rate: Requests per second budget
+         - burst: Max number of tokens kept in the bucket
+        """
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0')
+
+        self.rate = rate
+        self.burst = burst
+        self.__tokens = float(burst)
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        """ Take a token, block until one is available
+
+        Finally, return the seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self.__lock:
+                self.__refill()
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return waited
+                delay = (1 - self.__tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+    def __refill(self):
+        """ Add the tokens produced since the last update """
+
+        now = time.monotonic()
+        self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
+
+
+_shared = None
+_lock = threading.Lock()
+
+
+def shared_limiter():
+    """ Get the process wide limiter, about one request every five seconds """
+
+    global _shared
+    with _lock:
+        if _shared is None:
+            _shared = TokenBucket(rate=0.2)
+        return _shared
+
+
+def _reset_in_child():
+    """ A forked worker starts with its own full limiter, the lock of the parent may be held by one of its threads """
+
+    global _shared, _lock
+    _shared = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_in_child)
@@ -0,0 +1,230 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 00:20
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : error taxonomy, retry policies and circuit breaker of the fetches
+
+import os
+import sys
+import time
+import random
+import threading
+from collections import deque
+from requests import exceptions as http
+from spider import logger, metrics
+from spider.fetcher import SliderChallenge, PageBlocked, StatusError
+
+# Failure classes, see classify
+TRANSIENT = 'transient'
+CHALLENGE = 'challenge'
+BLOCKED = 'blocked'
+DRIVER = 'driver'
+INVALID = 'invalid'
+REJECTED = 'rejected'
+UNKNOWN = 'unknown'
+
+
+class RetryPolicy(object):
+    """ Number of attempts and exponential backoff of a failure class """
+
+    def __init__(self, attempts: int, base: float = 1, cap: float = 60, trips: bool = False):
+        """ Init the policy
+
+        :Args:
+         - attempts: Max number of attempts of a request, 1 to never retry
+         - base: Backoff seconds of the first retry, doubled on every later one
+         - cap: Max backoff seconds
+         - trips: The failure tells that the site is in trouble, it counts towards the circuit breaker
+        """
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+        self.trips = trips
+
+    def delay(self, attempt: int):
+        """ Get the backoff before the next attempt, with full jitter
+
+        The delay is random between 0 and the exponential bound, so the workers that failed together
+        do not come back together.
+
+        :Args:
+         - attempt: Number of the attempt that failed, from 1
+        """
+        return random.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+
+
+POLICIES = {
+    # Connection errors, timeouts, 429 and 5xx responses
+    TRANSIENT: RetryPolicy(attempts=4, base=1, cap=30, trips=True),
+    # The slider verification was rejected
+    CHALLENGE: RetryPolicy(attempts=3, base=5, cap=60, trips=True),
+    # 403 or a denial page, the circuit breaker decides when to try again
+    BLOCKED: RetryPolicy(attempts=2, base=30, cap=300, trips=True),
+    # The browser crashed or lost the session, the driver pool rebuilds it
+    DRIVER: RetryPolicy(attempts=3, base=2, cap=20),
+    # The response is not the expected JSON
+    INVALID: RetryPolicy(attempts=2, base=1, cap=5),
+    # The API answered with a status other than 1, or a 4xx, the same request gets the same answer
+    REJECTED: RetryPolicy(attempts=1),
+    UNKNOWN: RetryPolicy(attempts=2, base=1, cap=10),
+}
+
+
+def classify(error: Exception):
+    """ Get the failure class of a fetch error
+
+    :Args:
+     - error: Exception raised by the fetch
+    """
+    if isinstance(error, StatusError):
+        return REJECTED
+    if isinstance(error, PageBlocked):
+        return BLOCKED
+    if isinstance(error, SliderChallenge):
+        return CHALLENGE
+    if isinstance(error, http.HTTPError):
+        status = error.response.status_code if error.response is not None else 0
+        if status == 403:
+            return BLOCKED
+        if status == 429 or status >= 500:
+            return TRANSIENT
+        return REJECTED
+    if isinstance(error, (http.ConnectionError, http.Timeout)):
+        return TRANSIENT
+
+    # A selenium error comes from a browser, so selenium is imported already when there is one
+    browser = sys.modules.get('selenium.common.exceptions')
+    if browser is not None:
+        if isinstance(error, browser.TimeoutException):
+            return TRANSIENT
+        if isinstance(error, browser.WebDriverException):
+            return DRIVER
+    if isinstance(error, (ValueError, KeyError, TypeError)):
+        return INVALID
+    return UNKNOWN
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker(object):
+    """ Pause every fetch of the process while the site fails most requests
+
+    The outcomes of the last requests are kept in a sliding window. When the share of the failures that
+    trip the breaker crosses the threshold, the breaker opens and every worker waits out the cooldown
+    instead of spending requests on a site that is blocking. Then a single probe request is let through,
+    the breaker closes if it succeeds, otherwise it opens again with a doubled cooldown.
+
+    The probe is the request of the caller that wait hands the probe token to. The outcomes of the requests
+    that were in flight when the breaker opened come in without the token and are ignored until it closes.
+    """
+
+    def __init__(self, threshold: float = 0.5, window: int = 20, min_calls: int = 10, cooldown: float = 30,
+                 max_cooldown: float = 600):
+        """ Init the breaker param
+
+        :Args:
+         - threshold: Share of failed requests in the window that opens the breaker
+         - window: Number of the last requests taken into account
+         - min_calls: Min number of requests in the window before the breaker can open
+         - cooldown: Seconds of the first pause
+         - max_cooldown: Max seconds of a pause
+        """
+        self.threshold = threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.__outcomes = deque(maxlen=window)
+        self.__pause = cooldown
+        self.__until = 0.0
+        self.__probe = None
+        self.__condition = threading.Condition()
+
+    def wait(self):
+        """ Block while the breaker is open, or while the probe of the half open breaker is in flight
+
+        Finally, return the seconds spent waiting and the probe token, None unless the request is the probe
+        """
+        start = time.monotonic()
+        probe = None
+        with self.__condition:
+            while True:
+                if self.state == CLOSED:
+                    break
+                now = time.monotonic()
+                if self.state == OPEN and now >= self.__until:
+                    self.state = HALF_OPEN
+                if self.state == HALF_OPEN and self.__probe is None:
+                    self.__probe = probe = object()
+                    break
+                timeout = self.__until - now if self.state == OPEN else None
+                self.__condition.wait(timeout)
+        return time.monotonic() - start, probe
+
+    def record(self, ok: bool, probe: object = None):
+        """ Add the outcome of a request
+
+        :Args:
+         - ok: The request succeeded, or failed for a reason that does not trip the breaker
+         - probe: Probe token returned by wait before the request
+        """
+        with self.__condition:
+            if self.state != CLOSED:
+                # An outcome without the token is of a request sent before the breaker opened
+                if probe is None or probe is not self.__probe:
+                    return
+                self.__probe = None
+                if ok:
+                    logger.info('circuit breaker closed, the probe request succeeded')
+                    self.state = CLOSED
+                    self.__pause = self.cooldown
+                    self.__outcomes.clear()
+                else:
+                    self.__pause = min(self.__pause * 2, self.max_cooldown)
+                    self.__open()
+                self.__condition.notify_all()
+                return
+
+            self.__outcomes.append(ok)
+            if len(self.__outcomes) >= self.min_calls:
+                failures = self.__outcomes.count(False)
+                if failures >= self.threshold * len(self.__outcomes):
+                    self.__open()
+
+    def __open(self):
+        """ Open the breaker for the current pause """
+
+        self.state = OPEN
+        self.__until = time.monotonic() + self.__pause
+        self.__outcomes.clear()
+        metrics.count('breaker_trips_total')
+        logger.warning('circuit breaker open, pausing the fetches for %.0fs', self.__pause, pause=self.__pause)
+
+
+_shared = None
+_lock = threading.Lock()
+
+
+def shared_breaker():
+    """ Get the process wide circuit breaker """
+
+    global _shared
+    with _lock:
+        if _shared is None:
+            _shared = CircuitBreaker()
+        return _shared
+
+
+def _reset_in_child():
+    """ A forked worker starts with its own closed breaker, the condition of the parent may be held by its threads """
+
+    global _shared, _lock
+    _shared = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_in_child)
@@ -0,0 +1,172 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 11:02
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : asyncio crawl scheduler
+
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from spider import logger, preload
+from spider.fetcher import Fetcher
+from spider.ratelimit import TokenBucket
+from spider.jobspider51 import JobSipder51
+from spider.sink.base import check_engine, sink_modules
+from spider.area.registry import AreaRegistry, shared_registry
+from spider.deadletter import DeadLetterStore, shared_deadletter
+
+SEARCH_ENDPOINT = 'search-pc'
+
+
+class CrawlPlan(object):
+    """ The keyword × area × page grid of a crawl """
+
+    def __init__(self, keywords: list, areas: list, pages: range = range(1, 2), pageSize: int = 200):
+        """ Init the plan param
+
+        :Args:
+         - keywords: Search keywords
+         - areas: Area codes
+         - pages: Page numbers of each (keyword, area)
+         - pageSize: Specify the number of data per page
+        """
+        self.keywords = keywords
+        self.areas = areas
+        self.pages = pages
+        self.pageSize = pageSize
+
+    @classmethod
+    def from_area_db(cls, keywords: list, path: str, pages: range = range(1, 2), pageSize: int = 200):
+        """ Build a plan over every area code of the area database
+
+        :Args:
+         - keywords: Search keywords
+         - path: Path of 51area.db
+         - pages: Page numbers of each (keyword, area)
+         - pageSize: Specify the number of data per page
+        """
+        areas = []
+        connect = sqlite3.connect(path)
+        cursor = connect.cursor()
+        sql = '''SELECT `code` FROM `area51`;'''
+        try:
+            cursor.execute(sql)
+            areas = [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            logger.warning("SQL execution failure of SQLite: " + str(e))
+        finally:
+            cursor.close()
+            connect.close()
+
+        return cls(keywords, areas, pages, pageSize)
+
+    @classmethod
+    def from_registry(cls, keywords: list, registry: AreaRegistry = None, pages: range = range(1, 2),
+                      pageSize: int = 200):
+        """ Build a plan over every area code of the cached area dictionary, no area crawl is needed
+
+        :Args:
+         - keywords: Search keywords
+         - registry: Area registry, default to the shared registry
+         - pages: Page numbers of each (keyword, area)
+         - pageSize: Specify the number of data per page
+        """
+        index = (registry or shared_registry()).index
+        return cls(keywords, [code for code, _ in index.entries], pages, pageSize)
+
+    def tasks(self):
+        """ Yield the url param of every grid cell """
+
+        for keyword in self.keywords:
+            for area in self.areas:
+                for page in self.pages:
+                    yield {'keyword': keyword, 'page': page, 'pageSize': self.pageSize, 'area': area}
+
+    def __len__(self):
+        return len(self.keywords) * len(self.areas) * len(self.pages)
+
+
+class CrawlScheduler(object):
+    """ Run the fetches of a crawl plan concurrently
+
+    Politeness is controlled by the token bucket, every fetch attempt takes a token, so the
+    requests-per-second budget holds no matter how many workers are running. The global and
+    per-endpoint caps bound the number of fetches in flight. Saving is serialized since the
+    output files are shared.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, concurrency: int = 4, endpoint_concurrency: dict = None,
+                 fetcher: Fetcher = None, deadletter: DeadLetterStore = None):
+        """ Init the scheduler param
+
+        :Args:
+         - rate: Requests per second budget
+         - burst: Max number of requests sent at once after an idle period
+         - concurrency: Max number of fetches in flight
+         - endpoint_concurrency: Max number of fetches in flight per endpoint, type Dict{endpoint: int}
+         - fetcher: Fetcher backend shared by the workers
+         - deadletter: Dead-letter store of the tasks that failed for good, default to the one of the output DB
+        """
+        self.limiter = TokenBucket(rate=rate, burst=burst)
+        self.concurrency = concurrency
+        self.endpoint_concurrency = endpoint_concurrency or {}
+        self.fetcher = fetcher
+        self.deadletter = deadletter if deadletter is not None else shared_deadletter()
+
+    def run(self, plan: CrawlPlan, save_engine: str):
+        """ Run the plan until every task is done
+
+        :Args:
+         - plan: Crawl plan
+         - save_engine: Data storage engine, such as csv, db, both or parquet
+        """
+        error = check_engine('job', save_engine)
+        if error:
+            return logger.error(error)
+
+        preload('spider.normalizer', *sink_modules('job', save_engine))
+        return asyncio.run(self.crawl(plan, save_engine))
+
+    async def crawl(self, plan: CrawlPlan, save_engine: str):
+        """ Crawl the plan in the running event loop
+
+        Finally, return the number of tasks that got data
+
+        :Args:
+         - plan: Crawl plan
+         - save_engine: Data storage engine, such as csv, db, both or parquet
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='crawl')
+        slots = asyncio.Semaphore(self.concurrency)
+        endpoint = asyncio.Semaphore(self.endpoint_concurrency.get(SEARCH_ENDPOINT, self.concurrency))
+        save_lock = asyncio.Lock()
+
+        async def worker(args: dict):
+            spider = JobSipder51(keyword=args['keyword'], page=args['page'], pageSize=args['pageSize'],
+                                 area=args['area'], fetcher=self.fetcher, limiter=self.limiter,
+                                 filters=args.get('filters'), deadletter=self.deadletter)
+            async with slots, endpoint:
+                data = await loop.run_in_executor(executor, spider.get_data_json)
+
+            if data is None:
+                return False
+
+            async with save_lock:
+                await loop.run_in_executor(executor, spider.save, data, save_engine)
+            if self.deadletter is not None:
+                await loop.run_in_executor(executor, self.deadletter.resolve, args)
+            return True
+
+        logger.info('Scheduling ' + str(len(plan)) + ' tasks')
+        try:
+            results = await asyncio.gather(*[worker(args) for args in plan.tasks()], return_exceptions=True)
+        finally:
+            executor.shutdown(wait=True)
+
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error('crawl task failure: ' + str(result))
+
+        return sum(1 for result in results if result is True)
@@ -0,0 +1,29 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 03:00
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : columns and posting identity of the job tables
+
+import hashlib
+
+COLUMNS = ['jobName', 'tags', 'area', 'salary', 'workYear', 'degree',
+           'companyName', 'companyType', 'companySize', 'logo', 'issueDate',
+           'salaryMin', 'salaryMax', 'salaryPeriod']
+
+PRIMARY_KEY = ['jobName', 'area', 'companyName', 'issueDate']
+
+# A posting keeps its identity when it is refreshed, its content fingerprint changes with any of the
+# content columns, the salary columns derived from salary are left out
+IDENTITY = ['jobName', 'area', 'companyName']
+CONTENT = ['tags', 'salary', 'workYear', 'degree', 'companyType', 'companySize', 'logo', 'issueDate']
+
+
+def digest(values):
+    """ Hash a sequence of values, None and NaN hash like an empty string
+
+    :Args:
+     - values: Column values of a row
+    """
+    joined = '\x1f'.join(['' if value is None or value != value else str(value) for value in values])
+    return hashlib.blake2b(joined.encode('utf-8'), digest_size=8).hexdigest()
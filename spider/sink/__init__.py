@@ -0,0 +1,9 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 11:40
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : storage engines
+
+# The built-in plugins are imported by the first use of their storage engine, see spider.sink.base.MODULES,
+# importing any other plugin registers its storage engines
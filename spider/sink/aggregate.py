@@ -0,0 +1,342 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 06:30
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : incrementally maintained posting and salary statistics of the job output DB
+
+import math
+import sqlite3
+from spider import logger
+from spider.schema import COLUMNS
+
+# Keyword of the statistics over all the postings, a posting found by several keywords counts once in it
+ALL = ''
+
+# Breakdowns of a (keyword, area, day) group besides its total, the total has the facet and value ''
+FACETS = ['degree', 'companySize']
+
+# Relative width of a salary histogram bucket, a quantile is off by 1% at most
+GAMMA = 1.02
+
+# The contribution of every posting to the statistics, as it was last counted. Only monthly salaries are
+# counted, salary is the middle of the range, or its only bound
+SQL_CONTRIB_TABLE = '''CREATE TABLE IF NOT EXISTS `contrib51` (
+          `postingKey` CHAR(16) NOT NULL,
+          `area` VARCHAR(50) NOT NULL,
+          `day` CHAR(10) NOT NULL,
+          `degree` VARCHAR(10) NOT NULL,
+          `companySize` VARCHAR(10) NOT NULL,
+          `salary` REAL NULL,
+          `bucket` INTEGER NULL,
+          `salaryMin` REAL NULL,
+          `salaryMax` REAL NULL,
+          PRIMARY KEY (`postingKey`)
+) WITHOUT ROWID;'''
+
+SQL_CONTRIB_INDEX = '''CREATE INDEX IF NOT EXISTS `contrib51_group` ON `contrib51` (`area`, `day`);'''
+
+# The search keywords that found a posting
+SQL_KEYWORD_TABLE = '''CREATE TABLE IF NOT EXISTS `keyword51` (
+          `postingKey` CHAR(16) NOT NULL,
+          `keyword` VARCHAR(255) NOT NULL,
+          PRIMARY KEY (`postingKey`, `keyword`)
+) WITHOUT ROWID;'''
+
+SQL_STATS_TABLE = '''CREATE TABLE IF NOT EXISTS `stats51` (
+          `keyword` VARCHAR(255) NOT NULL,
+          `area` VARCHAR(50) NOT NULL,
+          `day` CHAR(10) NOT NULL,
+          `facet` VARCHAR(20) NOT NULL,
+          `value` VARCHAR(255) NOT NULL,
+          `postings` INTEGER NOT NULL,
+          `salaried` INTEGER NOT NULL,
+          `salarySum` REAL NOT NULL,
+          `salaryMin` REAL NULL,
+          `salaryMax` REAL NULL,
+          PRIMARY KEY (`keyword`, `area`, `day`, `facet`, `value`)
+) WITHOUT ROWID;'''
+
+SQL_HISTOGRAM_TABLE = '''CREATE TABLE IF NOT EXISTS `salaryhist51` (
+          `keyword` VARCHAR(255) NOT NULL,
+          `area` VARCHAR(50) NOT NULL,
+          `day` CHAR(10) NOT NULL,
+          `facet` VARCHAR(20) NOT NULL,
+          `value` VARCHAR(255) NOT NULL,
+          `bucket` INTEGER NOT NULL,
+          `postings` INTEGER NOT NULL,
+          PRIMARY KEY (`keyword`, `area`, `day`, `facet`, `value`, `bucket`)
+) WITHOUT ROWID;'''
+
+SQL_UPSERT_STATS = '''INSERT INTO `stats51` VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                      ON CONFLICT (`keyword`, `area`, `day`, `facet`, `value`) DO UPDATE SET
+                      `postings` = `postings` + excluded.`postings`, `salaried` = `salaried` + excluded.`salaried`,
+                      `salarySum` = `salarySum` + excluded.`salarySum`,
+                      `salaryMin` = MIN(COALESCE(`salaryMin`, excluded.`salaryMin`),
+                                        COALESCE(excluded.`salaryMin`, `salaryMin`)),
+                      `salaryMax` = MAX(COALESCE(`salaryMax`, excluded.`salaryMax`),
+                                        COALESCE(excluded.`salaryMax`, `salaryMax`));'''
+
+SQL_UPSERT_HISTOGRAM = '''INSERT INTO `salaryhist51` VALUES(?, ?, ?, ?, ?, ?, ?)
+                          ON CONFLICT (`keyword`, `area`, `day`, `facet`, `value`, `bucket`) DO UPDATE SET
+                          `postings` = `postings` + excluded.`postings`;'''
+
+SQL_INSERT_CONTRIB = '''INSERT OR REPLACE INTO `contrib51` VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?);'''
+
+SQL_INSERT_KEYWORD = '''INSERT OR IGNORE INTO `keyword51` VALUES(?, ?);'''
+
+SQL_JOIN_KEYWORD = '''JOIN `keyword51` k ON k.`postingKey` = c.`postingKey`'''
+
+# Postings of a group, for a min and max that lost their posting
+SQL_GROUP = '''FROM `contrib51` c {join} WHERE c.`area` = ? AND c.`day` = ? AND ({facet}) = ?'''
+
+# Full recount from contrib51 and keyword51, the total of a group and of every facet value
+SQL_RECOUNT = '''SELECT {keyword}, c.`area`, c.`day`, {facet}, {value}, COUNT(*), COUNT(c.`salary`),
+                 TOTAL(c.`salary`), MIN(c.`salaryMin`), MAX(c.`salaryMax`) FROM `contrib51` c {join}
+                 GROUP BY 1, 2, 3, 5;'''
+
+SQL_RECOUNT_HISTOGRAM = '''SELECT {keyword}, c.`area`, c.`day`, {facet}, {value}, c.`bucket`, COUNT(*)
+                           FROM `contrib51` c {join} WHERE c.`bucket` IS NOT NULL GROUP BY 1, 2, 3, 5, 6;'''
+
+SQL_SELECT_POSTINGS = ('''SELECT p.`postingKey`, ''' + ', '.join(f'j.`{column}`' for column in COLUMNS) +
+                       ''' FROM `posting51` p JOIN `job51` j ON j.rowid = p.`jobRowid` ORDER BY p.`postingKey`;''')
+
+INDEX = {column: COLUMNS.index(column) for column in COLUMNS}
+
+# Rows read and written at a time by a recount
+BATCH_SIZE = 10000
+
+
+def bucket_of(salary: float):
+    """ Get the histogram bucket of a salary, None for no salary
+
+    :Args:
+     - salary: Monthly salary in yuan
+    """
+    if salary is None or salary <= 0:
+        return None
+    return round(math.log(salary, GAMMA))
+
+
+def bucket_value(bucket: int):
+    """ Get the salary a histogram bucket stands for
+
+    :Args:
+     - bucket: Histogram bucket
+    """
+    return GAMMA ** bucket
+
+
+def quantiles(histogram: list, ranks: list):
+    """ Estimate salary quantiles from a histogram
+
+    Finally, return the salaries of the ranks, None for an empty histogram
+
+    :Args:
+     - histogram: (bucket, postings) sorted by bucket
+     - ranks: Quantiles between 0 and 1, such as 0.5 for the median
+    """
+    total = sum(count for _, count in histogram)
+    values = []
+    for rank in ranks:
+        if not total:
+            values.append(None)
+            continue
+        target, seen = rank * (total - 1), 0
+        for bucket, count in histogram:
+            seen += count
+            if seen > target:
+                values.append(bucket_value(bucket))
+                break
+    return values
+
+
+def contribution(record: tuple):
+    """ Get what a job51 row counts in the statistics, as a contrib51 row without the posting key
+
+    :Args:
+     - record: Row tuple in COLUMNS order
+    """
+    low, high = record[INDEX['salaryMin']], record[INDEX['salaryMax']]
+    if record[INDEX['salaryPeriod']] != 'month':
+        low = high = None
+    low = None if low is None or low != low else float(low)
+    high = None if high is None or high != high else float(high)
+    if low is not None and high is not None:
+        salary = (low + high) / 2
+    else:
+        salary = low if low is not None else high
+    return (record[INDEX['area']] or '', str(record[INDEX['issueDate']] or '')[:10],
+            record[INDEX['degree']] or '', record[INDEX['companySize']] or '', salary, bucket_of(salary), low, high)
+
+
+class AggregateStore(object):
+    """ Posting counts and salary statistics per (keyword, area, issue day), kept up to date by every batch
+
+    Every group has a total and a breakdown by degree and by company size, with the number of postings,
+    the sum, min and max of the monthly salaries and a histogram of them for the quantiles, see
+    spider.query.JobQuery.stats. A dashboard reads these rows rather than scanning job51.
+
+    The statistics follow the dedup of the posting tracking. A posting counts once per keyword that found it,
+    and once in the ALL keyword, what it counts is kept in contrib51. Seeing it again changes nothing, a
+    changed posting moves its contribution from its old group to its new one, a new keyword adds it to the
+    groups of that keyword. The counts and sums are updated by deltas, a min or max is looked up again
+    from contrib51 only when a posting leaves its group.
+    """
+
+    def __init__(self, connect: sqlite3.Connection):
+        """ Init the store
+
+        :Args:
+         - connect: Connection of the output DB
+        """
+        self.connect = connect
+
+    def setup(self):
+        """ Create the tables, the statistics of an older output DB are counted from its postings """
+
+        exists = self.connect.execute("SELECT 1 FROM sqlite_master WHERE name = 'contrib51';").fetchone()
+        for sql in [SQL_CONTRIB_TABLE, SQL_CONTRIB_INDEX, SQL_KEYWORD_TABLE, SQL_STATS_TABLE, SQL_HISTOGRAM_TABLE]:
+            self.connect.execute(sql)
+        if not exists:
+            count = self.recount()
+            if count:
+                logger.info('posting statistics backfilled with ' + str(count) + ' postings')
+
+    def apply(self, postings: dict):
+        """ Count a batch of stored postings
+
+        :Args:
+         - postings: Row tuple and set of search keywords by posting key, None is an unknown keyword
+        """
+        old, linked = {}, {}
+        keys = list(postings)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            sql = f'''SELECT * FROM `contrib51` WHERE `postingKey` IN ({', '.join('?' * len(chunk))});'''
+            old.update((row[0], row[1:]) for row in self.connect.execute(sql, chunk))
+
+        # A posting counted before may have links, a new one has none
+        keys = list(old)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            sql = f'''SELECT `postingKey`, `keyword` FROM `keyword51`
+                      WHERE `postingKey` IN ({', '.join('?' * len(chunk))});'''
+            for key, keyword in self.connect.execute(sql, chunk):
+                linked.setdefault(key, set()).add(keyword)
+
+        stats, histogram, left = {}, {}, set()
+        contribs, links = [], []
+        for key, (record, keywords) in postings.items():
+            new = contribution(record)
+            previous = old.get(key)
+            known = linked.get(key, set())
+            fresh = {keyword for keyword in keywords if keyword} - known
+            links.extend((key, keyword) for keyword in fresh)
+
+            if previous is None:
+                self.__count(stats, histogram, [ALL] + list(fresh), new, 1)
+            elif previous != new:
+                self.__count(stats, histogram, [ALL] + list(known), previous, -1)
+                self.__count(stats, histogram, [ALL] + list(known | fresh), new, 1)
+                left.update(self.__groups([ALL] + list(known), previous))
+            else:
+                self.__count(stats, histogram, list(fresh), new, 1)
+
+            if previous != new:
+                contribs.append((key,) + new)
+
+        self.connect.executemany(SQL_INSERT_CONTRIB, contribs)
+        self.connect.executemany(SQL_INSERT_KEYWORD, links)
+        self.connect.executemany(SQL_UPSERT_STATS, [group + tuple(value) for group, value in stats.items()])
+        self.connect.executemany(SQL_UPSERT_HISTOGRAM, [group + (value,) for group, value in histogram.items()])
+        for group in left:
+            self.__settle(group)
+
+    def recount(self):
+        """ Count the statistics again from the stored postings and keyword links
+
+        Finally, return the number of postings
+        """
+        count, rows = 0, []
+        self.connect.execute('DELETE FROM `contrib51`;')
+        for row in self.connect.execute(SQL_SELECT_POSTINGS):
+            rows.append((row[0],) + contribution(row[1:]))
+            if len(rows) >= BATCH_SIZE:
+                count += self.__insert(rows)
+        count += self.__insert(rows)
+
+        self.connect.execute('DELETE FROM `stats51`;')
+        self.connect.execute('DELETE FROM `salaryhist51`;')
+        for keyword, join in [(repr(ALL), ''), ('k.`keyword`', SQL_JOIN_KEYWORD)]:
+            for facet, value in [("''", "''")] + [(repr(facet), f'c.`{facet}`') for facet in FACETS]:
+                fields = {'keyword': keyword, 'join': join, 'facet': facet, 'value': value}
+                self.connect.execute('INSERT INTO `stats51` ' + SQL_RECOUNT.format(**fields))
+                self.connect.execute('INSERT INTO `salaryhist51` ' + SQL_RECOUNT_HISTOGRAM.format(**fields))
+        return count
+
+    def __insert(self, rows: list):
+        """ Insert contrib51 rows, the list is emptied
+
+        Finally, return the number of rows
+
+        :Args:
+         - rows: contrib51 rows
+        """
+        self.connect.executemany(SQL_INSERT_CONTRIB, rows)
+        count = len(rows)
+        rows.clear()
+        return count
+
+    @staticmethod
+    def __groups(keywords: list, contrib: tuple):
+        """ Get the groups a contribution counts in, the total and a facet value of every keyword
+
+        :Args:
+         - keywords: Search keywords
+         - contrib: contrib51 row without the posting key
+        """
+        area, day, degree, companySize = contrib[:4]
+        return [(keyword, area, day, facet, value) for keyword in keywords
+                for facet, value in [('', ''), ('degree', degree), ('companySize', companySize)]]
+
+    def __count(self, stats: dict, histogram: dict, keywords: list, contrib: tuple, sign: int):
+        """ Add or take a contribution to the deltas of its groups
+
+        :Args:
+         - stats: stats51 deltas by group
+         - histogram: salaryhist51 deltas by group and bucket
+         - keywords: Search keywords
+         - contrib: contrib51 row without the posting key
+         - sign: 1 to add, -1 to take
+        """
+        salary, bucket, low, high = contrib[4:]
+        for group in self.__groups(keywords, contrib):
+            delta = stats.setdefault(group, [0, 0, 0.0, None, None])
+            delta[0] += sign
+            if salary is not None:
+                delta[1] += sign
+                delta[2] += sign * salary
+            if sign > 0:
+                delta[3] = low if delta[3] is None or (low is not None and low < delta[3]) else delta[3]
+                delta[4] = high if delta[4] is None or (high is not None and high > delta[4]) else delta[4]
+            if bucket is not None:
+                histogram[group + (bucket,)] = histogram.get(group + (bucket,), 0) + sign
+
+    def __settle(self, group: tuple):
+        """ Look up the min and max of a group that lost a posting, an emptied group is deleted
+
+        :Args:
+         - group: (keyword, area, day, facet, value)
+        """
+        keyword, area, day, facet, value = group
+        where = SQL_GROUP.format(join='' if keyword == ALL else SQL_JOIN_KEYWORD + ' AND k.`keyword` = ?',
+                                 facet=f'c.`{facet}`' if facet else "''")
+        params = ([] if keyword == ALL else [keyword]) + [area, day, value]
+        low, high = self.connect.execute('SELECT MIN(c.`salaryMin`), MAX(c.`salaryMax`) ' + where, params).fetchone()
+        self.connect.execute('''UPDATE `stats51` SET `salaryMin` = ?, `salaryMax` = ? WHERE `keyword` = ?
+                                AND `area` = ? AND `day` = ? AND `facet` = ? AND `value` = ?;''', (low, high) + group)
+        self.connect.execute('''DELETE FROM `stats51` WHERE `keyword` = ? AND `area` = ? AND `day` = ? AND `facet` = ?
+                                AND `value` = ? AND `postings` <= 0;''', group)
+        self.connect.execute('''DELETE FROM `salaryhist51` WHERE `keyword` = ? AND `area` = ? AND `day` = ?
+                                AND `facet` = ? AND `value` = ? AND `postings` <= 0;''', group)
@@ -0,0 +1,65 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 18:10
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : area list writers
+
+import sqlite3
+from typing import TYPE_CHECKING
+from spider import logger
+from spider.sink.base import Sink, register_sink
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@register_sink('area', 'csv')
+class AreaCsvSink(Sink):
+    """ Area list csv writer, the file is replaced by every write """
+
+    FILE = '51area.csv'
+
+    def write_table(self, table: 'pd.DataFrame'):
+        """ Save area table to csv
+
+        :Arg:
+         - table: Area table with code and area columns
+        """
+        table.to_csv(self.output, index=False, header=['code', 'area'], encoding='utf-8')
+
+
+@register_sink('area', 'db')
+class AreaSQLiteSink(Sink):
+    """ Area list sqlite writer, the table is replaced by every write """
+
+    FILE = '51area.db'
+
+    def write_table(self, table: 'pd.DataFrame'):
+        """ Save area table to sqlite
+
+        :Arg:
+         - table: Area table with code and area columns
+        """
+        connect = sqlite3.connect(self.output)
+        cursor = connect.cursor()
+        sqlClean = '''DROP TABLE IF EXISTS `area51`;'''
+
+        sqlTable = ('''CREATE TABLE IF NOT EXISTS `area51` (
+                  `code` VARCHAR(10) NOT NULL,
+                  `area` VARCHAR(10) NOT NULL,
+                  PRIMARY KEY (`code`)
+        );''')
+
+        sql = '''INSERT INTO `area51` VALUES(?, ?);'''
+
+        try:
+            cursor.execute(sqlClean)
+            cursor.execute(sqlTable)
+            cursor.executemany(sql, list(table.itertuples(index=False, name=None)))
+            connect.commit()
+        except Exception as e:
+            logger.warning("SQL execution failure of SQLite: " + str(e))
+        finally:
+            cursor.close()
+            connect.close()
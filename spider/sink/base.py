@@ -0,0 +1,188 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 17:30
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : sink plugin interface
+
+import os
+import atexit
+import importlib
+import threading
+from typing import TYPE_CHECKING
+from spider import logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SINKS = {}
+ALIASES = {'both': ['csv', 'db']}
+
+# Modules of the built-in sinks, a module is imported by the first use of its engine, so pandas, pyarrow
+# and the other writers are not loaded by a process that does not write them
+MODULES = {
+    ('job', 'csv'): 'spider.sink.csvsink',
+    ('job', 'db'): 'spider.sink.sqlitesink',
+    ('job', 'parquet'): 'spider.sink.parquetsink',
+    ('job', 'dictdb'): 'spider.sink.dictsink',
+    ('area', 'csv'): 'spider.sink.areasink',
+    ('area', 'db'): 'spider.sink.areasink',
+}
+
+
+class Sink(object):
+    """ Output engine of normalized tables
+
+    A sink is registered by name for a dataset and opened once per output file. Tables are written by
+    write_table, commit is called at every page boundary and close at the end of the run.
+    """
+
+    FILE = None
+
+    def __init__(self, output: str):
+        """ Init the output path
+
+        :Args:
+         - output: Data output path
+        """
+        self.output = output
+
+    def write_table(self, table: 'pd.DataFrame'):
+        """ Buffer or write a normalized table
+
+        :Args:
+         - table: Normalized table
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """ Write the buffered rows """
+
+    def commit(self):
+        """ Page boundary, the buffered rows are written by default """
+
+        self.flush()
+
+    def close(self):
+        """ Write the buffered rows and release the output """
+
+        self.flush()
+
+
+def register_sink(dataset: str, name: str):
+    """ Class decorator that registers a sink as a storage engine of a dataset
+
+    :Args:
+     - dataset: Dataset name, such as job or area
+     - name: Storage engine name
+    """
+    def register(cls):
+        SINKS[(dataset, name)] = cls
+        return cls
+
+    return register
+
+
+def sink_class(dataset: str, name: str):
+    """ Get the sink class of a storage engine, importing its module on first use
+
+    :Args:
+     - dataset: Dataset name
+     - name: Storage engine name
+    """
+    if (dataset, name) not in SINKS and (dataset, name) in MODULES:
+        importlib.import_module(MODULES[(dataset, name)])
+    return SINKS[(dataset, name)]
+
+
+def sink_modules(dataset: str, engine: str):
+    """ Get the modules of the built-in sinks of an engine, such as to preload them
+
+    :Args:
+     - dataset: Dataset name
+     - engine: Storage engine name or alias
+    """
+    return [MODULES[(dataset, name)] for name in ALIASES.get(engine, [engine]) if (dataset, name) in MODULES]
+
+
+def engines(dataset: str):
+    """ Get the storage engine names of a dataset, including the aliases
+
+    :Args:
+     - dataset: Dataset name
+    """
+    known = set(SINKS) | set(MODULES)
+    names = [name for key, name in dict.fromkeys(list(MODULES) + list(SINKS)) if key == dataset]
+    aliases = [alias for alias, members in ALIASES.items() if all((dataset, name) in known for name in members)]
+    return names + aliases
+
+
+def check_engine(dataset: str, engine: str):
+    """ Check the storage engine, return the error message if it is not supported
+
+    :Args:
+     - dataset: Dataset name
+     - engine: Storage engine name
+    """
+    names = engines(dataset)
+    if engine in names:
+        return None
+    return 'The data storage engine must be ' + ', '.join(f"'{name}'" for name in names)
+
+
+_opened = {}
+_lock = threading.Lock()
+
+# Sinks of the parent of a forked worker, see _reset_in_child
+_inherited = []
+
+
+def open_sinks(dataset: str, engine: str, directory: str):
+    """ Get the process wide sinks of an engine, they are closed on exit
+
+    The output directory is created when a sink is first opened in it.
+
+    :Args:
+     - dataset: Dataset name
+     - engine: Storage engine name or alias
+     - directory: Output directory
+    """
+    sinks = []
+    with _lock:
+        for name in ALIASES.get(engine, [engine]):
+            cls = sink_class(dataset, name)
+            output = os.path.join(directory, cls.FILE)
+            if (cls, output) not in _opened:
+                os.makedirs(directory, exist_ok=True)
+                _opened[(cls, output)] = cls(output)
+            sinks.append(_opened[(cls, output)])
+    return sinks
+
+
+def close_sinks():
+    """ Close the process wide sinks, for processes that do not run the exit handlers """
+
+    with _lock:
+        for sink in _opened.values():
+            try:
+                sink.close()
+            except Exception as e:
+                # The other sinks are still closed, the rows of this one are lost and reported
+                logger.error('failed to close ' + sink.output + ': ' + str(e))
+        _opened.clear()
+
+
+def _reset_in_child():
+    """ A forked worker opens its own sinks, a sqlite connection or file handle must not cross a fork
+
+    The sinks of the parent are kept referenced and never used, so the child does not close their connections
+    nor write their buffers, which are the parent's to write.
+    """
+    global _opened, _lock
+    _inherited.extend(_opened.values())
+    _opened = {}
+    _lock = threading.Lock()
+
+
+atexit.register(close_sinks)
+os.register_at_fork(after_in_child=_reset_in_child)
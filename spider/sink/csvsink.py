@@ -0,0 +1,154 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 12:40
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : append-only csv writer of job items
+
+import os
+import threading
+import pandas as pd
+from spider import logger
+from spider.sink.base import Sink, register_sink
+from spider.normalizer import COLUMNS, IDENTITY, CONTENT, posting_keys, fingerprints
+
+
+@register_sink('job', 'csv')
+class CsvSink(Sink):
+    """ Streaming csv writer
+
+    The header is written once and rows are only ever appended. The posting key and content fingerprint of
+    every written row are kept in a sidecar index file, see spider.normalizer, so a posting is only appended
+    when it is new or its content changed, without re-reading the csv. The csv is a change log, the last
+    row of a posting is its current version.
+    """
+
+    FILE = '51job.csv'
+
+    def __init__(self, output: str, batch_size: int = 1000):
+        """ Load or rebuild the dedup index
+
+        :Args:
+         - output: Data output path
+         - batch_size: Number of buffered rows that triggers a flush
+        """
+        super().__init__(output)
+        self.index_path = output + '.idx'
+        self.batch_size = batch_size
+        self.columns, self.header = self.__read_header()
+        self.__buffer = []
+        self.__buffered = 0
+        self.__lock = threading.RLock()
+        self.__fingerprints = {}
+
+        if os.path.exists(self.output) and not os.path.exists(self.index_path):
+            self.rebuild_index()
+        else:
+            self.__load_index()
+
+    def write_table(self, table: pd.DataFrame):
+        """ Buffer a normalized table, flush when the buffer is full
+
+        :Args:
+         - table: Normalized table
+        """
+        with self.__lock:
+            self.__buffer.append(table)
+            self.__buffered += len(table)
+            if self.__buffered >= self.batch_size:
+                self.flush()
+
+    def write_many(self, details: list):
+        """ Buffer a list of row dictionaries, flush when the buffer is full
+
+        :Args:
+         - details: List of row dictionaries
+        """
+        self.write_table(pd.DataFrame(details, columns=COLUMNS))
+
+    def flush(self):
+        """ Append the buffered rows of the postings that are new or changed
+
+        Finally, return the number of appended and skipped unchanged rows
+        """
+        with self.__lock:
+            batch, self.__buffer, self.__buffered = self.__buffer, [], 0
+            if not batch:
+                return 0, 0
+
+            table = pd.concat(batch, ignore_index=True)
+            keys, prints = posting_keys(table), fingerprints(table)
+            # The last copy of a posting in the batch wins, a dict lookup per key is cheaper than Series.map
+            changed = pd.Series([self.__fingerprints.get(key) != fingerprint for key, fingerprint in zip(keys, prints)],
+                                index=keys.index)
+            fresh = changed & ~keys.duplicated(keep='last')
+            rows, keys, prints = table[fresh], keys[fresh], prints[fresh]
+
+            if len(rows):
+                write_header = not os.path.exists(self.output) or os.path.getsize(self.output) == 0
+                rows.to_csv(self.output, columns=self.columns, index=False, header=write_header, mode='a',
+                            encoding='utf-8')
+
+                # The index is appended after the rows, a crash in between only leaves rows unindexed
+                with open(self.index_path, 'a', encoding='utf-8') as file:
+                    file.write(''.join(f'{key} {fingerprint}\n' for key, fingerprint in zip(keys, prints)))
+                self.__fingerprints.update(zip(keys, prints))
+
+            skipped = len(table) - len(rows)
+            logger.info('csv batch: %s appended, %s unchanged skipped', len(rows), skipped,
+                        sink='csv', inserted=len(rows), skipped=skipped)
+            return len(rows), skipped
+
+    def rebuild_index(self):
+        """ Rebuild the sidecar index from the existing csv """
+
+        with self.__lock:
+            self.__fingerprints = {}
+            if os.path.exists(self.output) and set(IDENTITY + CONTENT).issubset(self.columns):
+                names = {} if self.header else {'header': None, 'names': self.columns}
+                chunks = pd.read_csv(self.output, usecols=IDENTITY + CONTENT, dtype=str, keep_default_na=False,
+                                     chunksize=100000, **names)
+                for chunk in chunks:
+                    self.__fingerprints.update(zip(posting_keys(chunk), fingerprints(chunk)))
+
+            with open(self.index_path, 'w', encoding='utf-8') as file:
+                for key, fingerprint in self.__fingerprints.items():
+                    file.write(f'{key} {fingerprint}\n')
+
+            logger.info('csv index rebuilt with ' + str(len(self.__fingerprints)) + ' postings')
+
+    def __read_header(self):
+        """ Get the columns of an existing csv and whether it has a header row
+
+        New columns are not added to an older file. A csv of the first release, or of a run that was interrupted
+        before the header was added, has no header row. Its rows hold the leading columns of COLUMNS, and the rows
+        appended to it are written without a header too.
+        """
+        if not os.path.exists(self.output) or os.path.getsize(self.output) == 0:
+            return COLUMNS, True
+
+        first = pd.read_csv(self.output, header=None, nrows=1, dtype=str, keep_default_na=False).iloc[0].tolist()
+        header = [column for column in first if column in COLUMNS]
+        if header:
+            return header, True
+        return COLUMNS[:len(first)], False
+
+    def __load_index(self):
+        """ Load the sidecar index into memory, an index of primary key hashes of an older release is rebuilt """
+
+        if not os.path.exists(self.index_path):
+            return
+
+        stale = False
+        with open(self.index_path, encoding='utf-8') as file:
+            for line in file:
+                parts = line.split()
+                if len(parts) == 2:
+                    self.__fingerprints[parts[0]] = parts[1]
+                elif parts:
+                    stale = True
+                    break
+
+        # The index is rewritten by the rebuild, so it is closed first
+        if stale:
+            self.rebuild_index()
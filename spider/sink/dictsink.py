@@ -0,0 +1,277 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 03:30
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : dictionary-encoded sqlite layout of job items
+
+import sqlite3
+from spider.sink.base import register_sink
+from spider.sink.sqlitesink import SQLiteSink
+from spider.schema import COLUMNS
+
+# Repeated text columns stored once in term51, the fact table holds their termId in a <column>Id column.
+# The tag list is a term as well, so a row is read without assembling its tags from jobtag51
+TERMS = ['tags', 'salary', 'workYear', 'degree', 'companyType', 'companySize', 'logo', 'salaryPeriod']
+
+SQL_DIMENSIONS = [
+    '''CREATE TABLE IF NOT EXISTS `area51` (
+          `areaId` INTEGER PRIMARY KEY,
+          `area` VARCHAR(50) NOT NULL UNIQUE
+    );''',
+    '''CREATE TABLE IF NOT EXISTS `company51` (
+          `companyId` INTEGER PRIMARY KEY,
+          `companyName` VARCHAR(255) NOT NULL UNIQUE
+    );''',
+    '''CREATE TABLE IF NOT EXISTS `tag51` (
+          `tagId` INTEGER PRIMARY KEY,
+          `tag` VARCHAR(255) NOT NULL UNIQUE
+    );''',
+    '''CREATE TABLE IF NOT EXISTS `term51` (
+          `termId` INTEGER PRIMARY KEY,
+          `value` VARCHAR(255) NOT NULL UNIQUE
+    );''',
+]
+
+# The unique constraint stands in for the primary key of the flat job51
+SQL_FACT_TABLE = ('''CREATE TABLE IF NOT EXISTS `jobfact51` (
+          `jobId` INTEGER PRIMARY KEY,
+          `jobName` VARCHAR(255) NOT NULL,
+          `areaId` INTEGER NULL,
+          `companyId` INTEGER NULL,
+          `issueDate` VARCHAR(50) NULL,
+          `salaryMin` REAL NULL,
+          `salaryMax` REAL NULL,
+''' + ''.join(f'          `{column}Id` INTEGER NULL,\n' for column in TERMS) +
+                  '''          UNIQUE (`jobName`, `areaId`, `companyId`, `issueDate`)
+);''')
+
+# The tags of a job one by one, in their order
+SQL_JOBTAG_TABLE = '''CREATE TABLE IF NOT EXISTS `jobtag51` (
+          `jobId` INTEGER NOT NULL,
+          `position` INTEGER NOT NULL,
+          `tagId` INTEGER NOT NULL,
+          PRIMARY KEY (`jobId`, `position`)
+) WITHOUT ROWID;'''
+
+SQL_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS `jobfact51_area` ON `jobfact51` (`areaId`);',
+    'CREATE INDEX IF NOT EXISTS `jobfact51_company` ON `jobfact51` (`companyId`);',
+    'CREATE INDEX IF NOT EXISTS `jobfact51_issueDate` ON `jobfact51` (`issueDate`);',
+    'CREATE INDEX IF NOT EXISTS `jobfact51_salary` ON `jobfact51` (`salaryMin`, `salaryMax`);',
+    'CREATE INDEX IF NOT EXISTS `jobtag51_tag` ON `jobtag51` (`tagId`);',
+]
+
+# Compatibility view of the flat job51 for the readers, such as spider.query. A view has no rowid of its own,
+# the jobId is served as a column named rowid, so SELECT * returns it as the first column.
+# The values are looked up by scalar subqueries rather than joins, a subquery of a column that is not read
+# is not run, while sqlite keeps every left join of a view.
+VALUES = {
+    'jobName': 'f.`jobName`',
+    'area': '(SELECT `area` FROM `area51` WHERE `areaId` = f.`areaId`)',
+    'companyName': '(SELECT `companyName` FROM `company51` WHERE `companyId` = f.`companyId`)',
+    'issueDate': 'f.`issueDate`',
+    'salaryMin': 'f.`salaryMin`',
+    'salaryMax': 'f.`salaryMax`',
+}
+VALUES.update({column: f'(SELECT `value` FROM `term51` WHERE `termId` = f.`{column}Id`)' for column in TERMS})
+
+SQL_VIEW = ('''CREATE VIEW IF NOT EXISTS `job51` AS SELECT f.`jobId` AS rowid, ''' +
+            ', '.join(f'{VALUES[column]} AS `{column}`' for column in COLUMNS) + ''' FROM `jobfact51` f;''')
+
+# Full-text index over the view, the store adds and deletes its entries since the values live in the dictionaries
+SQL_FTS = '''CREATE VIRTUAL TABLE IF NOT EXISTS `job51_fts` USING fts5(
+          `jobName`, `tags`, content='job51', content_rowid='rowid', tokenize='trigram'
+);'''
+
+FACT_COLUMNS = ['jobName', 'areaId', 'companyId', 'issueDate', 'salaryMin', 'salaryMax'] + [c + 'Id' for c in TERMS]
+
+SQL_INSERT_FACT = ('''INSERT OR IGNORE INTO `jobfact51` (''' + ', '.join(f'`{column}`' for column in FACT_COLUMNS) +
+                   ''') VALUES(''' + ', '.join('?' * len(FACT_COLUMNS)) + ''');''')
+
+SQL_UPDATE_FACT = ('''UPDATE `jobfact51` SET ''' + ', '.join(f'`{column}` = ?' for column in FACT_COLUMNS) +
+                   ''' WHERE `jobId` = ?;''')
+
+SQL_SELECT_FACT_KEY = '''SELECT `jobId` FROM `jobfact51` WHERE `jobName` IS ? AND `areaId` IS ? AND `companyId` IS ?
+                         AND `issueDate` IS ? AND `jobId` IS NOT ?;'''
+
+SQL_INSERT_TAGS = '''INSERT INTO `jobtag51` VALUES(?, ?, ?);'''
+
+SQL_FTS_INSERT = '''INSERT INTO `job51_fts` (rowid, `jobName`, `tags`) VALUES(?, ?, ?);'''
+
+SQL_FTS_DELETE = '''INSERT INTO `job51_fts` (`job51_fts`, rowid, `jobName`, `tags`) VALUES('delete', ?, ?, ?);'''
+
+INDEX = {column: COLUMNS.index(column) for column in COLUMNS}
+TERM_INDEX = [COLUMNS.index(column) for column in TERMS]
+
+# Max number of cached ids per dictionary, the cache is emptied when it is full
+CACHE_SIZE = 200000
+
+
+class Dictionary(object):
+    """ Surrogate keys of the distinct values of a dimension table, looked up through an in-process cache
+
+    A value is inserted by its first lookup. The ids are never changed or deleted, so a cached id stays
+    valid across processes writing the same DB, only a rolled back transaction invalidates the cache.
+    """
+
+    def __init__(self, connect: sqlite3.Connection, table: str, key: str, column: str):
+        """ Init the dictionary
+
+        :Args:
+         - connect: Connection of the output DB
+         - table: Dimension table
+         - key: Integer primary key column
+         - column: Unique value column
+        """
+        self.connect = connect
+        self.__cache = {}
+        self.__insert = f'''INSERT OR IGNORE INTO `{table}` (`{column}`) VALUES(?);'''
+        self.__select = f'''SELECT `{key}` FROM `{table}` WHERE `{column}` = ?;'''
+
+    def id(self, value):
+        """ Get the id of a value, None for None
+
+        :Args:
+         - value: Dimension value
+        """
+        if value is None:
+            return None
+        found = self.__cache.get(value)
+        if found is not None:
+            return found
+
+        cursor = self.connect.execute(self.__insert, (value,))
+        found = cursor.lastrowid if cursor.rowcount else self.connect.execute(self.__select, (value,)).fetchone()[0]
+        if len(self.__cache) >= CACHE_SIZE:
+            self.__cache.clear()
+        self.__cache[value] = found
+        return found
+
+    def clear(self):
+        """ Empty the cache """
+
+        self.__cache.clear()
+
+
+class DictionaryStore(object):
+    """ Row storage of job51 as a fact table of surrogate keys into dimension tables
+
+    Areas, companies, tags and the repeated text columns are stored once, a job row keeps their integer ids
+    and its tags are linked through jobtag51. Readers see the flat shape through the job51 view.
+    """
+
+    def __init__(self, connect: sqlite3.Connection):
+        """ Init the store and the dictionaries
+
+        :Args:
+         - connect: Connection of the output DB
+        """
+        self.connect = connect
+        self.areas = Dictionary(connect, 'area51', 'areaId', 'area')
+        self.companies = Dictionary(connect, 'company51', 'companyId', 'companyName')
+        self.tags = Dictionary(connect, 'tag51', 'tagId', 'tag')
+        self.terms = Dictionary(connect, 'term51', 'termId', 'value')
+
+    def setup(self):
+        """ Create the tables, the view and the indexes """
+
+        kind = self.connect.execute("SELECT type FROM sqlite_master WHERE name = 'job51';").fetchone()
+        if kind is not None and kind[0] != 'view':
+            raise sqlite3.OperationalError('job51 of ' + str(self.connect) + ' is a flat table, the dictionary '
+                                           'layout needs a new output DB')
+
+        for sql in SQL_DIMENSIONS + [SQL_FACT_TABLE, SQL_JOBTAG_TABLE] + SQL_INDEXES + [SQL_VIEW, SQL_FTS]:
+            self.connect.execute(sql)
+
+    def insert(self, record: tuple):
+        """ Insert a job row with its tags, or find the row of the same primary key
+
+        Finally, return the rowid
+
+        :Args:
+         - record: Row tuple in COLUMNS order
+        """
+        fact = self.__fact(record)
+        cursor = self.connect.execute(SQL_INSERT_FACT, fact)
+        if not cursor.rowcount:
+            return self.connect.execute(SQL_SELECT_FACT_KEY, fact[:4] + (None,)).fetchone()[0]
+
+        rowid = cursor.lastrowid
+        self.__link(rowid, record)
+        return rowid
+
+    def update(self, rowid: int, record: tuple):
+        """ Replace the values and the tags of a row
+
+        Finally, return False if the row does not exist
+
+        :Args:
+         - rowid: Rowid of the row
+         - record: Row tuple in COLUMNS order
+        """
+        old = self.connect.execute('''SELECT `jobName`, `tags` FROM `job51` WHERE rowid = ?;''', (rowid,)).fetchone()
+        if old is None:
+            return False
+
+        self.connect.execute(SQL_UPDATE_FACT, self.__fact(record) + (rowid,))
+        self.connect.execute(SQL_FTS_DELETE, (rowid,) + old)
+        self.connect.execute('''DELETE FROM `jobtag51` WHERE `jobId` = ?;''', (rowid,))
+        self.__link(rowid, record)
+        return True
+
+    def delete_collision(self, record: tuple, rowid: int):
+        """ Delete the other row that holds the primary key of a record
+
+        :Args:
+         - record: Row tuple in COLUMNS order
+         - rowid: Rowid of the row that takes the primary key
+        """
+        fact = self.__fact(record)
+        for (other,) in self.connect.execute(SQL_SELECT_FACT_KEY, fact[:4] + (rowid,)).fetchall():
+            old = self.connect.execute('''SELECT `jobName`, `tags` FROM `job51` WHERE rowid = ?;''',
+                                       (other,)).fetchone()
+            self.connect.execute(SQL_FTS_DELETE, (other,) + old)
+            self.connect.execute('''DELETE FROM `jobtag51` WHERE `jobId` = ?;''', (other,))
+            self.connect.execute('''DELETE FROM `jobfact51` WHERE `jobId` = ?;''', (other,))
+
+    def reset(self):
+        """ Empty the id caches, the ids inserted by a rolled back transaction are gone """
+
+        for dictionary in [self.areas, self.companies, self.tags, self.terms]:
+            dictionary.clear()
+
+    def __fact(self, record: tuple):
+        """ Encode a record as a fact row
+
+        :Args:
+         - record: Row tuple in COLUMNS order
+        """
+        return ((record[INDEX['jobName']], self.areas.id(record[INDEX['area']]),
+                 self.companies.id(record[INDEX['companyName']]), record[INDEX['issueDate']],
+                 record[INDEX['salaryMin']], record[INDEX['salaryMax']]) +
+                tuple(self.terms.id(record[index]) for index in TERM_INDEX))
+
+    def __link(self, rowid: int, record: tuple):
+        """ Store the tags of a row and add the row to the full-text index
+
+        :Args:
+         - rowid: Rowid of the row
+         - record: Row tuple in COLUMNS order
+        """
+        tags = record[INDEX['tags']] or ''
+        if tags:
+            self.connect.executemany(SQL_INSERT_TAGS, [(rowid, position, self.tags.id(tag))
+                                                       for position, tag in enumerate(tags.split(','))])
+        self.connect.execute(SQL_FTS_INSERT, (rowid, record[INDEX['jobName']], tags))
+
+
+@register_sink('job', 'dictdb')
+class DictionarySQLiteSink(SQLiteSink):
+    """ sqlite writer of the dictionary-encoded layout, see DictionaryStore
+
+    It writes its own output DB, the readers of job51 work on both layouts.
+    """
+
+    FILE = '51job-dict.db'
+    STORE = DictionaryStore
@@ -0,0 +1,124 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 17:50
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : partitioned parquet writer of job items
+
+import os
+import re
+import uuid
+import time
+import threading
+import pandas as pd
+from spider import logger
+from spider.normalizer import COLUMNS
+from spider.sink.base import Sink, register_sink
+
+PARTITIONS = ['area', 'issueDay']
+
+
+@register_sink('job', 'parquet')
+class ParquetSink(Sink):
+    """ Parquet dataset writer partitioned by area and issue date
+
+    Rows are buffered and written as one zstd compressed file per partition once the buffer reaches a
+    row group, such as 51job.parquet/area=浙江省宁波/issueDay=2023-12-12/part-*.parquet. Every file is
+    written under a temporary name and renamed into place, so readers never see a partial file.
+    Readers can skip partitions by the directory names and read the typed columns selectively.
+
+    It requires pyarrow.
+    """
+
+    FILE = '51job.parquet'
+
+    def __init__(self, output: str, row_group_size: int = 50000, compression: str = 'zstd'):
+        """ Init the dataset directory
+
+        :Args:
+         - output: Dataset directory
+         - row_group_size: Number of buffered rows that triggers a write at a page boundary
+         - compression: Parquet compression codec
+        """
+        super().__init__(output)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("The 'parquet' data storage engine requires pyarrow, run pip install pyarrow")
+
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.schema = pyarrow.schema(
+            [(column, pyarrow.float64() if column in ['salaryMin', 'salaryMax'] else pyarrow.string())
+             for column in COLUMNS if column != 'area'])
+        self.__buffer = []
+        self.__buffered = 0
+        self.__lock = threading.RLock()
+
+    def write_table(self, table: pd.DataFrame):
+        """ Buffer a normalized table
+
+        :Args:
+         - table: Normalized table
+        """
+        with self.__lock:
+            self.__buffer.append(table)
+            self.__buffered += len(table)
+
+    def commit(self):
+        """ Write the buffer once it reaches a row group, small files hurt the readers """
+
+        with self.__lock:
+            if self.__buffered >= self.row_group_size:
+                self.flush()
+
+    def flush(self):
+        """ Write one file per partition of the buffered rows
+
+        Finally, return the number of written rows and files
+        """
+        with self.__lock:
+            batch, self.__buffer, self.__buffered = self.__buffer, [], 0
+            if not batch:
+                return 0, 0
+
+            table = pd.concat(batch, ignore_index=True)
+            table['issueDay'] = table['issueDate'].astype(str).str[:10]
+
+            files = 0
+            for (area, day), part in table.groupby(PARTITIONS, sort=False, dropna=False):
+                directory = os.path.join(self.output, 'area=' + self.__escape(area), 'issueDay=' + self.__escape(day))
+                self.__write(part.drop(columns=PARTITIONS), directory)
+                files += 1
+
+            logger.info('parquet batch: %s rows in %s files', len(table), files, sink='parquet', inserted=len(table),
+                        files=files)
+            return len(table), files
+
+    def __write(self, part: pd.DataFrame, directory: str):
+        """ Write a partition file atomically
+
+        :Args:
+         - part: Rows of one partition
+         - directory: Partition directory
+        """
+        os.makedirs(directory, exist_ok=True)
+        name = f'part-{int(time.time())}-{uuid.uuid4().hex[:12]}.parquet'
+        temp = os.path.join(directory, '.' + name + '.tmp')
+
+        table = self.pa.Table.from_pandas(part, schema=self.schema, preserve_index=False)
+        self.pq.write_table(table, temp, compression=self.compression, row_group_size=self.row_group_size)
+        os.replace(temp, os.path.join(directory, name))
+
+    @staticmethod
+    def __escape(value):
+        """ Make a partition value safe for a directory name
+
+        :Args:
+         - value: Partition value
+        """
+        value = '' if value is None or value != value else str(value)
+        return re.sub(r'[\\/:*?"<>|=%]', '_', value) or '__empty__'
@@ -0,0 +1,442 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 11:40
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : batched sqlite writer of job items
+
+import json
+import time
+import sqlite3
+import threading
+import pandas as pd
+from spider import logger
+from spider.sink.base import Sink, register_sink
+from spider.sink.aggregate import AggregateStore
+from spider.normalizer import COLUMNS, PRIMARY_KEY, IDENTITY, CONTENT, digest, to_records
+
+SQL_TABLE = '''CREATE TABLE IF NOT EXISTS `job51` (
+          `jobName` VARCHAR(255) NOT NULL,
+          `tags` VARCHAR(255) NULL,
+          `area` VARCHAR(50) NULL,
+          `salary` VARCHAR(255) NULL,
+          `workYear` VARCHAR(10) NULL,
+          `degree` VARCHAR(10) NULL,
+          `companyName` VARCHAR(255) NULL,
+          `companyType` VARCHAR(255) NULL,
+          `companySize` VARCHAR(10) NULL,
+          `logo` VARCHAR(255) NULL,
+          `issueDate` VARCHAR(50) NULL,
+          `salaryMin` REAL NULL,
+          `salaryMax` REAL NULL,
+          `salaryPeriod` VARCHAR(10) NULL,
+          PRIMARY KEY (`jobName`,`area`,`companyName`,`issueDate`)
+);'''
+
+# Columns added after the first release, they are appended to the tables of older output DBs
+SQL_MIGRATIONS = {
+    'salaryMin': 'ALTER TABLE `job51` ADD COLUMN `salaryMin` REAL NULL;',
+    'salaryMax': 'ALTER TABLE `job51` ADD COLUMN `salaryMax` REAL NULL;',
+    'salaryPeriod': 'ALTER TABLE `job51` ADD COLUMN `salaryPeriod` VARCHAR(10) NULL;',
+}
+
+# Secondary indexes of the filters of the query API, a secondary index ends with the rowid so the
+# filtered rows are read in rowid order without a sort
+SQL_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS `job51_area` ON `job51` (`area`);',
+    'CREATE INDEX IF NOT EXISTS `job51_companyName` ON `job51` (`companyName`);',
+    'CREATE INDEX IF NOT EXISTS `job51_issueDate` ON `job51` (`issueDate`);',
+    'CREATE INDEX IF NOT EXISTS `job51_salary` ON `job51` (`salaryMin`, `salaryMax`);',
+]
+
+# External content full-text index of jobName and tags, the trigram tokenizer matches chinese substrings
+SQL_FTS = '''CREATE VIRTUAL TABLE IF NOT EXISTS `job51_fts` USING fts5(
+          `jobName`, `tags`, content='job51', content_rowid='rowid', tokenize='trigram'
+);'''
+
+# The triggers keep the full-text index in step with every insert, update and delete of job51
+SQL_FTS_TRIGGERS = [
+    '''CREATE TRIGGER IF NOT EXISTS `job51_fts_insert` AFTER INSERT ON `job51` BEGIN
+          INSERT INTO `job51_fts` (rowid, `jobName`, `tags`) VALUES (new.rowid, new.`jobName`, new.`tags`);
+    END;''',
+    '''CREATE TRIGGER IF NOT EXISTS `job51_fts_delete` AFTER DELETE ON `job51` BEGIN
+          INSERT INTO `job51_fts` (`job51_fts`, rowid, `jobName`, `tags`)
+          VALUES ('delete', old.rowid, old.`jobName`, old.`tags`);
+    END;''',
+    '''CREATE TRIGGER IF NOT EXISTS `job51_fts_update` AFTER UPDATE ON `job51` BEGIN
+          INSERT INTO `job51_fts` (`job51_fts`, rowid, `jobName`, `tags`)
+          VALUES ('delete', old.rowid, old.`jobName`, old.`tags`);
+          INSERT INTO `job51_fts` (rowid, `jobName`, `tags`) VALUES (new.rowid, new.`jobName`, new.`tags`);
+    END;''',
+]
+
+SQL_FTS_REBUILD = '''INSERT INTO `job51_fts` (`job51_fts`) VALUES ('rebuild');'''
+
+SQL_INSERT = ('''INSERT OR IGNORE INTO `job51` (''' + ', '.join(f'`{column}`' for column in COLUMNS) +
+              ''') VALUES(''' + ', '.join('?' * len(COLUMNS)) + ''');''')
+
+SQL_UPDATE = ('''UPDATE `job51` SET ''' + ', '.join(f'`{column}` = ?' for column in COLUMNS) +
+              ''' WHERE rowid = ?;''')
+
+SQL_SELECT_CONTENT = ('''SELECT ''' + ', '.join(f'`{column}`' for column in CONTENT) +
+                      ''' FROM `job51` WHERE rowid = ?;''')
+
+SQL_SELECT_PRIMARY_KEY = ('''SELECT rowid FROM `job51` WHERE ''' +
+                          ' AND '.join(f'`{column}` IS ?' for column in PRIMARY_KEY) + ';')
+
+# A refreshed posting may take the primary key of an older copy of itself stored before the tracking
+SQL_DELETE_COLLISION = ('''DELETE FROM `job51` WHERE ''' +
+                        ' AND '.join(f'`{column}` IS ?' for column in PRIMARY_KEY) + ''' AND rowid != ?;''')
+
+# The current version of every posting: the job51 row holding it, its content fingerprint and when it was seen
+SQL_POSTING_TABLE = '''CREATE TABLE IF NOT EXISTS `posting51` (
+          `postingKey` CHAR(16) NOT NULL,
+          `jobRowid` INTEGER NOT NULL,
+          `fingerprint` CHAR(16) NOT NULL,
+          `version` INTEGER NOT NULL DEFAULT 1,
+          `firstSeen` REAL NOT NULL,
+          `lastSeen` REAL NOT NULL,
+          PRIMARY KEY (`postingKey`)
+) WITHOUT ROWID;'''
+
+# One row per version of a posting, changes holds {column: [old, new]} of the content columns changed from
+# the previous version, the lastSeen of the current version is NULL, it is the one of posting51
+SQL_VERSION_TABLE = '''CREATE TABLE IF NOT EXISTS `version51` (
+          `postingKey` CHAR(16) NOT NULL,
+          `version` INTEGER NOT NULL,
+          `fingerprint` CHAR(16) NOT NULL,
+          `changes` TEXT NULL,
+          `firstSeen` REAL NOT NULL,
+          `lastSeen` REAL NULL,
+          PRIMARY KEY (`postingKey`, `version`)
+) WITHOUT ROWID;'''
+
+SQL_VERSION_INDEX = '''CREATE INDEX IF NOT EXISTS `version51_firstSeen` ON `version51` (`firstSeen`);'''
+
+SQL_INSERT_POSTING = '''INSERT INTO `posting51` VALUES(?, ?, ?, 1, ?, ?);'''
+
+SQL_INSERT_VERSION = '''INSERT INTO `version51` VALUES(?, ?, ?, ?, ?, NULL);'''
+
+# Seeing an unchanged posting again only moves its lastSeen once per resolution, in seconds
+SEEN_RESOLUTION = 3600
+
+# Attempts of a batch that finds the DB locked or busy, and the backoff of the first retry in seconds, doubled on
+# every later one
+FLUSH_ATTEMPTS = 3
+FLUSH_BACKOFF = 1
+
+IDENTITY_INDEX = [COLUMNS.index(column) for column in IDENTITY]
+CONTENT_INDEX = [COLUMNS.index(column) for column in CONTENT]
+PRIMARY_KEY_INDEX = [COLUMNS.index(column) for column in PRIMARY_KEY]
+
+PRAGMAS = [
+    'PRAGMA journal_mode=WAL;',
+    'PRAGMA synchronous=NORMAL;',
+    'PRAGMA temp_store=MEMORY;',
+    'PRAGMA cache_size=-65536;',
+]
+
+
+class FlatStore(object):
+    """ Row storage of job51 as a table of the column values, the full-text index is kept by triggers
+
+    A store writes the rows of the postings for SQLiteSink, which keeps the posting and version tables.
+    Every layout serves job51 with a rowid, so the readers and the tracking do not depend on the layout.
+    """
+
+    def __init__(self, connect: sqlite3.Connection):
+        """ Init the store
+
+        :Args:
+         - connect: Connection of the output DB
+        """
+        self.connect = connect
+
+    def setup(self):
+        """ Create the table and the indexes, an older output DB is migrated """
+
+        self.connect.execute(SQL_TABLE)
+        self.__migrate()
+        self.__index()
+
+    def insert(self, record: tuple):
+        """ Insert a job51 row, or find the row of the same primary key
+
+        Finally, return the rowid
+
+        :Args:
+         - record: Row tuple in COLUMNS order
+        """
+        cursor = self.connect.execute(SQL_INSERT, record)
+        if cursor.rowcount:
+            return cursor.lastrowid
+        return self.connect.execute(SQL_SELECT_PRIMARY_KEY, [record[i] for i in PRIMARY_KEY_INDEX]).fetchone()[0]
+
+    def update(self, rowid: int, record: tuple):
+        """ Replace the values of a row
+
+        Finally, return False if the row does not exist
+
+        :Args:
+         - rowid: Rowid of the row
+         - record: Row tuple in COLUMNS order
+        """
+        return self.connect.execute(SQL_UPDATE, record + (rowid,)).rowcount > 0
+
+    def delete_collision(self, record: tuple, rowid: int):
+        """ Delete the other row that holds the primary key of a record
+
+        :Args:
+         - record: Row tuple in COLUMNS order
+         - rowid: Rowid of the row that takes the primary key
+        """
+        self.connect.execute(SQL_DELETE_COLLISION, [record[i] for i in PRIMARY_KEY_INDEX] + [rowid])
+
+    def reset(self):
+        """ Forget the state of a rolled back transaction, there is none """
+
+    def __migrate(self):
+        """ Add the columns missing from the table of an older output DB """
+
+        columns = [row[1] for row in self.connect.execute('PRAGMA table_info(`job51`);')]
+        for column, sql in SQL_MIGRATIONS.items():
+            if column not in columns:
+                self.connect.execute(sql)
+
+    def __index(self):
+        """ Create the secondary and full-text indexes, the full-text index of an older output DB is backfilled """
+
+        for sql in SQL_INDEXES:
+            self.connect.execute(sql)
+
+        exists = self.connect.execute("SELECT 1 FROM sqlite_master WHERE name = 'job51_fts';").fetchone()
+        self.connect.execute(SQL_FTS)
+        for sql in SQL_FTS_TRIGGERS:
+            self.connect.execute(sql)
+        if not exists:
+            self.connect.execute(SQL_FTS_REBUILD)
+
+
+@register_sink('job', 'db')
+class SQLiteSink(Sink):
+    """ Persistent sqlite writer, it owns one connection per output DB
+
+    The schema is set up once, rows are buffered and written in batched transactions.
+    The secondary and full-text indexes are updated by the same transactions, see spider.query.
+
+    Writes are upserts by the posting identity with a content fingerprint, see spider.normalizer.
+    A new posting is inserted. A posting whose fingerprint changed, such as by a refresh or a new salary,
+    is updated in place and the change is recorded as a new version in version51. An unchanged posting
+    costs no write to job51, only its lastSeen in posting51 is moved once per SEEN_RESOLUTION.
+    A batch holds the write lock of the DB from its lookups to its commit, so the worker processes that write
+    one DB merge their postings rather than fail on them.
+
+    The rows are written by the store of the layout, see FlatStore and spider.sink.dictsink. The statistics
+    of the postings are kept by the same transactions, see spider.sink.aggregate.
+    """
+
+    FILE = '51job.db'
+    STORE = FlatStore
+
+    def __init__(self, output: str, batch_size: int = 1000):
+        """ Open the connection and set up the schema
+
+        :Args:
+         - output: Data output path
+         - batch_size: Number of buffered rows that triggers a flush
+        """
+        super().__init__(output)
+        self.batch_size = batch_size
+        self.__buffer = []
+        self.__lock = threading.RLock()
+        self.connect = sqlite3.connect(output, timeout=30, check_same_thread=False)
+        for pragma in PRAGMAS:
+            self.connect.execute(pragma)
+        self.store = self.STORE(self.connect)
+        self.store.setup()
+        self.__track()
+        self.aggregate = AggregateStore(self.connect)
+        self.aggregate.setup()
+        self.connect.commit()
+
+    def write_table(self, table: pd.DataFrame):
+        """ Buffer a normalized table, flush when the buffer is full
+
+        The search keyword of the table is read from table.attrs['keyword'] for the statistics
+
+        :Args:
+         - table: Normalized table
+        """
+        self.write_records(to_records(table, COLUMNS), table.attrs.get('keyword'))
+
+    def write_many(self, details: list):
+        """ Buffer a list of row dictionaries, flush when the buffer is full
+
+        :Args:
+         - details: List of row dictionaries
+        """
+        self.write_records([tuple(detail.get(column) for column in COLUMNS) for detail in details])
+
+    def write_records(self, records: list, keyword: str = None):
+        """ Buffer a list of row tuples in COLUMNS order, flush when the buffer is full
+
+        :Args:
+         - records: List of row tuples
+         - keyword: Search keyword that found the rows, None if unknown
+        """
+        with self.__lock:
+            self.__buffer.extend((record, keyword) for record in records)
+            if len(self.__buffer) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """ Upsert the buffered items in one transaction
+
+        A batch that finds the DB locked is tried again FLUSH_ATTEMPTS times. A batch that still fails is put
+        back in front of the buffer and the error is raised, so the rows are written by the next flush.
+
+        Finally, return the number of inserted, updated and unchanged rows
+        """
+        with self.__lock:
+            batch, self.__buffer = self.__buffer, []
+            if not batch:
+                return 0, 0, 0
+
+            # The last copy of a posting in the batch wins, every keyword that found it is kept
+            latest, keywords = {}, {}
+            for record, keyword in batch:
+                key = digest([record[i] for i in IDENTITY_INDEX])
+                latest[key] = (digest([record[i] for i in CONTENT_INDEX]), record)
+                keywords.setdefault(key, set()).add(keyword)
+
+            for attempt in range(1, FLUSH_ATTEMPTS + 1):
+                try:
+                    with self.connect:
+                        # The write lock is taken before the postings are looked up, so a concurrent writer of the
+                        # same DB waits for this batch and then sees its postings rather than inserting them again
+                        self.connect.execute('BEGIN IMMEDIATE;')
+                        inserted, updated = self.__upsert(latest, time.time())
+                        self.aggregate.apply({key: (record, keywords[key]) for key, (_, record) in latest.items()})
+                    break
+                except Exception as e:
+                    self.store.reset()
+                    logger.warning("SQL execution failure of SQLite: " + str(e))
+                    if not isinstance(e, sqlite3.OperationalError) or attempt == FLUSH_ATTEMPTS:
+                        self.__buffer = batch + self.__buffer
+                        raise
+                    time.sleep(FLUSH_BACKOFF * 2 ** (attempt - 1))
+
+            unchanged = len(batch) - inserted - updated
+            logger.info('sqlite batch: %s inserted, %s updated, %s unchanged', inserted, updated, unchanged,
+                        sink='db', inserted=inserted, updated=updated, skipped=unchanged)
+            return inserted, updated, unchanged
+
+    def __upsert(self, latest: dict, now: float):
+        """ Write the new and changed postings and record their versions
+
+        Finally, return the number of inserted and updated postings
+
+        :Args:
+         - latest: Fingerprint and row tuple by posting key
+         - now: Time of the batch
+        """
+        known = {}
+        keys = list(latest)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            sql = ('''SELECT `postingKey`, `jobRowid`, `fingerprint`, `version`, `lastSeen` FROM `posting51`
+                      WHERE `postingKey` IN (''' + ', '.join('?' * len(chunk)) + ''');''')
+            known.update((row[0], row[1:]) for row in self.connect.execute(sql, chunk))
+
+        postings, seen, updated = [], [], 0
+        for key, (fingerprint, record) in latest.items():
+            current = known.get(key)
+            if current is None:
+                postings.append((key, self.store.insert(record), fingerprint, now, now))
+                continue
+
+            rowid, previous, version, lastSeen = current
+            if previous == fingerprint:
+                if lastSeen < now - SEEN_RESOLUTION:
+                    seen.append((now, key))
+                continue
+
+            old = self.connect.execute(SQL_SELECT_CONTENT, (rowid,)).fetchone()
+            self.store.delete_collision(record, rowid)
+            if not self.store.update(rowid, record):
+                # The row was deleted from job51 by hand, the posting is stored again
+                rowid = self.store.insert(record)
+
+            changes = {column: [old[i] if old else None, record[index]]
+                       for i, (column, index) in enumerate(zip(CONTENT, CONTENT_INDEX))
+                       if old is None or old[i] != record[index]}
+            self.connect.execute('''UPDATE `version51` SET `lastSeen` = ? WHERE `postingKey` = ? AND `version` = ?;''',
+                                 (lastSeen, key, version))
+            self.connect.execute(SQL_INSERT_VERSION,
+                                 (key, version + 1, fingerprint, json.dumps(changes, ensure_ascii=False), now))
+            self.connect.execute('''UPDATE `posting51` SET `jobRowid` = ?, `fingerprint` = ?, `version` = ?,
+                                    `lastSeen` = ? WHERE `postingKey` = ?;''',
+                                 (rowid, fingerprint, version + 1, now, key))
+            updated += 1
+
+        self.connect.executemany(SQL_INSERT_POSTING, postings)
+        self.connect.executemany(SQL_INSERT_VERSION, [(row[0], 1, row[2], None, now) for row in postings])
+        if seen:
+            self.connect.executemany('''UPDATE `posting51` SET `lastSeen` = ? WHERE `postingKey` = ?;''', seen)
+        return len(postings), updated
+
+    def __track(self):
+        """ Create the posting and version tables, the postings of an older output DB are backfilled
+
+        The rows are read in primary key order, so the copies of a posting are adjacent and sorted by issueDate,
+        and the latest copy becomes the first version. The older copies are left in job51 as they are.
+        """
+        exists = self.connect.execute("SELECT 1 FROM sqlite_master WHERE name = 'posting51';").fetchone()
+        self.connect.execute(SQL_POSTING_TABLE)
+        self.connect.execute(SQL_VERSION_TABLE)
+        self.connect.execute(SQL_VERSION_INDEX)
+        if exists:
+            return
+
+        now = time.time()
+        columns = ', '.join(f'`{column}`' for column in IDENTITY + CONTENT)
+        order = ', '.join(f'`{column}`' for column in PRIMARY_KEY)
+        cursor = self.connect.execute(f'SELECT rowid, {columns} FROM `job51` ORDER BY {order};')
+
+        total, pending, rows = 0, None, []
+        for row in cursor:
+            key = digest(row[1:1 + len(IDENTITY)])
+            if pending is not None and pending[0] != key:
+                rows.append(pending)
+            pending = (key, row[0], digest(row[1 + len(IDENTITY):]), now, now)
+            if len(rows) >= 10000:
+                total += self.__backfill(rows)
+        if pending is not None:
+            rows.append(pending)
+        total += self.__backfill(rows)
+
+        if total:
+            logger.info('posting tracking backfilled with ' + str(total) + ' postings')
+
+    def __backfill(self, rows: list):
+        """ Store backfilled postings as their first version, the list is emptied
+
+        Finally, return the number of stored postings
+
+        :Args:
+         - rows: posting51 rows
+        """
+        self.connect.executemany(SQL_INSERT_POSTING, rows)
+        self.connect.executemany(SQL_INSERT_VERSION, [(row[0], 1, row[2], None, row[3]) for row in rows])
+        count = len(rows)
+        rows.clear()
+        return count
+
+    def close(self):
+        """ Flush the buffer and close the connection """
+
+        with self.__lock:
+            try:
+                self.flush()
+            finally:
+                self.connect.close()
@@ -0,0 +1,175 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 15:00
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : durable sqlite work queue
+
+import json
+import time
+import sqlite3
+from spider import logger
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+SQL_TABLE = '''CREATE TABLE IF NOT EXISTS `task51` (
+          `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+          `keyword` VARCHAR(255) NOT NULL,
+          `area` VARCHAR(10) NOT NULL,
+          `page` INTEGER NOT NULL,
+          `pageSize` INTEGER NOT NULL,
+          `filters` TEXT NOT NULL DEFAULT '{}',
+          `status` VARCHAR(10) NOT NULL DEFAULT 'pending',
+          `attempts` INTEGER NOT NULL DEFAULT 0,
+          `leaseUntil` REAL NULL,
+          `worker` VARCHAR(50) NULL,
+          `error` TEXT NULL,
+          `updated` REAL NULL,
+          UNIQUE (`keyword`, `area`, `page`, `filters`)
+);'''
+
+SQL_INDEX = '''CREATE INDEX IF NOT EXISTS `task51_status` ON `task51` (`status`, `leaseUntil`);'''
+
+
+class TaskQueue(object):
+    """ Durable (keyword, area, page) task queue in sqlite
+
+    Workers lease tasks with a timeout and mark them done or failed. A lease that is not finished in time,
+    because the worker crashed or was interrupted, expires and the task is leased again, so a run resumes
+    exactly where it stopped. Leasing takes a write lock, so several processes can share the queue.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        """ Open the queue database and set up the schema
+
+        :Args:
+         - path: Queue database path
+         - max_attempts: Number of failed attempts after which a task is given up
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self.connect = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.connect.execute('PRAGMA journal_mode=WAL;')
+        self.connect.execute('PRAGMA synchronous=NORMAL;')
+        self.connect.execute(SQL_TABLE)
+        self.connect.execute(SQL_INDEX)
+
+    def seed(self, tasks):
+        """ Add tasks, the tasks already in the queue are kept as they are
+
+        Finally, return the number of added tasks
+
+        :Args:
+         - tasks: Iterable of url param, type Dict{'keyword': str, 'page': int, 'pageSize': int, 'area': str}
+        """
+        sql = '''INSERT OR IGNORE INTO `task51` (`keyword`, `area`, `page`, `pageSize`, `filters`, `updated`)
+                 VALUES(?, ?, ?, ?, ?, ?);'''
+        now = time.time()
+        rows = [(args['keyword'], args['area'], args['page'], args['pageSize'],
+                 json.dumps(args.get('filters') or {}, sort_keys=True), now) for args in tasks]
+
+        before = self.connect.total_changes
+        self.connect.execute('BEGIN IMMEDIATE;')
+        try:
+            self.connect.executemany(sql, rows)
+            self.connect.execute('COMMIT;')
+        except Exception:
+            self.connect.execute('ROLLBACK;')
+            raise
+
+        added = self.connect.total_changes - before
+        logger.info('task queue seeded with ' + str(added) + ' new tasks')
+        return added
+
+    def lease(self, worker: str, timeout: float = 600):
+        """ Lease the next pending or expired task
+
+        Finally, return the task dictionary, None if there is nothing left to do
+
+        :Args:
+         - worker: Worker name
+         - timeout: Seconds after which the lease expires
+        """
+        now = time.time()
+        self.connect.execute('BEGIN IMMEDIATE;')
+        try:
+            self.connect.execute(
+                '''UPDATE `task51` SET `status` = ?, `error` = 'lease expired', `updated` = ?
+                   WHERE `status` = ? AND `leaseUntil` < ? AND `attempts` >= ?;''',
+                (FAILED, now, LEASED, now, self.max_attempts))
+            row = self.connect.execute(
+                '''SELECT `id`, `keyword`, `area`, `page`, `pageSize`, `filters`, `attempts` FROM `task51`
+                   WHERE (`status` = ? OR (`status` = ? AND `leaseUntil` < ?)) AND `attempts` < ?
+                   ORDER BY `id` LIMIT 1;''',
+                (PENDING, LEASED, now, self.max_attempts)).fetchone()
+
+            if row is None:
+                self.connect.execute('COMMIT;')
+                return None
+
+            self.connect.execute(
+                '''UPDATE `task51` SET `status` = ?, `attempts` = `attempts` + 1, `leaseUntil` = ?, `worker` = ?,
+                   `updated` = ? WHERE `id` = ?;''',
+                (LEASED, now + timeout, worker, now, row[0]))
+            self.connect.execute('COMMIT;')
+        except Exception:
+            self.connect.execute('ROLLBACK;')
+            raise
+
+        return {'id': row[0], 'keyword': row[1], 'area': row[2], 'page': row[3], 'pageSize': row[4],
+                'filters': json.loads(row[5]), 'attempts': row[6] + 1}
+
+    def complete(self, task: dict):
+        """ Mark a leased task done
+
+        :Args:
+         - task: Leased task
+        """
+        self.connect.execute('UPDATE `task51` SET `status` = ?, `error` = NULL, `updated` = ? WHERE `id` = ?;',
+                             (DONE, time.time(), task['id']))
+
+    def fail(self, task: dict, error: str):
+        """ Mark a leased task failed, it goes back to pending until the attempts run out
+
+        :Args:
+         - task: Leased task
+         - error: Failure reason
+        """
+        status = FAILED if task['attempts'] >= self.max_attempts else PENDING
+        self.connect.execute('UPDATE `task51` SET `status` = ?, `error` = ?, `updated` = ? WHERE `id` = ?;',
+                             (status, error, time.time(), task['id']))
+
+    def release(self, task: dict):
+        """ Give a leased task back without counting the attempt
+
+        :Args:
+         - task: Leased task
+        """
+        self.connect.execute(
+            '''UPDATE `task51` SET `status` = ?, `attempts` = `attempts` - 1, `updated` = ? WHERE `id` = ?;''',
+            (PENDING, time.time(), task['id']))
+
+    def retry_failed(self):
+        """ Put the failed tasks back to pending
+
+        Finally, return the number of tasks put back
+        """
+        cursor = self.connect.execute('UPDATE `task51` SET `status` = ?, `attempts` = 0 WHERE `status` = ?;',
+                                      (PENDING, FAILED))
+        return cursor.rowcount
+
+    def stats(self):
+        """ Count the tasks by status """
+
+        rows = self.connect.execute('SELECT `status`, COUNT(*) FROM `task51` GROUP BY `status`;').fetchall()
+        stats = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        stats.update(dict(rows))
+        return stats
+
+    def close(self):
+        """ Close the connection """
+
+        self.connect.close()
@@ -0,0 +1,99 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 02:10
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : user-agent pool cached on disk
+
+import os
+import json
+import time
+import random
+import threading
+from spider import logger
+
+POOL_PATH = os.path.join(os.path.abspath('..'), 'output/cache/useragent.json')
+
+# Number of distinct user agents drawn into the pool, and seconds the cached pool is used before it is redrawn
+POOL_SIZE = 100
+POOL_TTL = 7 * 24 * 3600
+
+# Used when fake_useragent fails and there is no cached pool
+FALLBACK = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+            'Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0')
+
+
+def draw(size: int = POOL_SIZE):
+    """ Draw distinct user agents from fake_useragent
+
+    :Args:
+     - size: Number of user agents
+    """
+    from fake_useragent import UserAgent
+
+    agent = UserAgent()
+    agents = set()
+    for _ in range(size * 5):
+        agents.add(agent.random)
+        if len(agents) >= size:
+            break
+    return sorted(agents)
+
+
+def load_pool(path: str = None, size: int = POOL_SIZE, ttl: float = POOL_TTL):
+    """ Read the cached pool, or draw a new one and cache it once the cached pool is expired
+
+    The cached pool spares every new process the import and the data file of fake_useragent.
+
+    :Args:
+     - path: Cache file path, default to POOL_PATH
+     - size: Number of user agents of a new pool
+     - ttl: Seconds the cached pool is used
+    """
+    path = path or POOL_PATH
+    cached = {}
+    try:
+        with open(path, encoding='utf-8') as file:
+            cached = json.load(file)
+    except (OSError, ValueError):
+        pass
+
+    agents = cached.get('agents') or []
+    if agents and time.time() - cached.get('created', 0) < ttl:
+        return agents
+
+    try:
+        agents = draw(size)
+    except Exception as e:
+        logger.warning('user-agent pool failure, using the ' + ('cached' if agents else 'fallback') + ' one: ' + str(e))
+        return agents or [FALLBACK]
+
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp = path + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as file:
+            json.dump({'created': time.time(), 'agents': agents}, file, ensure_ascii=False)
+        os.replace(temp, path)
+    except OSError as e:
+        logger.warning('user-agent pool cache failure: ' + str(e))
+    return agents
+
+
+_shared = None
+_lock = threading.Lock()
+
+
+def shared_agents():
+    """ Get the process wide user-agent pool, it is loaded once and inherited by forked workers """
+
+    global _shared
+    with _lock:
+        if _shared is None:
+            _shared = load_pool()
+        return _shared
+
+
+def random_agent():
+    """ Get a random user agent of the pool """
+
+    return random.choice(shared_agents())
@@ -0,0 +1,108 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/18 15:30
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : multi-process crawl workers over the durable task queue
+
+import os
+import multiprocessing
+from spider import logger, config, metrics, preload
+from spider.ratelimit import TokenBucket
+from spider.taskqueue import TaskQueue
+from spider.deadletter import DeadLetterStore
+from spider.jobspider51 import JobSipder51
+from spider.sink.base import check_engine, close_sinks, sink_modules
+
+
+def work(queue_path: str, save_engine: str, rate: float, lease_timeout: float = 600, shard: str = None):
+    """ Lease and crawl tasks until the queue is drained
+
+    Finally, return the number of tasks done by this worker
+
+    :Args:
+     - queue_path: Queue database path
+     - save_engine: Data storage engine, such as csv, db, both or parquet
+     - rate: Requests per second budget of this worker
+     - lease_timeout: Seconds after which an unfinished lease expires
+     - shard: Shard id of the job outputs of this worker, default to the shard of the process
+    """
+    name = multiprocessing.current_process().name + '-' + str(os.getpid())
+    if shard is not None:
+        config.configure(shard=shard)
+    preload('spider.normalizer', *sink_modules('job', save_engine))
+    queue = TaskQueue(queue_path)
+    limiter = TokenBucket(rate=rate)
+    deadletter = DeadLetterStore(os.path.join(config.job_output_dir(), '51job.db'))
+    done = 0
+
+    try:
+        while True:
+            task = queue.lease(name, lease_timeout)
+            if task is None:
+                break
+
+            try:
+                spider = JobSipder51(keyword=task['keyword'], page=task['page'], pageSize=task['pageSize'],
+                                     area=task['area'], limiter=limiter, filters=task['filters'],
+                                     deadletter=deadletter)
+                data = spider.get_data_json()
+                if data is None:
+                    queue.fail(task, 'no data')
+                    continue
+
+                spider.save(data, save_engine)
+                deadletter.resolve(task)
+                queue.complete(task)
+                done += 1
+            except KeyboardInterrupt:
+                queue.release(task)
+                raise
+            except Exception as e:
+                logger.warning('task ' + str(task['id']) + ' failure: ' + str(e))
+                queue.fail(task, str(e))
+    finally:
+        # A worker process exits without the exit handlers
+        close_sinks()
+        metrics.close()
+        deadletter.close()
+        queue.close()
+
+    logger.info(name + ' finished ' + str(done) + ' tasks')
+    return done
+
+
+def run(queue_path: str, save_engine: str, processes: int = None, rate: float = 0.2, lease_timeout: float = 600,
+        sharded: bool = False):
+    """ Run worker processes over the queue, an interrupted run resumes from the queue when it is run again
+
+    :Args:
+     - queue_path: Queue database path
+     - save_engine: Data storage engine, support for db and parquet only when more than one process is used
+       without sharded
+     - processes: Number of worker processes, default to the number of cores
+     - rate: Requests per second budget shared by all workers
+     - lease_timeout: Seconds after which an unfinished lease expires
+     - sharded: Give every worker its own outputs, in the shard <shard>-worker<i> or worker<i>, see spider.merge
+    """
+    error = check_engine('job', save_engine)
+    if error:
+        return logger.error(error)
+
+    processes = processes or os.cpu_count() or 1
+    if processes > 1 and not sharded and save_engine not in ['db', 'parquet']:
+        return logger.error("The csv output can not be shared by processes, the data storage engine must be "
+                            "'db' or 'parquet', or the workers must be sharded")
+
+    names = ['worker' + str(i) for i in range(processes)]
+    shards = [(config.SHARD + '-' if config.SHARD else '') + name if sharded else None for name in names]
+    workers = [multiprocessing.Process(target=work, args=(queue_path, save_engine, rate / processes, lease_timeout,
+                                                          shard), name=name) for name, shard in zip(names, shards)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    queue = TaskQueue(queue_path)
+    logger.info('task queue: ' + str(queue.stats()))
+    queue.close()
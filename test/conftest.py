@@ -0,0 +1,41 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 08:00
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : shared fixtures of the unit tests
+
+import pytest
+from spider import useragent
+from spider.mockserver import MockServer, AREAS
+from spider.normalizer import normalize
+
+
+def build_table(count: int, start: int = 0, keyword: str = 'Python'):
+    """ Build a normalized table of synthetic postings, the same index always gives the same posting
+
+    :Args:
+     - count: Number of postings
+     - start: Index of the first posting
+     - keyword: Search keyword
+    """
+    items = []
+    for index in range(start, start + count):
+        code, area = AREAS[1 + index % (len(AREAS) - 1)]
+        items.append(MockServer.posting('keyword=' + keyword + '&jobArea=' + code, keyword, area, index))
+    return normalize(items)
+
+
+@pytest.fixture
+def make_table():
+    """ Factory of normalized tables, see build_table """
+
+    return build_table
+
+
+@pytest.fixture(autouse=True)
+def agent_pool(tmp_path, monkeypatch):
+    """ Cache the user-agent pool of a test in its temporary directory rather than in the output directory """
+
+    monkeypatch.setattr(useragent, 'POOL_PATH', str(tmp_path / 'useragent.json'))
+    monkeypatch.setattr(useragent, '_shared', None)
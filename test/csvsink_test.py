@@ -0,0 +1,61 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 14:00
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : dedup index of the csv sink
+
+import pandas as pd
+from spider.schema import COLUMNS
+from spider.sink.csvsink import CsvSink
+
+
+def test_appended_rows_are_deduplicated(tmp_path, make_table):
+    output = str(tmp_path / '51job.csv')
+    sink = CsvSink(output)
+    sink.write_table(make_table(10))
+    assert sink.flush() == (10, 0)
+    sink.close()
+
+    sink = CsvSink(output)
+    sink.write_table(make_table(15))
+    assert sink.flush() == (5, 10)
+    sink.close()
+
+    table = pd.read_csv(output, dtype=str, keep_default_na=False)
+    assert list(table.columns) == COLUMNS
+    assert len(table) == 15
+
+
+def test_headerless_csv_of_the_first_release(tmp_path, make_table):
+    # The first release wrote the rows of its 11 columns without a header
+    output = str(tmp_path / '51job.csv')
+    make_table(10)[COLUMNS[:11]].to_csv(output, index=False, header=False, encoding='utf-8')
+
+    sink = CsvSink(output)
+    assert sink.columns == COLUMNS[:11]
+    assert not sink.header
+    sink.write_table(make_table(12))
+    assert sink.flush() == (2, 10)
+    sink.close()
+
+    table = pd.read_csv(output, header=None, dtype=str, keep_default_na=False)
+    assert table.shape == (12, 11)
+
+
+def test_index_of_an_older_release_is_rebuilt(tmp_path, make_table):
+    output = str(tmp_path / '51job.csv')
+    sink = CsvSink(output)
+    sink.write_table(make_table(10))
+    sink.close()
+
+    # An index of primary key hashes has one field per line
+    with open(output + '.idx', 'w', encoding='utf-8') as file:
+        file.write(''.join(f'{index:016x}\n' for index in range(10)))
+
+    sink = CsvSink(output)
+    sink.write_table(make_table(10))
+    assert sink.flush() == (0, 10)
+    sink.close()
+    with open(output + '.idx', encoding='utf-8') as file:
+        assert [len(line.split()) for line in file] == [2] * 10
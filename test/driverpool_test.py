@@ -0,0 +1,63 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 14:30
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : warm up and leases of the driver pool
+
+import pytest
+from spider.driver.driverpool import DriverPool, WARM_ATTEMPTS
+
+
+class FakeDriver(object):
+    """ Webdriver that answers the health check when it is healthy """
+
+    def __init__(self, healthy: bool = True):
+        self.healthy = healthy
+        self.quit_called = False
+
+    def execute_script(self, script: str):
+        if not self.healthy:
+            raise RuntimeError('browser crashed')
+        return 1 if script == 'return 1;' else 0
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_warm_fills_the_pool():
+    built = []
+
+    def builder():
+        built.append(FakeDriver())
+        return built[-1]
+
+    pool = DriverPool(size=2, builder=builder)
+    pool.warm()
+    with pool.lease() as web:
+        assert web in built
+    assert len(built) == 2
+    pool.close()
+    assert all(driver.quit_called for driver in built)
+
+
+def test_warm_gives_up_on_unhealthy_builds():
+    built = []
+
+    def builder():
+        built.append(FakeDriver(healthy=False))
+        return built[-1]
+
+    pool = DriverPool(size=2, builder=builder)
+    with pytest.raises(RuntimeError):
+        pool.warm()
+    assert len(built) == WARM_ATTEMPTS
+    assert all(driver.quit_called for driver in built)
+
+
+def test_warm_counts_only_unhealthy_builds_in_a_row():
+    health = iter([False, False, True, False, False, True])
+
+    pool = DriverPool(size=2, builder=lambda: FakeDriver(next(health)))
+    pool.warm()
+    pool.close()
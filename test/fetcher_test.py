@@ -0,0 +1,65 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 11:30
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : response handling of the HTTP fetcher
+
+import pytest
+import requests
+from spider.fetcher import Fetcher, HttpFetcher, FallbackFetcher, SliderChallenge
+
+URL = 'https://we.51job.com/api/job/search-pc'
+
+
+def response(status: int, text: str):
+    result = requests.Response()
+    result.status_code = status
+    result._content = text.encode('utf-8')
+    result.encoding = 'utf-8'
+    result.url = URL
+    return result
+
+
+def fetcher(status: int, text: str):
+    http = HttpFetcher()
+    http.session.get = lambda url, timeout: response(status, text)
+    return http
+
+
+class StaticFetcher(Fetcher):
+    """ Fallback that answers every url with the same data """
+
+    def fetch(self, url: str):
+        return {'status': '1', 'browser': True}
+
+    def close(self):
+        pass
+
+
+def test_json_is_returned():
+    assert fetcher(200, '{"status": "1"}').fetch(URL) == {'status': '1'}
+
+
+@pytest.mark.parametrize('status', [200, 403, 405])
+def test_challenge_page_is_a_slider_challenge(status):
+    with pytest.raises(SliderChallenge):
+        fetcher(status, '<html>slider</html>').fetch(URL)
+
+
+@pytest.mark.parametrize('status, text', [
+    (500, '<html>error</html>'),
+    (404, '<html>not found</html>'),
+    (403, '{"status": "0"}'),
+    (429, '{"message": "slow down"}'),
+])
+def test_error_status_is_an_http_error(status, text):
+    with pytest.raises(requests.HTTPError) as error:
+        fetcher(status, text).fetch(URL)
+    assert error.value.response.status_code == status
+
+
+def test_challenge_falls_back_to_the_browser():
+    fallback = FallbackFetcher(fetcher(403, '<html>slider</html>'), StaticFetcher())
+    assert fallback.fetch(URL) == {'status': '1', 'browser': True}
+    assert fallback.stats() == {'requests': 1, 'primary': 0, 'challenge': 1, 'fallback': 1}
@@ -0,0 +1,66 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 13:00
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : process wide state across a fork
+
+import os
+import weakref
+import multiprocessing
+from spider import deadletter, fetcher, ratelimit, retry, useragent
+from spider.driver import driverpool
+from spider.deadletter import DeadLetterStore, shared_deadletter
+from spider.fetcher import shared_fetcher
+from spider.driver.driverpool import shared_pool
+from spider.ratelimit import shared_limiter
+from spider.retry import shared_breaker
+
+
+def run_in_child(target, *args):
+    """ Run target in a forked child, it exits with 0 when target returns True """
+
+    def main():
+        os._exit(0 if target(*args) else 1)
+
+    process = multiprocessing.get_context('fork').Process(target=main)
+    process.start()
+    process.join()
+    return process.exitcode
+
+
+def test_forked_worker_keeps_the_dead_letter_store_of_the_parent(tmp_path, monkeypatch):
+    monkeypatch.setattr(deadletter, '_shared', {})
+    shared_deadletter(str(tmp_path)).add({'keyword': 'Python', 'area': '010000', 'page': 1, 'pageSize': 200},
+                                         'blocked', '403', 2)
+    parent = weakref.ref(shared_deadletter(str(tmp_path)))
+
+    def child():
+        # The store of the parent is still open, the child gets a new one
+        store = parent()
+        return store is not None and store.connect.execute('SELECT 1;').fetchone() == (1,) and \
+            deadletter._shared == {} and store in deadletter._inherited and \
+            shared_deadletter(str(tmp_path)) is not store
+
+    assert run_in_child(child) == 0
+    assert shared_deadletter(str(tmp_path)) is parent()
+    parent().close()
+
+
+def test_forked_worker_gets_its_own_fetcher_pool_limiter_and_breaker(monkeypatch):
+    monkeypatch.setattr(useragent, '_shared', ['Mozilla/5.0'])
+    for module in [fetcher, driverpool, ratelimit, retry]:
+        monkeypatch.setattr(module, '_shared', None)
+    parents = [shared_fetcher(), shared_pool(), shared_limiter(), shared_breaker()]
+    session = parents[0].primary.session
+
+    def child():
+        children = [shared_fetcher(), shared_pool(), shared_limiter(), shared_breaker()]
+        return all(own is not parent for own, parent in zip(children, parents)) and \
+            children[0].primary.session is not session and \
+            parents[0] in fetcher._inherited and parents[1] in driverpool._inherited
+
+    assert run_in_child(child) == 0
+    assert [shared_fetcher(), shared_pool(), shared_limiter(), shared_breaker()] == parents
+    parents[0].close()
+    parents[1].close()
@@ -0,0 +1,121 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 09:30
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : issueDate watermarks of incremental recrawl
+
+import sqlite3
+import pandas as pd
+from spider.incremental import WatermarkStore
+from spider.jobspider51 import crawl_incremental
+
+QUERY = WatermarkStore.query_key('Python', '000000')
+
+
+class FakeSpider(object):
+    """ Spider sorted by date whose pages are normalized tables, the page numbered failed_at fails """
+
+    def __init__(self, output: str, pages: list, failed_at: int = None):
+        self.SQLITE_FILE_PATH = output
+        self.keyword = 'Python'
+        self.area = '000000'
+        self.filters = None
+        self.pages = pages
+        self.failed_at = failed_at
+        self.failed_page = None
+        self.saved = []
+
+    def iter_pages(self):
+        self.failed_page = None
+        for page, table in enumerate(self.pages, start=1):
+            if page == self.failed_at:
+                self.failed_page = page
+                return
+            yield table
+
+    def normalize(self, table: pd.DataFrame):
+        return table
+
+    def save_table(self, table: pd.DataFrame, save_engine: str):
+        self.saved.append(table)
+
+
+def watermark(output: str):
+    store = WatermarkStore(output)
+    mark = store.watermark(QUERY)
+    store.close()
+    return mark
+
+
+def test_rows_are_fresh_until_the_crawl_is_committed(tmp_path, make_table):
+    store = WatermarkStore(str(tmp_path / '51job.db'))
+    table = make_table(10)
+    assert store.watermark(QUERY) is None
+    assert len(store.fresh(QUERY, None, table)) == 10
+
+    store.update(QUERY, table)
+    assert store.watermark(QUERY) is None
+    assert len(store.fresh(QUERY, None, table)) == 10
+
+    store.commit(QUERY)
+    assert store.watermark(QUERY) == table['issueDate'].max()
+    assert store.fresh(QUERY, store.watermark(QUERY), table).empty
+    store.close()
+
+
+def test_rows_older_than_the_watermark_are_not_fresh(tmp_path, make_table):
+    store = WatermarkStore(str(tmp_path / '51job.db'))
+    store.update(QUERY, make_table(10))
+    store.commit(QUERY)
+    mark = store.watermark(QUERY)
+
+    # Index -5 to -1 are newer than the watermark, index 10 to 14 are older and never seen
+    newer, older = make_table(5, -5), make_table(5, 10)
+    assert len(store.fresh(QUERY, mark, newer)) == 5
+    assert store.fresh(QUERY, mark, older).empty
+
+    # A posting of the same second as the watermark is fresh unless its key was seen
+    twin = make_table(1, 20)
+    twin['issueDate'] = mark
+    assert len(store.fresh(QUERY, mark, twin)) == 1
+    store.close()
+
+
+def test_commit_prunes_the_keys_older_than_the_watermark(tmp_path, make_table):
+    output = str(tmp_path / '51job.db')
+    store = WatermarkStore(output)
+    table = make_table(10)
+    table.loc[table.index[:3], 'issueDate'] = table['issueDate'].max()
+    store.update(QUERY, table)
+    store.commit(QUERY)
+    store.close()
+
+    connect = sqlite3.connect(output)
+    dates = connect.execute('SELECT `issueDate` FROM `seen51` WHERE `query` = ?;', (QUERY,)).fetchall()
+    connect.close()
+    assert dates == [(table['issueDate'].max(),)] * 3
+
+
+def test_failed_page_keeps_the_watermark(tmp_path, make_table):
+    output = str(tmp_path / '51job.db')
+    spider = FakeSpider(output, [make_table(20), make_table(20, 20)], failed_at=2)
+    assert crawl_incremental(spider, 'db') == 20
+    assert watermark(output) is None
+
+    # The next run pages down to the old postings again and moves the watermark
+    spider = FakeSpider(output, [make_table(20), make_table(20, 20)])
+    assert crawl_incremental(spider, 'db') == 40
+    assert watermark(output) == make_table(1)['issueDate'].iloc[0]
+
+
+def test_crawl_stops_at_the_first_seen_posting(tmp_path, make_table):
+    output = str(tmp_path / '51job.db')
+    crawl_incremental(FakeSpider(output, [make_table(20), make_table(20, 20)]), 'db')
+
+    # Ten new postings come before the ones of the previous run, the second page is never read
+    spider = FakeSpider(output, [make_table(20, -10), make_table(20, 10)])
+    assert crawl_incremental(spider, 'db') == 10
+    assert len(spider.saved) == 1
+    assert spider.saved[0].index.size == 10
+    assert watermark(output) == make_table(1, -10)['issueDate'].iloc[0]
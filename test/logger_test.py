@@ -0,0 +1,43 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 15:00
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : queued log handler
+
+import json
+import logging
+import pytest
+from log.handler_logger import HandlerLogger
+
+
+@pytest.fixture
+def root_logger():
+    """ Restore the handlers and state of the root logger after the test """
+
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+    root.disabled = False
+
+
+def test_close_writes_the_queued_records(tmp_path, root_logger):
+    path = tmp_path / 'spider.log'
+    logger = HandlerLogger(str(path), level=logging.INFO, queued=True, json_lines=True)
+    for index in range(2000):
+        logger.info('record %s', index, index=index)
+    logger.close()
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)['index'] for line in lines] == list(range(2000))
+    assert logger.listener is None
+    assert logger.queue_handler not in root_logger.handlers
+
+    logger.info('dropped')
+    logging.getLogger('library').warning('dropped')
+    assert len(path.read_text(encoding='utf-8').splitlines()) == 2000
@@ -0,0 +1,117 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 10:00
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : k-way merge of the shard outputs
+
+import hashlib
+import sqlite3
+import pandas as pd
+from spider.merge import merge
+from spider.schema import COLUMNS
+from spider.sink.sqlitesink import SQLiteSink, SQL_TABLE
+from spider.sink.dictsink import DictionarySQLiteSink
+from spider.sink.csvsink import CsvSink
+
+JOBS = 'SELECT ' + ', '.join(f'`{column}`' for column in COLUMNS) + ' FROM `job51`;'
+POSTINGS = 'SELECT `postingKey`, `fingerprint`, `version` FROM `posting51`;'
+VERSIONS = 'SELECT `postingKey`, `version`, `fingerprint`, `changes` FROM `version51`;'
+STATS = 'SELECT * FROM `stats51`;'
+
+
+def rows(output: str, sql: str):
+    connect = sqlite3.connect(output)
+    result = sorted(connect.execute(sql).fetchall(), key=repr)
+    connect.close()
+    return result
+
+
+def md5(path: str):
+    with open(path, 'rb') as file:
+        return hashlib.md5(file.read()).hexdigest()
+
+
+def write(cls, output: str, tables: list):
+    sink = cls(output)
+    for table in tables:
+        sink.write_table(table)
+        sink.flush()
+    sink.close()
+
+
+def shard_tables(make_table):
+    """ Two shards that share 20 postings, the second one also saw one of them change """
+
+    first, second = make_table(60), make_table(60, 40)
+    changed = second.iloc[[10]].copy()
+    changed['salary'] = '3-4万'
+    return [first], [second, changed]
+
+
+def test_sqlite_merge_equals_one_sink_of_every_table(tmp_path, make_table):
+    first, second = shard_tables(make_table)
+    inputs = [str(tmp_path / 'a.db'), str(tmp_path / 'b.db')]
+    write(SQLiteSink, inputs[0], first)
+    write(SQLiteSink, inputs[1], second)
+    reference = str(tmp_path / 'reference.db')
+    write(SQLiteSink, reference, first + second)
+
+    output = str(tmp_path / 'merged.db')
+    assert merge(inputs, output) == 100
+
+    for sql in [JOBS, POSTINGS, VERSIONS, STATS]:
+        assert rows(output, sql) == rows(reference, sql)
+    assert max(version for _, version, _, _ in rows(output, VERSIONS)) == 2
+
+
+def test_merge_only_reads_the_inputs(tmp_path, make_table):
+    first, second = shard_tables(make_table)
+    inputs = [str(tmp_path / 'a.db'), str(tmp_path / 'b.db')]
+    write(SQLiteSink, inputs[0], first)
+    write(SQLiteSink, inputs[1], second)
+    before = [md5(path) for path in inputs]
+
+    merge(inputs, str(tmp_path / 'merged.db'))
+    assert [md5(path) for path in inputs] == before
+
+
+def test_legacy_and_dictionary_inputs_are_merged(tmp_path, make_table):
+    # A DB of the first release has only job51, it is merged from a backfilled copy and left as it was
+    legacy = str(tmp_path / 'legacy.db')
+    connect = sqlite3.connect(legacy)
+    connect.execute(SQL_TABLE)
+    marks = ', '.join('?' * len(COLUMNS))
+    table = make_table(30)
+    connect.executemany(f'INSERT INTO `job51` VALUES({marks});',
+                        table[COLUMNS].astype(object).where(table[COLUMNS].notna(), None).values.tolist())
+    connect.commit()
+    connect.close()
+    before = md5(legacy)
+
+    dictionary = str(tmp_path / 'dict.db')
+    write(DictionarySQLiteSink, dictionary, [make_table(30, 20)])
+
+    output = str(tmp_path / 'merged.db')
+    assert merge([legacy, dictionary], output) == 50
+    assert md5(legacy) == before
+    assert len(rows(output, JOBS)) == 50
+    assert len(rows(output, POSTINGS)) == 50
+
+
+def test_csv_merge_keeps_the_last_row_of_a_posting(tmp_path, make_table):
+    first, second = shard_tables(make_table)
+    inputs = [str(tmp_path / 'a.csv'), str(tmp_path / 'b.csv')]
+    write(CsvSink, inputs[0], first)
+    write(CsvSink, inputs[1], second)
+
+    output = str(tmp_path / 'merged.csv')
+    assert merge(inputs, output, run_size=25) == 100
+
+    merged = pd.read_csv(output, dtype=str, keep_default_na=False)
+    assert list(merged.columns) == COLUMNS
+    assert len(merged) == 100
+    changed = second[1].iloc[0]
+    assert merged.loc[merged['jobName'] == changed['jobName'], 'salary'].tolist() == ['3-4万']
+    with open(output + '.idx', encoding='utf-8') as index:
+        assert len(index.readlines()) == 100
@@ -0,0 +1,97 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 09:00
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : partitioning of the query planner
+
+from spider.planner import QueryPlanner, FACETS
+
+AREAS = ['000000', '010000', '020000']
+
+
+class FakePlanner(QueryPlanner):
+    """ Planner whose probes read a table of counts of the Python keyword, a query missing from the table fails """
+
+    def __init__(self, counts: dict):
+        super().__init__(areas=AREAS, pageSize=100)
+        self.counts = counts
+
+    def probe(self, keyword: str, area: str, filters: dict):
+        self.probes += 1
+        count = self.counts.get((area, tuple(sorted(filters.items())))) if keyword == 'Python' else None
+        if count is None:
+            self.failed.append((keyword, area, filters))
+        return count
+
+
+def split(partitions: list):
+    return sorted((partition.area, tuple(sorted(partition.filters.items())), partition.count)
+                  for partition in partitions)
+
+
+def test_query_under_the_cap_is_not_split():
+    plan = FakePlanner({('000000', ()): 20000}).plan(['Python'])
+
+    assert split(plan.partitions) == [('000000', (), 20000)]
+    assert len(plan) == 200
+    assert plan.report()['probes'] == 1
+
+
+def test_query_over_the_cap_is_split_by_area():
+    plan = FakePlanner({('000000', ()): 30000, ('010000', ()): 18000, ('020000', ()): 12000}).plan(['Python'])
+
+    assert split(plan.partitions) == [('010000', (), 18000), ('020000', (), 12000)]
+    assert len(plan) == 180 + 120
+    report = plan.report()
+    assert report['probes'] == 3
+    assert report['truncated'] == 0
+    assert report['uncovered'] == 0
+    assert [task['area'] for task in plan.tasks()][:1] == ['010000']
+
+
+def test_area_without_results_is_skipped():
+    # 010000 has no child areas, so it is split again by salary, the first two salary codes hold no results
+    counts = {('000000', ()): 25000, ('010000', ()): 25000, ('020000', ()): 0}
+    counts.update({('010000', (('salary', value),)): 0 if value in ['01', '02'] else 2500
+                   for value in FACETS['salary']})
+    plan = FakePlanner(counts).plan(['Python'])
+
+    assert '020000' not in [partition.area for partition in plan.partitions]
+    assert len(plan.partitions) == 10
+    assert {partition.filters['salary'] for partition in plan.partitions} == set(FACETS['salary'][2:])
+    assert plan.report()['results'] == 25000
+
+
+def test_failed_probe_is_not_a_count_of_zero():
+    # The probe of 020000 fails, so the area split is not used and the salary split covers the query
+    counts = {('000000', ()): 30000, ('010000', ()): 18000}
+    counts.update({('000000', (('salary', value),)): 2500 for value in FACETS['salary']})
+    plan = FakePlanner(counts).plan(['Python'])
+
+    assert plan.failed == [('Python', '020000', {})]
+    report = plan.report()
+    assert report['failed probes'] == 1
+    assert report['uncovered'] == 0
+    assert report['results'] == 30000
+    assert {partition.area for partition in plan.partitions} == {'000000'}
+
+
+def test_query_without_a_usable_facet_is_uncovered():
+    plan = FakePlanner({('000000', ()): 30000, ('010000', ()): 30000}).plan(['Python'])
+
+    assert split(plan.partitions) == [('000000', (), 30000)]
+    partition = plan.partitions[0]
+    assert partition.uncovered
+    assert partition.truncated
+    assert partition.pages == 200
+    report = plan.report()
+    assert report['uncovered'] == 1
+    assert report['failed probes'] == 5
+
+
+def test_failed_root_probe_skips_the_keyword():
+    plan = FakePlanner({('000000', ()): 100}).plan(['Python', 'Java'])
+
+    assert split(plan.partitions) == [('000000', (), 100)]
+    assert plan.failed == [('Java', '000000', {})]
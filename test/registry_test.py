@@ -0,0 +1,69 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 11:00
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : area dictionary and hierarchy index
+
+from spider.area.registry import NATIONWIDE, hierarchy, parse_area_script, AreaIndex
+
+ENTRIES = [
+    ('010000', '北京'),
+    ('080000', '浙江'),
+    ('080200', '杭州'),
+    ('080300', '宁波'),
+    ('080301', '海曙区'),
+    ('080205', '萧山区'),
+    ('090400', '绵阳'),
+    ('091001', '某县'),
+]
+
+
+def test_hierarchy_by_code():
+    tree = hierarchy([code for code, _ in ENTRIES])
+
+    assert tree[NATIONWIDE] == ['010000', '080000', '090400', '091001']
+    assert tree['080000'] == ['080200', '080300']
+    assert tree['080200'] == ['080205']
+    assert tree['080300'] == ['080301']
+    assert '010000' not in tree
+
+
+def test_orphan_hangs_from_the_nearest_known_ancestor():
+    # 080305 has no city 080300 in the list, it hangs from the province 080000
+    tree = hierarchy(['080000', '080305', '090400'])
+
+    assert tree[NATIONWIDE] == ['080000', '090400']
+    assert tree['080000'] == ['080305']
+
+
+def test_every_code_is_in_the_tree_once():
+    codes = [code for code, _ in ENTRIES]
+    tree = hierarchy(codes)
+
+    children = [code for values in tree.values() for code in values]
+    assert sorted(children) == sorted(codes)
+
+
+def test_index_names_codes_and_tree():
+    index = AreaIndex(ENTRIES)
+
+    assert len(index) == len(ENTRIES)
+    assert '080200' in index
+    assert NATIONWIDE not in index
+    assert index.name('080300') == '宁波'
+    assert index.code('杭州') == '080200'
+    assert index.code('上海') is None
+    assert index.resolve('宁波') == '080300'
+    assert index.resolve('080300') == '080300'
+    assert index.resolve(NATIONWIDE) == NATIONWIDE
+    assert index.children(index.code('浙江')) == ['080200', '080300']
+    assert index.expand('080000') == ['080000', '080200', '080205', '080300', '080301']
+    assert index.children('010000') == []
+
+
+def test_parse_area_script_drops_the_nationwide_and_repeated_entries():
+    text = ('var d_jobarea={hotcity:[{k:"000000",v:"全国"},{k:"010000",v:"北京"},{k:"080200",v:"杭州"}],'
+            'allProvince:[{k:"010000",v:"北京"},{k:"080000",v:"浙江"}]};')
+
+    assert parse_area_script(text) == [('010000', '北京'), ('080200', '杭州'), ('080000', '浙江')]
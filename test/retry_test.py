@@ -0,0 +1,146 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 10:30
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : failure classes, retry policies, circuit breaker and dead-letter table
+
+import requests
+import pytest
+from requests import exceptions as http
+from spider.fetcher import SliderChallenge, PageBlocked, StatusError
+from spider.retry import (classify, RetryPolicy, CircuitBreaker, TRANSIENT, CHALLENGE, BLOCKED, INVALID,
+                          REJECTED, UNKNOWN, CLOSED, OPEN, HALF_OPEN)
+from spider import deadletter
+from spider.deadletter import DeadLetterStore, shared_deadletter
+
+
+def status_error(status: int):
+    response = requests.Response()
+    response.status_code = status
+    return http.HTTPError(str(status), response=response)
+
+
+@pytest.mark.parametrize('error, errorClass', [
+    (StatusError('status 0'), REJECTED),
+    (PageBlocked('denied'), BLOCKED),
+    (SliderChallenge('slider'), CHALLENGE),
+    (status_error(403), BLOCKED),
+    (status_error(429), TRANSIENT),
+    (status_error(500), TRANSIENT),
+    (status_error(503), TRANSIENT),
+    (status_error(404), REJECTED),
+    (http.HTTPError('no response'), REJECTED),
+    (http.ConnectionError('reset'), TRANSIENT),
+    (http.ReadTimeout('slow'), TRANSIENT),
+    (ValueError('not json'), INVALID),
+    (KeyError('resultbody'), INVALID),
+    (RuntimeError('other'), UNKNOWN),
+])
+def test_classify(error, errorClass):
+    assert classify(error) == errorClass
+
+
+def test_backoff_is_bounded_by_the_exponential_cap():
+    policy = RetryPolicy(attempts=5, base=1, cap=6)
+    for attempt, bound in [(1, 1), (2, 2), (3, 4), (4, 6), (10, 6)]:
+        delays = [policy.delay(attempt) for _ in range(200)]
+        assert min(delays) >= 0
+        assert max(delays) <= bound
+
+
+def test_breaker_opens_on_failures_and_closes_on_a_good_probe():
+    breaker = CircuitBreaker(threshold=0.5, window=10, min_calls=4, cooldown=0.2)
+    for ok in [True, False, True]:
+        breaker.record(ok)
+    assert breaker.state == CLOSED
+    breaker.record(False)
+    assert breaker.state == OPEN
+
+    waited, probe = breaker.wait()
+    assert waited >= 0.1
+    assert probe is not None
+    breaker.record(False, probe)
+    assert breaker.state == OPEN
+
+    # The failed probe doubled the pause
+    waited, probe = breaker.wait()
+    assert waited >= 0.3
+    breaker.record(True, probe)
+    assert breaker.state == CLOSED
+    waited, probe = breaker.wait()
+    assert waited < 0.01
+    assert probe is None
+
+
+def test_breaker_ignores_the_requests_in_flight_when_it_opened():
+    breaker = CircuitBreaker(threshold=0.5, window=10, min_calls=2, cooldown=0.05)
+    _, stale = breaker.wait()
+    _, slow = breaker.wait()
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == OPEN
+
+    # The requests sent before the breaker opened come back while it is half open, the probe decides alone
+    _, probe = breaker.wait()
+    assert probe is not None and stale is None and slow is None
+    breaker.record(False, stale)
+    assert breaker.state == HALF_OPEN
+    breaker.record(True, slow)
+    assert breaker.state == HALF_OPEN
+    breaker.record(True, object())
+    assert breaker.state == HALF_OPEN
+    breaker.record(True, probe)
+    assert breaker.state == CLOSED
+
+    # Once closed, every outcome counts towards the window again
+    breaker.record(False, probe)
+    breaker.record(False, probe)
+    assert breaker.state == OPEN
+
+
+def test_dead_letter_tasks_stay_until_they_are_resolved(tmp_path):
+    store = DeadLetterStore(str(tmp_path / '51job.db'))
+    task = {'keyword': 'Python', 'area': '010000', 'page': 3, 'pageSize': 200, 'filters': {'salary': '05'}}
+    other = {'keyword': 'Python', 'area': '020000', 'page': 1, 'pageSize': 200}
+    store.add(task, BLOCKED, '403', 2)
+    store.add(task, BLOCKED, '403', 2)
+    store.add(other, TRANSIENT, 'timeout', 4)
+    assert store.stats() == {BLOCKED: 1, TRANSIENT: 1}
+    assert store.connect.execute('SELECT `failures`, `attempts` FROM `dead51` WHERE `area` = ?;',
+                                 ('010000',)).fetchone() == (2, 4)
+
+    plan = store.replay(errorClass=BLOCKED)
+    assert list(plan.tasks()) == [task]
+    assert len(store.replay()) == 2
+
+    store.resolve(task)
+    store.resolve(task)
+    assert store.stats() == {TRANSIENT: 1}
+    assert list(store.replay().tasks()) == [dict(other, filters={})]
+
+    store.close()
+
+
+def test_dead_letter_db_is_created_by_the_first_failed_task(tmp_path):
+    output = tmp_path / '51job.db'
+    store = DeadLetterStore(str(output))
+    task = {'keyword': 'Python', 'area': '010000', 'page': 1, 'pageSize': 200}
+    store.resolve(task)
+    assert len(store.replay()) == 0
+    assert store.stats() == {}
+    assert not output.exists()
+
+    store.add(task, BLOCKED, '403', 2)
+    assert output.exists()
+    assert store.stats() == {BLOCKED: 1}
+    store.close()
+
+
+def test_shared_dead_letter_store_is_kept_by_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(deadletter, '_shared', {})
+    first, second = str(tmp_path / 'a'), str(tmp_path / 'b')
+
+    assert shared_deadletter(first) is shared_deadletter(first)
+    assert shared_deadletter(first) is not shared_deadletter(second)
+    assert shared_deadletter(second).output == str(tmp_path / 'b' / '51job.db')
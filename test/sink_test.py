@@ -0,0 +1,41 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 12:00
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : process wide sinks across a fork
+
+import os
+import sqlite3
+import multiprocessing
+from spider.sink import base
+from spider.sink.base import open_sinks, close_sinks
+
+
+def child(directory: str, parent: int, table):
+    sink = open_sinks('job', 'db', directory)[0]
+    if id(sink) == parent:
+        os._exit(1)
+    sink.write_table(table)
+    close_sinks()
+    os._exit(0)
+
+
+def test_forked_worker_opens_its_own_sinks(tmp_path, make_table):
+    directory = str(tmp_path)
+    sink = open_sinks('job', 'db', directory)[0]
+    assert open_sinks('job', 'db', directory)[0] is sink
+
+    # The parent holds unflushed rows while the child writes and closes its sinks
+    sink.write_table(make_table(20))
+    process = multiprocessing.get_context('fork').Process(target=child, args=(directory, id(sink), make_table(10, 100)))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+    connect = sqlite3.connect(sink.output)
+    assert connect.execute('SELECT COUNT(*) FROM `job51`;').fetchone()[0] == 10
+    close_sinks()
+    assert connect.execute('SELECT COUNT(*) FROM `job51`;').fetchone()[0] == 30
+    connect.close()
+    assert base._opened == {}
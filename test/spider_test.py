@@ -8,7 +8,19 @@
 import sqlite3
 import pandas as pd
 from spider.area import areaspider51
-from spider import jobspider51, logger
+from spider import jobspider51, logger, metrics
+from spider.driver.driverpool import DriverPool
+from spider.fetcher import Fetcher, FallbackFetcher, HttpFetcher, BrowserFetcher
+from spider.scheduler import CrawlPlan, CrawlScheduler
+from spider.planner import QueryPlanner
+from spider.taskqueue import TaskQueue
+from spider.query import JobQuery
+from spider.cassette import CassetteStore, CassetteFetcher, RECORD, REPLAY
+from spider.mockserver import MockServer
+from spider.area.registry import shared_registry
+from spider.deadletter import shared_deadletter
+from spider import worker
+from spider.merge import merge, shard_outputs
 
 
 def area():
@@ -23,22 +35,45 @@ def part_spider():
         "pageSize": 200,
         "area": "000000"
     }
-    jobspider51.start(args=param, save_engine='both')
+    jobspider51.start(args=param, save_engine='both', all_pages=True)
     logger.close()
 
 
+def incremental_spider():
+    param = {
+        "keyword": "Python",
+        "page": 1,
+        "pageSize": 200,
+        "area": "000000"
+    }
+    jobspider51.start(args=param, save_engine='both', incremental=True)
+    logger.close()
+
+
+def metrics_spider():
+    metrics.enable(textfile="../output/metrics/spider.prom", summary="../output/metrics/spider.json", interval=15)
+    part_spider()
+    metrics.close()
+
+
 def full_spider(save_engine: str):
+    pool = DriverPool(size=1)
+    fetcher = FallbackFetcher(HttpFetcher(), BrowserFetcher(pool))
     save_to = {
-        'csv': lambda x: full_spider_csv(x),
-        'db': lambda x: full_spider_db(x),
-        'both': lambda x: full_spider_csv(x)
+        'csv': lambda x: full_spider_csv(x, fetcher),
+        'db': lambda x: full_spider_db(x, fetcher),
+        'both': lambda x: full_spider_csv(x, fetcher)
     }
     save = save_to[save_engine]
-    save(save_engine)
+    try:
+        save(save_engine)
+    finally:
+        fetcher.close()
+        pool.close()
     logger.close()
 
 
-def full_spider_csv(type: str):
+def full_spider_csv(type: str, fetcher: Fetcher = None):
     df = pd.read_csv('../output/area/51area.csv', header=None, names=None, skiprows=1, delimiter=',')
 
     for area in df[0]:
@@ -48,12 +83,12 @@ def full_spider_csv(type: str):
             "pageSize": 200,
             "area": area
         }
-        jobspider51.start(args=param, save_engine=type)
+        jobspider51.start(args=param, save_engine=type, fetcher=fetcher)
 
     logger.close()
 
 
-def full_spider_db(type: str):
+def full_spider_db(type: str, fetcher: Fetcher = None):
     results = None
     connect = sqlite3.connect("../output/area/51area.db")
     cursor = connect.cursor()
@@ -75,7 +110,149 @@ def full_spider_db(type: str):
             "pageSize": 200,
             "area": area[0]
         }
-        jobspider51.start(args=param, save_engine=type)
+        jobspider51.start(args=param, save_engine=type, fetcher=fetcher)
+
+
+def async_spider(save_engine: str):
+    plan = CrawlPlan.from_area_db(keywords=["Python"], path="../output/area/51area.db", pages=range(1, 2))
+    scheduler = CrawlScheduler(rate=0.5, burst=2, concurrency=4, endpoint_concurrency={'search-pc': 4})
+    scheduler.run(plan, save_engine)
+    logger.close()
+
+
+def planned_spider(save_engine: str):
+    areas = CrawlPlan.from_area_db(keywords=[], path="../output/area/51area.db").areas
+    plan = QueryPlanner(areas=areas, pageSize=200).plan(keywords=["Python"], area="000000")
+    logger.info('expected requests: ' + str(plan.report()))
+    scheduler = CrawlScheduler(rate=0.5, burst=2, concurrency=4)
+    scheduler.run(plan, save_engine)
+    logger.close()
+
+
+def queue_spider(processes: int = 4):
+    queue = TaskQueue("../output/job/task51.db")
+    plan = CrawlPlan.from_area_db(keywords=["Python"], path="../output/area/51area.db")
+    queue.seed(plan.tasks())
+    queue.close()
+    worker.run("../output/job/task51.db", save_engine='db', processes=processes, rate=0.5)
+    logger.close()
+
+
+def query():
+    jobs = JobQuery("../output/job/51job.db")
+    items, cursor = jobs.search(text="Python", area="浙江省宁波", pageSize=20)
+    logger.info('first page: ' + str(len(items)) + ' jobs, next cursor ' + str(cursor))
+    for item in jobs.iter(tag="五险一金", salaryMin=10000):
+        logger.info(item['jobName'] + ' ' + item['companyName'])
+    jobs.close()
+    logger.close()
+
+
+def record_spider():
+    cassette = CassetteStore("../output/cassette51.db", mode=RECORD)
+    areaspider51.start(save_engine='db', cassette=cassette)
+    fetcher = CassetteFetcher(cassette)
+    for page in range(1, 4):
+        param = {
+            "keyword": "Python",
+            "page": page,
+            "pageSize": 200,
+            "area": "000000"
+        }
+        jobspider51.start(args=param, save_engine='db', fetcher=fetcher)
+    fetcher.close()
+    cassette.close()
+    logger.close()
+
+
+def mock_spider(save_engine: str):
+    cassette = CassetteStore("../output/cassette51.db", mode=REPLAY)
+    with MockServer(cassette=cassette, total=10000, latency=0.05, error_rate=0.02) as server:
+        server.configure()
+        areaspider51.start(save_engine='both')
+        scheduler = CrawlScheduler(rate=100, burst=10, concurrency=8, fetcher=HttpFetcher())
+        scheduler.run(CrawlPlan.from_area_db(keywords=["Python"], path="../output/area/51area.db",
+                                             pages=range(1, 6)), save_engine)
+    cassette.close()
+    logger.close()
+
+
+def registry_spider():
+    registry = shared_registry()
+    index = registry.index
+    logger.info('areas: ' + str(len(index)) + ', 浙江 is ' + str(index.code('浙江')))
+    for code in index.children(index.code('浙江')):
+        logger.info(code + ' ' + index.name(code))
+    if registry.refresh(force=True):
+        areaspider51.start(save_engine='both')
+    plan = CrawlPlan.from_registry(keywords=["Python"], registry=registry)
+    logger.info('plan tasks: ' + str(len(plan)))
+    logger.close()
+
+
+def replay_spider(save_engine: str):
+    deadletter = shared_deadletter()
+    logger.info('dead-letter tasks by failure class: ' + str(deadletter.stats()))
+    scheduler = CrawlScheduler(rate=0.5, burst=2, concurrency=4)
+    scheduler.run(deadletter.replay(errorClass='blocked'), save_engine)
+    logger.close()
+
+
+def changes_spider():
+    jobs = JobQuery("../output/job/51job.db")
+    rows, cursor = jobs.changes("2023-12-01")
+    while rows:
+        for row in rows:
+            if row['version'] > 1:
+                logger.info(row['jobName'] + ' ' + row['companyName'] + ' changed: ' + str(row['changes']))
+        if cursor is None:
+            break
+        rows, cursor = jobs.changes("2023-12-01", cursor=cursor)
+    if rows:
+        logger.info(str(jobs.history(rows[0]['jobName'], rows[0]['area'], rows[0]['companyName'])))
+    jobs.close()
+    logger.close()
+
+
+def dictionary_spider():
+    with MockServer(total=10000, latency=0.05, error_rate=0.0) as server:
+        server.configure()
+        areaspider51.start(save_engine='both')
+        scheduler = CrawlScheduler(rate=100, burst=10, concurrency=8, fetcher=HttpFetcher())
+        scheduler.run(CrawlPlan.from_area_db(keywords=["Python"], path="../output/area/51area.db",
+                                             pages=range(1, 6)), 'dictdb')
+    jobs = JobQuery("../output/job/51job-dict.db")
+    items, cursor = jobs.search(text="Python", area="浙江省宁波", pageSize=20)
+    logger.info('first page: ' + str(len(items)) + ' jobs, next cursor ' + str(cursor))
+    jobs.close()
+    logger.close()
+
+
+def sharded_spider(processes: int = 4):
+    queue = TaskQueue("../output/job/task51.db")
+    plan = CrawlPlan.from_area_db(keywords=["Python"], path="../output/area/51area.db")
+    queue.seed(plan.tasks())
+    queue.close()
+    worker.run("../output/job/task51.db", save_engine='both', processes=processes, rate=0.5, sharded=True)
+    merge(shard_outputs('51job.db'), "../output/job/51job-merged.db")
+    merge(shard_outputs('51job.csv'), "../output/job/51job-merged.csv")
+    logger.close()
+
+
+def stats_spider():
+    with MockServer(total=10000, latency=0.05, error_rate=0.0) as server:
+        server.configure()
+        areaspider51.start(save_engine='both')
+        scheduler = CrawlScheduler(rate=100, burst=10, concurrency=8, fetcher=HttpFetcher())
+        scheduler.run(CrawlPlan.from_area_db(keywords=["Python", "Java"], path="../output/area/51area.db",
+                                             pages=range(1, 6)), 'db')
+    jobs = JobQuery("../output/job/51job.db")
+    for group in jobs.stats(by='area', issuedAfter='2023-11-01'):
+        logger.info(group['area'] + ': ' + str(group['postings']) + ' jobs, median salary ' +
+                    str(group['salaryQuantiles'][0.5]))
+    logger.info('by degree for Python: ' + str(jobs.stats(by='degree', keyword='Python')))
+    jobs.close()
+    logger.close()
 
 
 if __name__ == '__main__':
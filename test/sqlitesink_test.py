@@ -0,0 +1,151 @@
+# !/usr/bin/env python
+# -*-coding:utf-8 -*-
+# @Time    : 2026/10/19 08:00
+# @Author  : isixe
+# @Version : python3.10.6
+# @Desc    : upserts and version history of the sqlite sink
+
+import json
+import sqlite3
+import multiprocessing
+import pytest
+from spider.query import JobQuery
+from spider.sink import sqlitesink
+from spider.sink.sqlitesink import SQLiteSink
+
+
+def count(output: str, table: str):
+    connect = sqlite3.connect(output)
+    total = connect.execute(f'SELECT COUNT(*) FROM `{table}`;').fetchone()[0]
+    connect.close()
+    return total
+
+
+def test_unchanged_postings_are_not_written_again(tmp_path, make_table):
+    output = str(tmp_path / '51job.db')
+    sink = SQLiteSink(output)
+    sink.write_table(make_table(50))
+    assert sink.flush() == (50, 0, 0)
+    sink.write_table(make_table(50))
+    assert sink.flush() == (0, 0, 50)
+    sink.close()
+
+    assert count(output, 'job51') == 50
+    assert count(output, 'posting51') == 50
+    assert count(output, 'version51') == 50
+
+
+def test_changed_posting_is_updated_in_place_with_a_new_version(tmp_path, make_table):
+    output = str(tmp_path / '51job.db')
+    sink = SQLiteSink(output)
+    first = make_table(10)
+    sink.write_table(first)
+    sink.flush()
+
+    changed = first.iloc[[0]].copy()
+    old = changed['salary'].iloc[0]
+    changed['salary'] = '3-4万'
+    sink.write_table(changed)
+    assert sink.flush() == (0, 1, 0)
+    sink.close()
+
+    assert count(output, 'job51') == 10
+    query = JobQuery(output)
+    row = first.iloc[0]
+    history = query.history(row['jobName'], row['area'], row['companyName'])
+    jobs, _ = query.search(companyName=row['companyName'], pageSize=100)
+    query.close()
+
+    assert [version['version'] for version in history] == [1, 2]
+    assert history[0]['changes'] is None
+    assert history[1]['changes'] == {'salary': [old, '3-4万']}
+    assert history[0]['lastSeen'] is not None
+    assert '3-4万' in [job['salary'] for job in jobs if job['jobName'] == row['jobName']]
+
+
+def test_last_copy_of_a_posting_in_a_batch_wins(tmp_path, make_table):
+    output = str(tmp_path / '51job.db')
+    sink = SQLiteSink(output)
+    table = make_table(5)
+    changed = table.copy()
+    changed['degree'] = '博士'
+    sink.write_table(table)
+    sink.write_table(changed)
+    assert sink.flush() == (5, 0, 5)
+    sink.close()
+
+    connect = sqlite3.connect(output)
+    assert connect.execute('SELECT DISTINCT `degree` FROM `job51`;').fetchall() == [('博士',)]
+    assert connect.execute('SELECT MAX(`version`) FROM `posting51`;').fetchone()[0] == 1
+    connect.close()
+
+
+def write_part(output: str, tables: list, barrier):
+    sink = SQLiteSink(output, batch_size=50)
+    barrier.wait()
+    for table in tables:
+        sink.write_table(table)
+    sink.close()
+
+
+def test_concurrent_writers_merge_their_postings(tmp_path, make_table):
+    output = str(tmp_path / '51job.db')
+    SQLiteSink(output).close()
+
+    # The processes start together, every one writes 600 postings and half of them are also written by the next one
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(4)
+    parts = [[make_table(50, start) for start in range(index * 300, index * 300 + 600, 50)] for index in range(4)]
+    processes = [context.Process(target=write_part, args=(output, tables, barrier)) for tables in parts]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert [process.exitcode for process in processes] == [0, 0, 0, 0]
+    assert count(output, 'posting51') == 1500
+    assert count(output, 'job51') == 1500
+    assert count(output, 'version51') == 1500
+    connect = sqlite3.connect(output)
+    assert connect.execute('''SELECT SUM(`postings`) FROM `stats51` WHERE `keyword` = '' AND `facet` = '';''')\
+        .fetchone()[0] == 1500
+    connect.close()
+
+
+def test_version_changes_are_json_of_old_and_new_values(tmp_path, make_table):
+    output = str(tmp_path / '51job.db')
+    sink = SQLiteSink(output)
+    table = make_table(1)
+    sink.write_table(table)
+    sink.flush()
+    changed = table.copy()
+    changed['tags'] = 'Python,Linux'
+    changed['degree'] = '硕士'
+    sink.write_table(changed)
+    sink.close()
+
+    connect = sqlite3.connect(output)
+    changes = json.loads(connect.execute('SELECT `changes` FROM `version51` WHERE `version` = 2;').fetchone()[0])
+    connect.close()
+    assert changes['tags'][1] == 'Python,Linux'
+    assert changes['degree'][1] == '硕士'
+    assert set(changes) <= {'tags', 'degree'}
+
+
+def test_failed_flush_keeps_its_rows_and_raises(tmp_path, monkeypatch, make_table):
+    monkeypatch.setattr(sqlitesink, 'FLUSH_BACKOFF', 0)
+    output = str(tmp_path / '51job.db')
+    sink = SQLiteSink(output)
+    sink.connect.execute('PRAGMA busy_timeout=10;')
+    sink.write_table(make_table(20))
+
+    other = sqlite3.connect(output, timeout=0)
+    other.execute('BEGIN IMMEDIATE;')
+    with pytest.raises(sqlite3.OperationalError):
+        sink.flush()
+    other.rollback()
+    other.close()
+
+    assert sink.flush() == (20, 0, 0)
+    sink.close()
+    assert count(output, 'job51') == 20